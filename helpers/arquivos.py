@@ -0,0 +1,119 @@
+import os
+import secrets
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterable
+
+from helpers.logger import logger
+
+CAMINHO_STATUS_DO_PROCESSO = Path("/proc/self/status")
+# Protege a leitura da umask via os.umask, que a altera temporariamente
+_TRAVA_UMASK = threading.Lock()
+
+
+def obter_umask() -> int:
+    """
+    Umask atual do processo. No Linux é lida de /proc/self/status, sem
+    alterá-la; caso contrário, é obtida com os.umask e restaurada em seguida.
+    """
+    try:
+        with CAMINHO_STATUS_DO_PROCESSO.open(encoding="utf-8") as file:
+            for linha in file:
+                if linha.startswith("Umask:"):
+                    return int(linha.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    with _TRAVA_UMASK:
+        umask = os.umask(0o022)
+        os.umask(umask)
+    return umask
+
+
+def escrever_arquivo_atomicamente(
+    caminho: Path,
+    conteudo: str | bytes | Iterable[str] | Iterable[bytes],
+    permissoes: int | None = None,
+) -> Path:
+    """
+    Escreve o conteúdo em um arquivo temporário no mesmo diretório do destino,
+    grava-o em disco (fsync) e o renomeia para o caminho final, de forma que
+    leitores nunca vejam o arquivo pela metade, nem após uma queda do sistema.
+    O conteúdo pode ser uma string ou partes dela, ou bytes ou partes deles
+    (arquivo binário). O diretório do destino é criado se não existir.
+    Sem `permissoes`, o arquivo recebe as mesmas permissões de um open()
+    comum (0o666 menos a umask), e não as 0o600 do arquivo temporário.
+    """
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(conteudo, (str, bytes)):
+        conteudo = [conteudo]
+    partes = iter(conteudo)
+    primeira = next(partes, "")
+    descritor, caminho_temporario = tempfile.mkstemp(
+        dir=caminho.parent, prefix=f".{caminho.name}.", suffix=".tmp"
+    )
+    try:
+        if isinstance(primeira, bytes):
+            file = os.fdopen(descritor, "wb")
+        else:
+            file = os.fdopen(descritor, "w", encoding="utf-8")
+        with file:
+            file.write(primeira)
+            file.writelines(partes)
+            file.flush()
+            if permissoes is None:
+                permissoes = 0o666 & ~obter_umask()
+            os.fchmod(file.fileno(), permissoes)
+            os.fsync(file.fileno())
+        os.replace(caminho_temporario, caminho)
+        sincronizar_diretorio(caminho.parent)
+    except BaseException:
+        logger.error(f"Falha ao escrever o arquivo {caminho}")
+        Path(caminho_temporario).unlink(missing_ok=True)
+        raise
+
+    return caminho
+
+
+def sincronizar_diretorio(diretorio: Path) -> None:
+    """Grava em disco as entradas do diretório (por exemplo, após um rename)."""
+    try:
+        descritor = os.open(diretorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descritor)
+    except OSError:
+        # Nem todo sistema de arquivos permite fsync em diretórios
+        pass
+    finally:
+        os.close(descritor)
+
+
+def gerar_caminho_unico(base: Path, carimbo: str, extensao: str) -> Path:
+    """
+    Caminho "<base>_<carimbo>_<pid>-<aleatório>.<extensao>", único mesmo entre
+    processos e threads que gerem arquivos no mesmo diretório e segundo.
+    """
+    return Path(f"{base}_{carimbo}_{os.getpid()}-{secrets.token_hex(4)}.{extensao}")
+
+
+UNIDADES_DE_TAMANHO = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def converter_para_bytes(tamanho: str) -> int:
+    """
+    Converte um tamanho como "512M", "1.5G" ou "200000" (bytes) em bytes.
+    """
+    texto = tamanho.strip().upper().removesuffix("B").removesuffix("I")
+    unidade = texto[-1:] if texto[-1:] in UNIDADES_DE_TAMANHO else ""
+    try:
+        valor = float(texto[: len(texto) - len(unidade)])
+    except ValueError:
+        valor = -1
+    if valor <= 0:
+        mensagem = f"Tamanho inválido: {tamanho}. Exemplos: 512M, 2G, 100000"
+        logger.error(mensagem)
+        raise ValueError(mensagem)
+    return int(valor * UNIDADES_DE_TAMANHO[unidade])
@@ -1,5 +1,5 @@
 from contextlib import suppress
-from datetime import datetime
+from datetime import date, datetime
 
 from helpers.logger import logger
 
@@ -43,6 +43,55 @@ class DateHandler:
         logger.error(mensagem)
         raise ValueError(mensagem)
 
+    @staticmethod
+    def str_to_dates(datas: list[str], ignorar_erros: bool = False) -> list[int | None]:
+        """
+        Converte uma lista de strings em ordinais de data (date.toordinal()),
+        que podem ser comparados diretamente como inteiros.
+        Cada data distinta é convertida uma única vez. Os formatos de largura
+        fixa dd/mm/aaaa e aaaa-mm-dd são convertidos por fatiamento da string;
+        os demais passam por str_to_date. Strings vazias resultam em None e,
+        com `ignorar_erros`, datas inválidas também.
+        """
+        distintas = set(datas)
+        ordinais: dict[str, int | None] = dict.fromkeys(distintas)
+
+        # Agrupa as datas distintas pelo formato detectado
+        iso, brasileiras, outras = [], [], []
+        for data in distintas:
+            if len(data) == 10 and data[4] == "-" and data[7] == "-":
+                iso.append(data)
+            elif len(data) == 10 and data[2] == "/" and data[5] == "/":
+                brasileiras.append(data)
+            elif data:
+                outras.append(data)
+
+        for grupo, dia, mes, ano in (
+            (iso, slice(8, 10), slice(5, 7), slice(0, 4)),
+            (brasileiras, slice(0, 2), slice(3, 5), slice(6, 10)),
+        ):
+            for data in grupo:
+                partes = (data[ano], data[mes], data[dia])
+                # int() aceitaria "+1", " 1" e dígitos não ASCII, que o strptime
+                # de str_to_date rejeita: nesses casos a validação fica com ele
+                if not (data.isascii() and all(parte.isdigit() for parte in partes)):
+                    outras.append(data)
+                    continue
+                try:
+                    ordinais[data] = date(*map(int, partes)).toordinal()
+                except ValueError:
+                    # Ex.: "2025-02-30"; deixa a validação completa para str_to_date
+                    outras.append(data)
+
+        for data in outras:
+            try:
+                ordinais[data] = DateHandler.str_to_date(data).toordinal()
+            except ValueError:
+                if not ignorar_erros:
+                    raise
+
+        return [ordinais[data] for data in datas]
+
     @staticmethod
     def date_to_str(date: datetime) -> str:
         """Converte um objeto datetime.date para string no formato 'YYYY-MM-DD'."""
@@ -0,0 +1,88 @@
+import math
+import os
+from pathlib import Path
+
+RAIZ_CGROUP = Path("/sys/fs/cgroup")
+CAMINHO_CGROUP_DO_PROCESSO = Path("/proc/self/cgroup")
+CAMINHO_MEMINFO = Path("/proc/meminfo")
+# No cgroup v1, limites a partir deste valor significam "sem limite"
+SEM_LIMITE_V1 = 1 << 60
+
+
+def _ler(caminho: Path) -> str | None:
+    try:
+        return caminho.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+
+
+def _ler_inteiro(caminho: Path) -> int | None:
+    valor = _ler(caminho)
+    return int(valor) if valor and valor.lstrip("-").isdigit() else None
+
+
+def _diretorios_cgroup(controlador: str) -> list[tuple[Path, bool]]:
+    """
+    Diretórios do cgroup do processo para o controlador, do mais interno à
+    raiz, e se são do cgroup v2. O limite efetivo é o menor entre eles.
+    """
+    diretorios = []
+    for linha in (_ler(CAMINHO_CGROUP_DO_PROCESSO) or "").splitlines():
+        _, controladores, caminho = linha.split(":", 2)
+        if controladores == "":
+            base, v2 = RAIZ_CGROUP, True
+        elif controlador in controladores.split(","):
+            base, v2 = RAIZ_CGROUP / controladores, False
+        else:
+            continue
+        relativo = Path(caminho.lstrip("/"))
+        diretorios += [(base / pai, v2) for pai in (relativo, *relativo.parents)]
+    # Sem /proc/self/cgroup (ou em um namespace próprio), usa a raiz
+    diretorios += [(RAIZ_CGROUP, True), (RAIZ_CGROUP / controlador, False)]
+    return list(dict.fromkeys(diretorios))
+
+
+def memoria_disponivel() -> int | None:
+    """
+    Memória (bytes) que o processo ainda pode alocar: o menor valor entre os
+    limites do cgroup (v2 memory.max ou v1 memory.limit_in_bytes), descontado
+    o uso atual, e o MemAvailable de /proc/meminfo. None se for desconhecida.
+    """
+    candidatos = []
+    for diretorio, v2 in _diretorios_cgroup("memory"):
+        if v2:
+            limite = _ler_inteiro(diretorio / "memory.max")
+            uso = _ler_inteiro(diretorio / "memory.current")
+        else:
+            limite = _ler_inteiro(diretorio / "memory.limit_in_bytes")
+            uso = _ler_inteiro(diretorio / "memory.usage_in_bytes")
+        if limite is not None and limite < SEM_LIMITE_V1:
+            candidatos.append(max(limite - (uso or 0), 0))
+
+    for linha in (_ler(CAMINHO_MEMINFO) or "").splitlines():
+        if linha.startswith("MemAvailable:"):
+            candidatos.append(int(linha.split()[1]) * 1024)
+    return min(candidatos) if candidatos else None
+
+
+def cpus_disponiveis() -> int:
+    """
+    CPUs que o processo pode usar: as da afinidade do processo, limitadas
+    pela cota de CPU do cgroup (v2 cpu.max ou v1 cpu.cfs_quota_us).
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    for diretorio, v2 in _diretorios_cgroup("cpu"):
+        if v2:
+            cota, _, periodo = (_ler(diretorio / "cpu.max") or "max").partition(" ")
+            cota = int(cota) if cota.isdigit() else None
+            periodo = int(periodo) if periodo.isdigit() else None
+        else:
+            cota = _ler_inteiro(diretorio / "cpu.cfs_quota_us")
+            periodo = _ler_inteiro(diretorio / "cpu.cfs_period_us")
+        if cota and cota > 0 and periodo:
+            cpus = min(cpus, math.ceil(cota / periodo))
+    return max(cpus, 1)
@@ -0,0 +1,310 @@
+import heapq
+import pickle
+import tempfile
+from decimal import Decimal
+from hashlib import blake2b
+from itertools import chain
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from helpers.logger import logger
+from parser.modelos import Produto, Venda
+
+# Estimativa dos bytes ocupados em memória por produto agregado (chave do
+# dicionário, lista de estado, Decimals e inteiros), além do próprio nome
+BYTES_POR_PRODUTO = 400
+# Registros gravados por bloco nos arquivos ordenados, lidos um bloco por vez
+REGISTROS_POR_BLOCO = 1_000
+# A partir deste nível de particionamento, o orçamento de memória é ignorado
+NIVEL_MAXIMO = 8
+
+
+def _ler_blocos(caminho: Path) -> Iterator[tuple]:
+    """Percorre os registros gravados em blocos (listas) com pickle."""
+    with caminho.open("rb") as file:
+        while True:
+            try:
+                yield from pickle.load(file)
+            except EOFError:
+                return
+
+
+class ProdutosEmDisco:
+    """
+    Total por produto gravado em arquivos ordenados pelo índice da primeira
+    venda de cada produto. `items()` intercala os arquivos (heapq.merge) e
+    produz os produtos na mesma ordem do caminho em memória, mantendo em
+    memória apenas um bloco de cada arquivo.
+    """
+
+    def __init__(self, arquivos: list[Path], quantidade: int):
+        self.arquivos = arquivos
+        self.quantidade = quantidade
+
+    def __len__(self) -> int:
+        return self.quantidade
+
+    def items(self) -> Iterator[tuple[str, dict]]:
+        registros = heapq.merge(
+            *(_ler_blocos(arquivo) for arquivo in self.arquivos),
+            key=lambda registro: registro[1],
+        )
+        for nome, _, total, quantidade, preco_unitario, *_ in registros:
+            yield (
+                nome,
+                {
+                    "total": total,
+                    "quantidade": quantidade,
+                    "preco_unitario": preco_unitario,
+                },
+            )
+
+
+class AgregacaoExterna:
+    """
+    Calcula as métricas padrão (total de vendas, total por produto e maior
+    venda) com memória limitada a `memoria_maxima` bytes.
+
+    Enquanto os produtos cabem no orçamento, tudo fica em um dicionário, como
+    no caminho em memória. Ao excedê-lo, os produtos são distribuídos por hash
+    do nome em `particoes` arquivos temporários (runs) e o dicionário é
+    esvaziado. Ao final, cada partição é reduzida separadamente; uma partição
+    que ainda não caiba no orçamento é particionada de novo, com outro salt
+    de hash. O resultado é exato e idêntico ao do caminho em memória.
+    `finalizar` não consome as runs: novas vendas podem ser agregadas depois
+    dele (modo watch) e cada chamada reflete todas as vendas até então.
+
+    O estado de cada produto guarda os índices da primeira e da última venda,
+    para preservar a ordem dos produtos, o último preço unitário e a data e o
+    preço da primeira venda (usados na maior venda).
+    """
+
+    def __init__(self, memoria_maxima: int, particoes: int = 16):
+        if memoria_maxima <= 0:
+            mensagem = f"Memória máxima inválida: {memoria_maxima}"
+            logger.error(mensagem)
+            raise ValueError(mensagem)
+        self.memoria_maxima = memoria_maxima
+        self.particoes = particoes
+        self.total_vendas = Decimal("0.00")
+        self.quantidade_de_vendas = 0
+        self.produtos: dict[str, list] = {}
+        self.__estimativa = 0
+        self.__runs: dict[int, Path] | None = None
+        self.__diretorio: tempfile.TemporaryDirectory | None = None
+        self.__contador_arquivos = 0
+        self.__maior: tuple | None = None
+        # Arquivos ordenados do último finalizar, substituídos no próximo
+        self.__ordenados: list[Path] = []
+
+    @property
+    def despejou(self) -> bool:
+        """Indica se os produtos precisaram ser gravados em disco."""
+        return self.__runs is not None
+
+    def atualizar(self, venda: Venda) -> None:
+        total = venda.produto.preco * Decimal(venda.quantidade)
+        indice = self.quantidade_de_vendas
+        self.total_vendas += total
+        self.quantidade_de_vendas += 1
+        self.__mesclar_registro(
+            self.produtos,
+            (
+                venda.produto.nome,
+                indice,
+                # Mesma escala do TotalPorProduto, que parte de Decimal("0.00")
+                Decimal("0.00") + total,
+                venda.quantidade,
+                venda.produto.preco,
+                indice,
+                venda.produto.preco,
+                venda.data_str,
+            ),
+        )
+        if self.__excedeu_orcamento(self.produtos):
+            self.__runs = self.__despejar(self.produtos, 0, self.__runs)
+            self.produtos = {}
+            self.__estimativa = 0
+
+    def finalizar(self) -> dict:
+        """
+        Retorna as métricas padrão. Sem despejos, o total por produto é o
+        próprio dicionário em memória; caso contrário, é um ProdutosEmDisco,
+        válido até a próxima chamada de finalizar.
+        """
+        self.__maior = None
+        for arquivo in self.__ordenados:
+            arquivo.unlink(missing_ok=True)
+        self.__ordenados = []
+
+        if self.__runs is None:
+            total_por_produto = {}
+            for nome, estado in self.produtos.items():
+                self.__considerar_maior(nome, estado)
+                total_por_produto[nome] = {
+                    "total": estado[1],
+                    "quantidade": estado[2],
+                    "preco_unitario": estado[3],
+                }
+        else:
+            # As runs e os produtos em memória são apenas lidos, partição a
+            # partição; a estimativa dos produtos em memória é preservada
+            estimativa = self.__estimativa
+            em_memoria = self.__particionar(self.produtos, 0)
+            arquivos = []
+            try:
+                for particao in sorted(self.__runs.keys() | em_memoria.keys()):
+                    registros = em_memoria.get(particao, [])
+                    if run := self.__runs.get(particao):
+                        registros = chain(_ler_blocos(run), registros)
+                    arquivos += self.__reduzir(registros, nivel=1)
+            finally:
+                self.__estimativa = estimativa
+            self.__ordenados = [arquivo for arquivo, _ in arquivos]
+            quantidade = sum(tamanho for _, tamanho in arquivos)
+            logger.info(
+                f"{quantidade} produtos agregados em {len(arquivos)} arquivos "
+                "ordenados em disco"
+            )
+            total_por_produto = ProdutosEmDisco(self.__ordenados, quantidade)
+
+        maior_venda = None
+        if self.__maior:
+            nome, _, estado = self.__maior
+            maior_venda = Venda(
+                produto=Produto(nome=nome, preco=estado[5]),
+                quantidade=estado[2],
+                data_str=estado[6],
+            )
+        return {
+            "total_vendas": self.total_vendas,
+            "maior_venda": maior_venda,
+            "total_por_produto": total_por_produto,
+        }
+
+    def fechar(self) -> None:
+        """Remove os arquivos temporários."""
+        if self.__diretorio:
+            self.__diretorio.cleanup()
+            self.__diretorio = None
+
+    def __mesclar_registro(self, produtos: dict[str, list], registro: tuple) -> None:
+        nome, primeiro, total, quantidade, preco, ultimo, preco_inicial, data = registro
+        if (estado := produtos.get(nome)) is None:
+            produtos[nome] = [
+                primeiro,
+                total,
+                quantidade,
+                preco,
+                ultimo,
+                preco_inicial,
+                data,
+            ]
+            self.__estimativa += BYTES_POR_PRODUTO + len(nome)
+            return
+        estado[1] += total
+        estado[2] += quantidade
+        if primeiro < estado[0]:
+            estado[0], estado[5], estado[6] = primeiro, preco_inicial, data
+        if ultimo > estado[4]:
+            estado[3], estado[4] = preco, ultimo
+
+    def __excedeu_orcamento(self, produtos: dict) -> bool:
+        return self.__estimativa > self.memoria_maxima and len(produtos) > 1
+
+    def __novo_arquivo(self, sufixo: str) -> Path:
+        if self.__diretorio is None:
+            self.__diretorio = tempfile.TemporaryDirectory(prefix="vendas-cli-")
+        self.__contador_arquivos += 1
+        return Path(self.__diretorio.name) / f"{self.__contador_arquivos:06d}.{sufixo}"
+
+    def __despejar(
+        self, produtos: dict[str, list], nivel: int, runs: dict[int, Path] | None
+    ) -> dict[int, Path]:
+        """Acrescenta os produtos às runs de cada partição do nível."""
+        if runs is None:
+            runs = {}
+            logger.info(
+                f"Orçamento de memória excedido: gravando produtos em disco "
+                f"(nível {nivel}, {self.particoes} partições)"
+            )
+        for particao, registros in self.__particionar(produtos, nivel).items():
+            if particao not in runs:
+                runs[particao] = self.__novo_arquivo("run")
+            with runs[particao].open("ab") as file:
+                for inicio in range(0, len(registros), REGISTROS_POR_BLOCO):
+                    pickle.dump(registros[inicio : inicio + REGISTROS_POR_BLOCO], file)
+        return runs
+
+    def __particionar(
+        self, produtos: dict[str, list], nivel: int
+    ) -> dict[int, list[tuple]]:
+        """
+        Registros dos produtos agrupados pela partição do nível (hash do nome).
+        Cada nível usa o nível como salt do hash, de forma que os produtos de
+        uma partição se espalhem pelas partições do nível seguinte. (Um prefixo
+        no CRC32 não basta: para nomes de mesmo tamanho ele apenas aplica um XOR
+        constante ao hash, e a partição inteira iria para uma única partição.)
+        """
+        salt = nivel.to_bytes(blake2b.SALT_SIZE, "little")
+        por_particao: dict[int, list[tuple]] = {}
+        for nome, estado in produtos.items():
+            valor_hash = blake2b(nome.encode("utf-8"), digest_size=8, salt=salt)
+            particao = int.from_bytes(valor_hash.digest()) % self.particoes
+            por_particao.setdefault(particao, []).append((nome, *estado))
+        return por_particao
+
+    def __reduzir(self, registros: Iterable[tuple], nivel: int) -> list[tuple]:
+        """
+        Agrega os registros de uma partição e os grava ordenados pela primeira
+        venda. Retorna a lista de (arquivo ordenado, quantidade de produtos).
+        """
+        produtos: dict[str, list] = {}
+        self.__estimativa = 0
+        runs = None
+        for registro in registros:
+            self.__mesclar_registro(produtos, registro)
+            if nivel < NIVEL_MAXIMO and self.__excedeu_orcamento(produtos):
+                runs = self.__despejar(produtos, nivel, runs)
+                produtos = {}
+                self.__estimativa = 0
+
+        if runs is None:
+            if self.__estimativa > self.memoria_maxima:
+                logger.warning(
+                    "Partição de produtos excede o orçamento de memória no nível "
+                    f"máximo de particionamento ({NIVEL_MAXIMO})"
+                )
+            return [self.__gravar_ordenado(produtos)]
+
+        self.__despejar(produtos, nivel, runs)
+        arquivos = []
+        for run in runs.values():
+            arquivos += self.__reduzir(_ler_blocos(run), nivel + 1)
+            run.unlink()
+        return arquivos
+
+    def __gravar_ordenado(self, produtos: dict[str, list]) -> tuple[Path, int]:
+        caminho = self.__novo_arquivo("ordenado")
+        registros = sorted(
+            ((nome, *estado) for nome, estado in produtos.items()),
+            key=lambda registro: registro[1],
+        )
+        with caminho.open("wb") as file:
+            for inicio in range(0, len(registros), REGISTROS_POR_BLOCO):
+                pickle.dump(registros[inicio : inicio + REGISTROS_POR_BLOCO], file)
+        for nome, *estado in registros:
+            self.__considerar_maior(nome, estado)
+        return caminho, len(registros)
+
+    def __considerar_maior(self, nome: str, estado: list) -> None:
+        """
+        Mantém o produto de maior quantidade; no empate vence o que apareceu
+        primeiro, como no max() sobre os produtos em ordem de aparição.
+        """
+        if self.__maior is None:
+            self.__maior = (nome, estado[0], estado)
+            return
+        _, primeiro, maior = self.__maior
+        if estado[2] > maior[2] or (estado[2] == maior[2] and estado[0] < primeiro):
+            self.__maior = (nome, estado[0], estado)
@@ -0,0 +1,260 @@
+from decimal import Decimal
+from typing import Any, Iterable, Protocol
+
+from helpers.date_handler import DateHandler
+from parser.modelos import Venda
+
+DIAS_DA_SEMANA = [
+    "segunda-feira",
+    "terça-feira",
+    "quarta-feira",
+    "quinta-feira",
+    "sexta-feira",
+    "sábado",
+    "domingo",
+]
+
+
+class Agregador(Protocol):
+    """
+    Protocolo das métricas do relatório.
+    O estado é criado por `iniciar`, atualizado a cada venda por `atualizar`,
+    combinado com o estado de outro bloco de vendas (outra thread, processo ou
+    trecho do arquivo) por `mesclar` e convertido no resultado por `finalizar`.
+    `atualizar` e `mesclar` retornam o novo estado, que deve ser serializável
+    (pickle) para poder ser mesclado entre processos. Estados por produto usam
+    a chave de `chave_do_produto` e guardam apenas os produtos vendidos no bloco.
+    """
+
+    def iniciar(self) -> Any: ...
+
+    def atualizar(self, estado: Any, venda: Venda) -> Any: ...
+
+    def mesclar(self, estado: Any, outro: Any) -> Any: ...
+
+    def finalizar(self, estado: Any) -> Any: ...
+
+
+def iniciar_estados(agregadores: dict[str, Agregador]) -> dict[str, Any]:
+    return {nome: agregador.iniciar() for nome, agregador in agregadores.items()}
+
+
+def atualizar_estados(
+    agregadores: dict[str, Agregador], estados: dict[str, Any], venda: Venda
+) -> None:
+    for nome, agregador in agregadores.items():
+        estados[nome] = agregador.atualizar(estados[nome], venda)
+
+
+def mesclar_estados(
+    agregadores: dict[str, Agregador], estados: dict[str, Any], outros: dict[str, Any]
+) -> dict[str, Any]:
+    """Mescla `outros` (vendas posteriores) em `estados`."""
+    return {
+        nome: agregador.mesclar(estados[nome], outros[nome])
+        for nome, agregador in agregadores.items()
+    }
+
+
+def finalizar_estados(
+    agregadores: dict[str, Agregador], estados: dict[str, Any]
+) -> dict[str, Any]:
+    return {
+        nome: agregador.finalizar(estados[nome])
+        for nome, agregador in agregadores.items()
+    }
+
+
+def agregar(
+    agregadores: dict[str, Agregador], vendas: Iterable[Venda]
+) -> dict[str, Any]:
+    """Calcula todas as métricas em uma única passada pelas vendas."""
+    estados = iniciar_estados(agregadores)
+    for venda in vendas:
+        atualizar_estados(agregadores, estados, venda)
+    return finalizar_estados(agregadores, estados)
+
+
+def chave_do_produto(venda: Venda) -> int | str:
+    """
+    Chave do produto nos estados: o id, se o nome foi codificado na extração
+    (ver modelos.DicionarioDeProdutos), ou o próprio nome. As vendas de uma
+    mesma leitura são todas codificadas ou todas não codificadas.
+    """
+    if venda.id_produto is None:
+        return venda.produto.nome
+    return venda.id_produto
+
+
+class TotalVendas:
+    """Total das vendas (preço unitário x quantidade)."""
+
+    def iniciar(self) -> Decimal:
+        return Decimal("0.00")
+
+    def atualizar(self, estado: Decimal, venda: Venda) -> Decimal:
+        return estado + venda.produto.preco * Decimal(venda.quantidade)
+
+    def mesclar(self, estado: Decimal, outro: Decimal) -> Decimal:
+        return estado + outro
+
+    def finalizar(self, estado: Decimal) -> Decimal:
+        return estado
+
+
+class MaiorVenda:
+    """
+    Venda do produto com maior quantidade, somando vendas de mesmo nome.
+    O estado guarda a venda acumulada de cada produto (ver chave_do_produto),
+    na ordem da primeira venda.
+    """
+
+    def iniciar(self) -> dict[int | str, Venda]:
+        return {}
+
+    def atualizar(self, estado: dict[int | str, Venda], venda: Venda) -> dict:
+        chave = chave_do_produto(venda)
+        if (acumulada := estado.get(chave)) is None:
+            estado[chave] = Venda(
+                produto=venda.produto,
+                quantidade=venda.quantidade,
+                data_str=venda.data_str,
+                id_produto=venda.id_produto,
+            )
+        else:
+            acumulada.quantidade += venda.quantidade
+        return estado
+
+    def mesclar(
+        self, estado: dict[int | str, Venda], outro: dict[int | str, Venda]
+    ) -> dict:
+        for chave, venda in outro.items():
+            if (acumulada := estado.get(chave)) is None:
+                estado[chave] = venda
+            else:
+                acumulada.quantidade += venda.quantidade
+        return estado
+
+    def finalizar(self, estado: dict[int | str, Venda]) -> Venda | None:
+        if not estado:
+            return None
+        # Retorna a venda com maior quantidade (a primeira, em caso de empate)
+        return max(estado.values(), key=lambda v: v.quantidade)
+
+
+class TotalPorProduto:
+    """
+    Total, quantidade e último preço unitário de cada produto.
+    O estado guarda [total, quantidade, último Produto] de cada produto (ver
+    chave_do_produto), na ordem da primeira venda; o nome e o preço vêm do
+    último Produto, compartilhado com as vendas.
+    """
+
+    def iniciar(self) -> dict[int | str, list]:
+        return {}
+
+    def atualizar(self, estado: dict[int | str, list], venda: Venda) -> dict:
+        chave = chave_do_produto(venda)
+        total = venda.produto.preco * Decimal(venda.quantidade)
+        if (acumulado := estado.get(chave)) is None:
+            estado[chave] = [Decimal("0.00") + total, venda.quantidade, venda.produto]
+        else:
+            acumulado[0] += total
+            acumulado[1] += venda.quantidade
+            acumulado[2] = venda.produto
+        return estado
+
+    def mesclar(
+        self, estado: dict[int | str, list], outro: dict[int | str, list]
+    ) -> dict:
+        for chave, (total, quantidade, produto) in outro.items():
+            if (acumulado := estado.get(chave)) is None:
+                estado[chave] = [total, quantidade, produto]
+            else:
+                acumulado[0] += total
+                acumulado[1] += quantidade
+                acumulado[2] = produto
+        return estado
+
+    def finalizar(self, estado: dict[int | str, list]) -> dict[str, dict]:
+        return {
+            produto.nome: {
+                "total": total,
+                "quantidade": quantidade,
+                "preco_unitario": produto.preco,
+            }
+            for total, quantidade, produto in estado.values()
+        }
+
+
+class TicketMedio:
+    """Valor médio por venda."""
+
+    def iniciar(self) -> tuple[Decimal, int]:
+        return Decimal("0.00"), 0
+
+    def atualizar(self, estado: tuple, venda: Venda) -> tuple[Decimal, int]:
+        total, quantidade = estado
+        return total + venda.produto.preco * Decimal(venda.quantidade), quantidade + 1
+
+    def mesclar(self, estado: tuple, outro: tuple) -> tuple[Decimal, int]:
+        return estado[0] + outro[0], estado[1] + outro[1]
+
+    def finalizar(self, estado: tuple) -> Decimal:
+        total, quantidade = estado
+        if not quantidade:
+            return Decimal("0.00")
+        return (total / quantidade).quantize(Decimal("0.01"))
+
+
+class ReceitaPorDiaDaSemana:
+    """Receita total agrupada pelo dia da semana da venda."""
+
+    def iniciar(self) -> list[Decimal]:
+        return [Decimal("0.00")] * 7
+
+    def atualizar(self, estado: list[Decimal], venda: Venda) -> list[Decimal]:
+        ordinal = venda.data_ordinal
+        if ordinal is None:
+            ordinal = DateHandler.str_to_date(venda.data_str).toordinal()
+        # O ordinal 1 (01/01/0001) é uma segunda-feira
+        estado[(ordinal - 1) % 7] += venda.produto.preco * Decimal(venda.quantidade)
+        return estado
+
+    def mesclar(self, estado: list[Decimal], outro: list[Decimal]) -> list[Decimal]:
+        return [a + b for a, b in zip(estado, outro)]
+
+    def finalizar(self, estado: list[Decimal]) -> dict[str, Decimal]:
+        return dict(zip(DIAS_DA_SEMANA, estado))
+
+
+class PrecoMinMaxPorProduto:
+    """Menor e maior preço unitário praticado para cada produto."""
+
+    def iniciar(self) -> dict[str, tuple]:
+        return {}
+
+    def atualizar(self, estado: dict[str, tuple], venda: Venda) -> dict:
+        preco = venda.produto.preco
+        minimo, maximo = estado.get(venda.produto.nome, (preco, preco))
+        estado[venda.produto.nome] = (min(minimo, preco), max(maximo, preco))
+        return estado
+
+    def mesclar(self, estado: dict[str, tuple], outro: dict[str, tuple]) -> dict:
+        for nome, (minimo, maximo) in outro.items():
+            atual_minimo, atual_maximo = estado.get(nome, (minimo, maximo))
+            estado[nome] = (min(atual_minimo, minimo), max(atual_maximo, maximo))
+        return estado
+
+    def finalizar(self, estado: dict[str, tuple]) -> dict[str, dict]:
+        return {
+            nome: {"minimo": minimo, "maximo": maximo}
+            for nome, (minimo, maximo) in estado.items()
+        }
+
+
+AGREGADORES_PADRAO: dict[str, Agregador] = {
+    "total_vendas": TotalVendas(),
+    "maior_venda": MaiorVenda(),
+    "total_por_produto": TotalPorProduto(),
+}
@@ -0,0 +1,338 @@
+import os
+import sqlite3
+from csv import DictReader, reader
+from datetime import date
+from decimal import Decimal
+from hashlib import sha256
+from pathlib import Path
+from typing import IO, Iterator
+
+from helpers.date_handler import DateHandler
+from helpers.logger import logger
+from parser.modelos import Produto, Venda
+from parser.validacao import ValidadorDeVendas
+
+CABECALHO_SQLITE = b"SQLite format 3\x00"
+
+# Bytes finais da parte já ingerida de um arquivo cujo hash é guardado, para
+# verificar se ela continua igual (arquivo apenas acrescido de linhas)
+BYTES_DA_IMPRESSAO = 4096
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ingestoes (
+    id INTEGER PRIMARY KEY,
+    arquivo TEXT NOT NULL UNIQUE,
+    dispositivo INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    posicao INTEGER NOT NULL,
+    impressao TEXT NOT NULL,
+    linhas INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS vendas (
+    id INTEGER PRIMARY KEY,
+    ingestao_id INTEGER NOT NULL REFERENCES ingestoes (id),
+    produto TEXT NOT NULL,
+    quantidade INTEGER NOT NULL,
+    preco_centavos INTEGER NOT NULL,
+    preco_original TEXT NOT NULL,
+    data TEXT NOT NULL,
+    data_original TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_vendas_data ON vendas (data);
+CREATE INDEX IF NOT EXISTS idx_vendas_produto ON vendas (produto);
+CREATE INDEX IF NOT EXISTS idx_vendas_ingestao ON vendas (ingestao_id);
+"""
+
+
+def para_centavos(valor: Decimal) -> int:
+    return int(valor.quantize(Decimal("0.01")) * 100)
+
+
+def de_centavos(centavos: int) -> Decimal:
+    return Decimal(centavos).scaleb(-2)
+
+
+class BancoDeVendas:
+    """
+    Armazena o histórico de vendas em um banco SQLite local, com valores em
+    centavos (inteiros) e datas no formato ISO, indexadas por data e produto.
+    Os relatórios sobre o histórico são calculados com consultas agregadas.
+    """
+
+    def __init__(self, caminho_banco: str):
+        self.caminho_banco = Path(caminho_banco)
+        self.conexao = sqlite3.connect(self.caminho_banco)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(ESQUEMA)
+        colunas = {
+            coluna[1] for coluna in self.conexao.execute("PRAGMA table_info(ingestoes)")
+        }
+        if "posicao" not in colunas:
+            self.conexao.close()
+            mensagem = (
+                f"Banco {self.caminho_banco} criado por uma versão anterior; "
+                "ingira os arquivos em um novo banco."
+            )
+            logger.error(mensagem)
+            raise ValueError(mensagem)
+
+    @staticmethod
+    def e_banco(caminho: str) -> bool:
+        """Indica se o caminho aponta para um banco SQLite."""
+        try:
+            with open(caminho, "rb") as file:
+                return file.read(len(CABECALHO_SQLITE)) == CABECALHO_SQLITE
+        except OSError:
+            return False
+
+    def fechar(self) -> None:
+        self.conexao.close()
+
+    def ingerir(
+        self,
+        caminho_arquivo: str,
+        validador: ValidadorDeVendas | None = None,
+        linhas_por_lote: int = 100_000,
+    ) -> int:
+        """
+        Carrega um CSV de vendas no banco e retorna a quantidade de vendas
+        inseridas. As linhas são inseridas com executemany, em lotes, dentro de
+        uma única transação por arquivo.
+        Para cada arquivo é guardado até onde ele já foi ingerido: se ele
+        apenas recebeu novas linhas (mesmo inode e a parte já ingerida
+        inalterada), só as linhas novas são inseridas; se foi alterado ou
+        substituído, suas vendas são substituídas na mesma transação. Um arquivo
+        sem alterações é ignorado.
+        """
+        caminho = Path(caminho_arquivo)
+        if not caminho.exists():
+            mensagem = f"Arquivo {caminho} não encontrado."
+            logger.error(mensagem)
+            raise FileNotFoundError(mensagem)
+
+        validador = validador or ValidadorDeVendas()
+        total = 0
+        with caminho.open("rb") as file:
+            status = os.fstat(file.fileno())
+            campos = next(reader([file.readline().decode("utf-8")]), [])
+            ValidadorDeVendas.validar_cabecalho(campos)
+            inicio_dados = file.tell()
+            ingestao = self.conexao.execute(
+                "SELECT id, dispositivo, inode, posicao, impressao, linhas "
+                "FROM ingestoes WHERE arquivo = ?",
+                (str(caminho.resolve()),),
+            ).fetchone()
+            posicao, linhas_anteriores = inicio_dados, 0
+            acrescido = bool(ingestao) and self.__apenas_acrescido(
+                file, status, ingestao
+            )
+            if acrescido:
+                _, _, _, posicao, _, linhas_anteriores = ingestao
+                if posicao == status.st_size:
+                    logger.warning(f"Arquivo {caminho} já ingerido, ignorando.")
+                    return 0
+                logger.info(f"Arquivo {caminho} acrescido, ingerindo as linhas novas.")
+            elif ingestao:
+                logger.warning(
+                    f"Arquivo {caminho} alterado, substituindo as vendas ingeridas."
+                )
+
+            file.seek(posicao)
+            linhas = DictReader(
+                (linha.decode("utf-8") for linha in file), fieldnames=campos
+            )
+            # O cabeçalho é a linha 1 do arquivo
+            linhas_numeradas = (
+                (linhas_anteriores + linhas.line_num + 1, linha) for linha in linhas
+            )
+            try:
+                with self.conexao:
+                    ingestao_id = self.__iniciar_ingestao(caminho, ingestao, acrescido)
+                    registros = self.__converter(
+                        validador.ler_em_lotes(linhas_numeradas), ingestao_id
+                    )
+                    lote = []
+                    for registro in registros:
+                        lote.append(registro)
+                        if len(lote) >= linhas_por_lote:
+                            total += self.__inserir(lote)
+                            lote = []
+                    total += self.__inserir(lote)
+                    posicao = file.tell()
+                    self.conexao.execute(
+                        "UPDATE ingestoes SET dispositivo = ?, inode = ?, "
+                        "posicao = ?, impressao = ?, linhas = ? WHERE id = ?",
+                        (
+                            status.st_dev,
+                            status.st_ino,
+                            posicao,
+                            self.__impressao(file, posicao),
+                            linhas_anteriores + linhas.line_num,
+                            ingestao_id,
+                        ),
+                    )
+            finally:
+                validador.finalizar()
+
+        logger.info(f"{total} vendas de {caminho} ingeridas em {self.caminho_banco}")
+        return total
+
+    @staticmethod
+    def __impressao(file: IO[bytes], posicao: int) -> str:
+        """Hash dos últimos bytes antes de `posicao`."""
+        inicio = max(posicao - BYTES_DA_IMPRESSAO, 0)
+        file.seek(inicio)
+        return sha256(file.read(posicao - inicio)).hexdigest()
+
+    def __apenas_acrescido(
+        self, file: IO[bytes], status: os.stat_result, ingestao: tuple
+    ) -> bool:
+        """
+        Indica se o arquivo é o mesmo já ingerido, apenas com linhas novas no
+        final: mesmo inode, ao menos do tamanho já ingerido e com os últimos
+        bytes ingeridos inalterados.
+        """
+        _, dispositivo, inode, posicao, impressao, _ = ingestao
+        return (
+            (status.st_dev, status.st_ino) == (dispositivo, inode)
+            and status.st_size >= posicao
+            and self.__impressao(file, posicao) == impressao
+        )
+
+    def __iniciar_ingestao(
+        self, caminho: Path, ingestao: tuple | None, acrescido: bool
+    ) -> int:
+        """
+        Retorna o id da ingestão do arquivo, criando-a se necessário. Se o
+        arquivo não foi apenas acrescido, suas vendas anteriores são removidas.
+        """
+        if ingestao is None:
+            return self.conexao.execute(
+                "INSERT INTO ingestoes "
+                "(arquivo, dispositivo, inode, posicao, impressao, linhas) "
+                "VALUES (?, 0, 0, 0, '', 0)",
+                (str(caminho.resolve()),),
+            ).lastrowid
+        if not acrescido:
+            self.conexao.execute(
+                "DELETE FROM vendas WHERE ingestao_id = ?", (ingestao[0],)
+            )
+        return ingestao[0]
+
+    def __inserir(self, lote: list[tuple]) -> int:
+        self.conexao.executemany(
+            "INSERT INTO vendas "
+            "(ingestao_id, produto, quantidade, preco_centavos, preco_original, "
+            "data, data_original) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            lote,
+        )
+        return len(lote)
+
+    @staticmethod
+    def __converter(linhas: Iterator[dict], ingestao_id: int) -> Iterator[tuple]:
+        datas_iso: dict[str, str] = {}
+        for linha in linhas:
+            data_original = linha["data"]
+            if (data_iso := datas_iso.get(data_original)) is None:
+                data_iso = DateHandler.str_to_date(data_original).isoformat()
+                datas_iso[data_original] = data_iso
+            preco_original = linha["preco_unitario"]
+            yield (
+                ingestao_id,
+                linha["produto"],
+                int(linha["quantidade"]),
+                para_centavos(Decimal(preco_original)),
+                preco_original,
+                data_iso,
+                data_original,
+            )
+
+    @staticmethod
+    def __filtro(datas: tuple[date, ...], intervalo: bool) -> tuple[str, list]:
+        """Monta a cláusula WHERE conforme a semântica de filtros do Relatorio."""
+        if not datas:
+            return "", []
+        parametros = [data.isoformat() for data in datas]
+        if intervalo:
+            return "WHERE data BETWEEN ? AND ?", parametros
+        marcadores = ", ".join("?" for _ in parametros)
+        return f"WHERE data IN ({marcadores})", parametros
+
+    def possui_vendas(self, datas: tuple[date, ...] = (), intervalo: bool = False):
+        where, parametros = self.__filtro(datas, intervalo)
+        consulta = f"SELECT EXISTS (SELECT 1 FROM vendas {where})"
+        return bool(self.conexao.execute(consulta, parametros).fetchone()[0])
+
+    def obter_metricas(
+        self, datas: tuple[date, ...] = (), intervalo: bool = False
+    ) -> dict:
+        """
+        Calcula total de vendas, total por produto e maior venda com uma única
+        consulta agregada, no mesmo formato dos agregadores padrão.
+        """
+        where, parametros = self.__filtro(datas, intervalo)
+        consulta = f"""
+            SELECT a.produto, a.total, a.quantidade, ultima.preco_centavos,
+                   primeira.preco_original, primeira.data_original
+            FROM (
+                SELECT produto,
+                       SUM(quantidade * preco_centavos) AS total,
+                       SUM(quantidade) AS quantidade,
+                       MIN(id) AS primeira_id,
+                       MAX(id) AS ultima_id
+                FROM vendas {where}
+                GROUP BY produto
+            ) AS a
+            JOIN vendas AS primeira ON primeira.id = a.primeira_id
+            JOIN vendas AS ultima ON ultima.id = a.ultima_id
+            ORDER BY a.primeira_id
+        """
+        total_vendas = Decimal("0.00")
+        total_por_produto = {}
+        maior_venda = None
+        for (
+            nome,
+            total,
+            quantidade,
+            preco,
+            primeiro_preco,
+            data_original,
+        ) in self.conexao.execute(consulta, parametros):
+            total_vendas += de_centavos(total)
+            total_por_produto[nome] = {
+                "total": de_centavos(total),
+                "quantidade": quantidade,
+                "preco_unitario": de_centavos(preco),
+            }
+            if maior_venda is None or quantidade > maior_venda.quantidade:
+                maior_venda = Venda(
+                    produto=Produto(nome=nome, preco=Decimal(primeiro_preco)),
+                    quantidade=quantidade,
+                    data_str=data_original,
+                )
+
+        return {
+            "total_vendas": total_vendas,
+            "maior_venda": maior_venda,
+            "total_por_produto": total_por_produto,
+        }
+
+    def iterar_vendas(
+        self, datas: tuple[date, ...] = (), intervalo: bool = False
+    ) -> Iterator[Venda]:
+        """Percorre as vendas na ordem de ingestão, para métricas adicionais."""
+        where, parametros = self.__filtro(datas, intervalo)
+        cursor = self.conexao.execute(
+            "SELECT produto, quantidade, preco_original, data, data_original "
+            f"FROM vendas {where} ORDER BY id",
+            parametros,
+        )
+        for nome, quantidade, preco, data_iso, data_original in cursor:
+            yield Venda(
+                produto=Produto(nome=nome, preco=Decimal(preco)),
+                quantidade=quantidade,
+                data_str=data_original,
+                data_ordinal=date.fromisoformat(data_iso).toordinal(),
+            )
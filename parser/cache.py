@@ -0,0 +1,207 @@
+import fcntl
+import json
+import os
+import shutil
+import stat
+import time
+from contextlib import contextmanager
+from hashlib import sha256
+from pathlib import Path
+from typing import Iterator
+
+from helpers.arquivos import escrever_arquivo_atomicamente
+from helpers.logger import logger
+
+
+class CacheDeRelatorios:
+    """
+    Cache de relatórios endereçado pelo conteúdo: a chave é o hash da
+    identidade do arquivo de entrada (caminho, inode, tamanho e data de
+    modificação) e dos parâmetros do relatório. Se nada mudou, o relatório
+    já gerado é reaproveitado ao custo de uma chamada a stat.
+
+    Os relatórios do cache ficam em um subdiretório próprio de `diretorio`
+    (uma cópia de cada relatório registrado), de forma que a limpeza do cache
+    nunca remova os relatórios do usuário. Enquanto o relatório registrado
+    existir sem alterações, é ele que o cache retorna; a cópia só é usada se
+    ele tiver sido removido ou alterado. O índice é atualizado sob um lock
+    de arquivo, para que execuções simultâneas não percam entradas.
+    """
+
+    NOME_DIRETORIO = ".cache_relatorios"
+    NOME_INDICE = "indice.json"
+    NOME_LOCK = "indice.lock"
+    PADRAO_RELATORIOS = "relatorio_*"
+
+    def __init__(
+        self,
+        diretorio: Path,
+        idade_maxima_dias: float = 30,
+        tamanho_maximo_mb: float = 500,
+    ):
+        self.diretorio = Path(diretorio) / self.NOME_DIRETORIO
+        self.caminho_indice = self.diretorio / self.NOME_INDICE
+        self.idade_maxima_dias = idade_maxima_dias
+        self.tamanho_maximo_mb = tamanho_maximo_mb
+
+    @staticmethod
+    def gerar_chave(caminho_arquivo: str, parametros: dict) -> str | None:
+        """
+        Gera a chave do cache. Retorna None se o arquivo de entrada não existir.
+        """
+        caminho = Path(caminho_arquivo)
+        try:
+            status = caminho.stat()
+        except FileNotFoundError:
+            return None
+
+        identidade = {
+            "arquivo": str(caminho.resolve()),
+            "inode": status.st_ino,
+            "tamanho": status.st_size,
+            "modificado_em": status.st_mtime_ns,
+            "parametros": parametros,
+        }
+        return sha256(
+            json.dumps(identidade, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def obter(self, chave: str | None) -> Path | None:
+        """
+        Retorna o relatório registrado para a chave, se ele ainda existir sem
+        alterações, ou a cópia do cache, se ela ainda existir sem alterações.
+        """
+        if chave is None:
+            return None
+        if not (entrada := self.__ler_indice().get(chave)):
+            return None
+        original = entrada.get("original")
+        if original and self.__identidade(original) == entrada.get("identidade"):
+            logger.info(f"Relatório obtido do cache: {original}")
+            return Path(original)
+        # A cópia pode ser um hard link do original: se ele foi alterado no
+        # lugar, a cópia também foi e o relatório precisa ser gerado novamente
+        caminho = entrada["caminho"]
+        if self.__identidade(caminho) == entrada.get("identidade_copia"):
+            logger.info(f"Relatório obtido do cache: {caminho}")
+            return Path(caminho)
+        return None
+
+    @staticmethod
+    def __identidade(caminho: str | Path) -> list[int] | None:
+        """Inode, tamanho e data de modificação do arquivo, ou None se não existir."""
+        try:
+            status = Path(caminho).stat()
+        except OSError:
+            return None
+        return [status.st_dev, status.st_ino, status.st_size, status.st_mtime_ns]
+
+    def registrar(self, chave: str | None, caminho_relatorio: Path) -> Path | None:
+        """
+        Guarda uma cópia do relatório gerado no cache, associada à chave e ao
+        relatório original, e remove relatórios antigos do cache. Retorna o
+        caminho da cópia.
+        """
+        if chave is None:
+            return None
+        caminho_relatorio = Path(caminho_relatorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        caminho_cache = self.diretorio / f"relatorio_{chave}{caminho_relatorio.suffix}"
+        self.__copiar(caminho_relatorio, caminho_cache)
+        with self.__travar_indice():
+            indice = self.__ler_indice()
+            indice[chave] = {
+                "caminho": str(caminho_cache),
+                "original": str(caminho_relatorio),
+                "identidade": self.__identidade(caminho_relatorio),
+                "identidade_copia": self.__identidade(caminho_cache),
+                "criado_em": time.time(),
+            }
+            self.__remover_relatorios_antigos(indice, manter=caminho_cache)
+        return caminho_cache
+
+    @staticmethod
+    def __copiar(origem: Path, destino: Path) -> None:
+        """
+        Cria um hard link do relatório no cache (sem copiar o conteúdo) ou,
+        se o sistema de arquivos não permitir, uma cópia. O link é criado com
+        um nome temporário e renomeado, para substituir uma cópia anterior.
+        """
+        temporario = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+        temporario.unlink(missing_ok=True)
+        try:
+            os.link(origem, temporario)
+        except OSError:
+            shutil.copyfile(origem, temporario)
+        os.replace(temporario, destino)
+
+    @contextmanager
+    def __travar_indice(self) -> Iterator[None]:
+        """Lock exclusivo do índice entre processos, durante a leitura e escrita."""
+        with open(self.diretorio / self.NOME_LOCK, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __ler_indice(self) -> dict:
+        """Lê o índice; um índice ausente ou corrompido é tratado como vazio."""
+        try:
+            indice = json.loads(self.caminho_indice.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError, json.JSONDecodeError):
+            return {}
+        if not isinstance(indice, dict):
+            logger.warning(f"Índice do cache inválido, ignorado: {self.caminho_indice}")
+            return {}
+        return {
+            chave: entrada
+            for chave, entrada in indice.items()
+            if isinstance(entrada, dict) and isinstance(entrada.get("caminho"), str)
+        }
+
+    def __listar_relatorios(self) -> Iterator[tuple[os.stat_result, Path]]:
+        """
+        Relatórios do cache com seu stat. Outros processos podem remover
+        relatórios ao mesmo tempo; os que sumirem durante a listagem são ignorados.
+        """
+        for caminho in self.diretorio.glob(self.PADRAO_RELATORIOS):
+            try:
+                status = caminho.stat()
+            except FileNotFoundError:
+                continue
+            if stat.S_ISREG(status.st_mode):
+                yield status, caminho
+
+    def __remover_relatorios_antigos(self, indice: dict, manter: Path) -> None:
+        """
+        Remove os relatórios mais antigos que `idade_maxima_dias` e, em seguida,
+        os mais antigos até que o total caiba em `tamanho_maximo_mb`.
+        O relatório recém-gerado (`manter`) nunca é removido.
+        """
+        limite_idade = time.time() - self.idade_maxima_dias * 24 * 60 * 60
+        limite_tamanho = self.tamanho_maximo_mb * 1024 * 1024
+        relatorios = sorted(
+            self.__listar_relatorios(),
+            key=lambda item: item[0].st_mtime,
+            reverse=True,
+        )
+
+        tamanho_total = 0
+        for status, caminho in relatorios:
+            manter_relatorio = caminho.resolve() == manter.resolve()
+            if not manter_relatorio and (
+                status.st_mtime < limite_idade
+                or tamanho_total + status.st_size > limite_tamanho
+            ):
+                logger.debug(f"Removendo relatório antigo do cache: {caminho}")
+                caminho.unlink(missing_ok=True)
+                continue
+            tamanho_total += status.st_size
+
+        indice = {
+            chave: entrada
+            for chave, entrada in indice.items()
+            if Path(entrada["caminho"]).exists()
+        }
+        escrever_arquivo_atomicamente(self.caminho_indice, json.dumps(indice, indent=4))
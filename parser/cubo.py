@@ -0,0 +1,302 @@
+import json
+import mmap
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from csv import DictReader, reader
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterator
+
+from helpers.arquivos import escrever_arquivo_atomicamente
+from helpers.date_handler import DateHandler
+from helpers.logger import logger
+from parser.armazenamento import de_centavos, para_centavos
+from parser.modelos import DicionarioDeProdutos
+from parser.validacao import ValidadorDeVendas
+
+MAGICO = b"VNDCUBO1"
+VERSAO = 1
+# Ordem e tipo (array) dos vetores gravados no arquivo, após o cabeçalho
+VETORES = [
+    ("deslocamentos", "q"),
+    ("dias", "i"),
+    ("quantidades", "q"),
+    ("receitas", "q"),
+    ("quantidade_por_dia", "q"),
+    ("receita_por_dia", "q"),
+]
+
+
+def _alinhar(tamanho: int) -> int:
+    return (tamanho + 7) // 8 * 8
+
+
+class CuboDeVendas:
+    """
+    Quantidade e receita (em centavos) pré-calculadas por (produto, dia).
+
+    As células com vendas ficam em formato esparso por produto (CSR): as do
+    produto `p` ocupam as posições deslocamentos[p]:deslocamentos[p + 1] dos
+    vetores `dias` (dias desde `dia_inicial`, em ordem), `quantidades` e
+    `receitas`. Os totais de todos os produtos por dia ficam em vetores
+    densos. Fatias e agregações são reduções sobre trechos desses vetores.
+
+    O cubo é gravado em um único arquivo binário (cabeçalho JSON seguido dos
+    vetores alinhados em 8 bytes) e aberto com mmap, sem ler os vetores.
+    """
+
+    def __init__(
+        self,
+        produtos: DicionarioDeProdutos,
+        dia_inicial: int,
+        vetores: dict[str, array | memoryview],
+        mapa: mmap.mmap | None = None,
+    ):
+        self.produtos = produtos
+        self.dia_inicial = dia_inicial
+        self.vetores = vetores
+        self.quantidade_de_dias = len(vetores["receita_por_dia"])
+        self.__mapa = mapa
+
+    def __enter__(self) -> "CuboDeVendas":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.fechar()
+
+    @classmethod
+    def construir(
+        cls, caminho_arquivo: str, validador: ValidadorDeVendas | None = None
+    ) -> "CuboDeVendas":
+        """Constrói o cubo a partir de um CSV de vendas, em uma única passada."""
+        caminho = Path(caminho_arquivo)
+        if not caminho.exists():
+            mensagem = f"Arquivo {caminho} não encontrado."
+            logger.error(mensagem)
+            raise FileNotFoundError(mensagem)
+
+        validador = validador or ValidadorDeVendas()
+        produtos = DicionarioDeProdutos()
+        # (id do produto, ordinal do dia) -> [quantidade, receita em centavos]
+        celulas: dict[tuple[int, int], list[int]] = {}
+        with caminho.open("r", encoding="utf-8", newline="") as file:
+            campos = next(reader(file), [])
+            ValidadorDeVendas.validar_cabecalho(campos)
+            linhas = DictReader(file, fieldnames=campos)
+            # O cabeçalho é a linha 1 do arquivo
+            linhas_numeradas = ((linhas.line_num + 1, linha) for linha in linhas)
+            try:
+                for lote in validador.validar_em_lotes(linhas_numeradas):
+                    ordinais = DateHandler.str_to_dates(
+                        [linha["data"] for linha in lote]
+                    )
+                    for linha, ordinal in zip(lote, ordinais):
+                        quantidade = int(linha["quantidade"])
+                        receita = para_centavos(
+                            Decimal(linha["preco_unitario"]) * quantidade
+                        )
+                        chave = (produtos.codificar(linha["produto"]), ordinal)
+                        if (celula := celulas.get(chave)) is None:
+                            celulas[chave] = [quantidade, receita]
+                        else:
+                            celula[0] += quantidade
+                            celula[1] += receita
+            finally:
+                validador.finalizar()
+
+        if not celulas:
+            mensagem = "Nenhuma venda encontrada."
+            logger.warning(mensagem)
+            raise ValueError(mensagem)
+
+        dia_inicial = min(ordinal for _, ordinal in celulas)
+        quantidade_de_dias = max(ordinal for _, ordinal in celulas) - dia_inicial + 1
+        vetores = {nome: array(tipo) for nome, tipo in VETORES}
+        vetores["quantidade_por_dia"] = array("q", [0]) * quantidade_de_dias
+        vetores["receita_por_dia"] = array("q", [0]) * quantidade_de_dias
+        deslocamentos = vetores["deslocamentos"]
+        for (id_produto, ordinal), (quantidade, receita) in sorted(celulas.items()):
+            while len(deslocamentos) <= id_produto:
+                deslocamentos.append(len(vetores["dias"]))
+            dia = ordinal - dia_inicial
+            vetores["dias"].append(dia)
+            vetores["quantidades"].append(quantidade)
+            vetores["receitas"].append(receita)
+            vetores["quantidade_por_dia"][dia] += quantidade
+            vetores["receita_por_dia"][dia] += receita
+        deslocamentos.append(len(vetores["dias"]))
+
+        logger.info(
+            f"Cubo construído: {len(produtos)} produtos, {quantidade_de_dias} dias "
+            f"e {len(celulas)} células com vendas"
+        )
+        return cls(produtos, dia_inicial, vetores)
+
+    def salvar(self, caminho: Path) -> Path:
+        """Grava o cubo atomicamente em `caminho`."""
+        cabecalho = json.dumps(
+            {
+                "versao": VERSAO,
+                "ordem_de_bytes": sys.byteorder,
+                "dia_inicial": self.dia_inicial,
+                "tamanhos": {nome: len(self.vetores[nome]) for nome, _ in VETORES},
+                "produtos": self.produtos.nomes,
+            }
+        ).encode("utf-8")
+        cabecalho = cabecalho.ljust(_alinhar(len(cabecalho)))
+
+        def partes() -> Iterator[bytes]:
+            yield MAGICO + len(cabecalho).to_bytes(8, "little") + cabecalho
+            for nome, _ in VETORES:
+                dados = memoryview(self.vetores[nome]).cast("B")
+                yield dados
+                yield bytes(_alinhar(len(dados)) - len(dados))
+
+        caminho = escrever_arquivo_atomicamente(caminho, partes())
+        logger.info(f"Cubo gravado em: {caminho}")
+        return caminho
+
+    @classmethod
+    def abrir(cls, caminho: Path) -> "CuboDeVendas":
+        """Abre um cubo gravado, mapeando os vetores do arquivo em memória."""
+        caminho = Path(caminho)
+        if not caminho.exists():
+            mensagem = f"Arquivo {caminho} não encontrado."
+            logger.error(mensagem)
+            raise FileNotFoundError(mensagem)
+
+        with caminho.open("rb") as file:
+            mapa = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapa[: len(MAGICO)] != MAGICO:
+            mapa.close()
+            mensagem = f"Arquivo {caminho} não é um cubo de vendas."
+            logger.error(mensagem)
+            raise ValueError(mensagem)
+
+        inicio = len(MAGICO) + 8
+        tamanho_cabecalho = int.from_bytes(mapa[len(MAGICO) : inicio], "little")
+        cabecalho = json.loads(bytes(mapa[inicio : inicio + tamanho_cabecalho]))
+        if (
+            cabecalho["versao"] != VERSAO
+            or cabecalho["ordem_de_bytes"] != sys.byteorder
+        ):
+            mapa.close()
+            mensagem = f"Cubo {caminho} gravado em versão ou plataforma incompatível."
+            logger.error(mensagem)
+            raise ValueError(mensagem)
+
+        posicao = inicio + tamanho_cabecalho
+        vetores = {}
+        for nome, tipo in VETORES:
+            tamanho = cabecalho["tamanhos"][nome] * array(tipo).itemsize
+            vetores[nome] = memoryview(mapa)[posicao : posicao + tamanho].cast(tipo)
+            posicao += _alinhar(tamanho)
+        return cls(
+            DicionarioDeProdutos(cabecalho["produtos"]),
+            cabecalho["dia_inicial"],
+            vetores,
+            mapa,
+        )
+
+    def fechar(self) -> None:
+        """Libera o mapeamento do arquivo, se o cubo foi aberto com `abrir`."""
+        if self.__mapa is None:
+            return
+        for vetor in self.vetores.values():
+            vetor.release()
+        self.vetores = {}
+        self.__mapa.close()
+        self.__mapa = None
+
+    def __trecho(
+        self, nome: str, inicio: date | None, fim: date | None
+    ) -> tuple[int, int]:
+        """Posições das células do produto entre `inicio` e `fim` (inclusive)."""
+        id_produto = self.produtos.obter_id(nome)
+        primeira = self.vetores["deslocamentos"][id_produto]
+        ultima = self.vetores["deslocamentos"][id_produto + 1]
+        dias = self.vetores["dias"]
+        if inicio:
+            dia = inicio.toordinal() - self.dia_inicial
+            primeira = bisect_left(dias, dia, primeira, ultima)
+        if fim:
+            dia = fim.toordinal() - self.dia_inicial
+            ultima = bisect_right(dias, dia, primeira, ultima)
+        return primeira, ultima
+
+    def __dias(self, inicio: date | None, fim: date | None) -> slice:
+        """Trecho dos vetores por dia entre `inicio` e `fim` (inclusive)."""
+        primeiro = max(inicio.toordinal() - self.dia_inicial, 0) if inicio else 0
+        ultimo = fim.toordinal() - self.dia_inicial + 1 if fim else None
+        return slice(primeiro, max(ultimo, 0) if ultimo is not None else None)
+
+    def totais(
+        self,
+        nome: str | None = None,
+        inicio: date | None = None,
+        fim: date | None = None,
+    ) -> dict:
+        """Quantidade e receita de um produto (ou de todos) no período."""
+        if nome is None:
+            dias = self.__dias(inicio, fim)
+            quantidade = sum(self.vetores["quantidade_por_dia"][dias])
+            receita = sum(self.vetores["receita_por_dia"][dias])
+        else:
+            primeira, ultima = self.__trecho(nome, inicio, fim)
+            quantidade = sum(self.vetores["quantidades"][primeira:ultima])
+            receita = sum(self.vetores["receitas"][primeira:ultima])
+        return {"quantidade": quantidade, "receita": de_centavos(receita)}
+
+    def por_mes(self, nome: str | None = None) -> dict[str, dict]:
+        """Quantidade e receita por mês (aaaa-mm) de um produto ou de todos."""
+        if nome is None:
+            dias = range(self.quantidade_de_dias)
+            quantidades = self.vetores["quantidade_por_dia"]
+            receitas = self.vetores["receita_por_dia"]
+        else:
+            primeira, ultima = self.__trecho(nome, None, None)
+            dias = self.vetores["dias"][primeira:ultima]
+            quantidades = self.vetores["quantidades"][primeira:ultima]
+            receitas = self.vetores["receitas"][primeira:ultima]
+
+        meses: dict[str, list[int]] = {}
+        for dia, quantidade, receita in zip(dias, quantidades, receitas):
+            if not quantidade and not receita:
+                continue
+            mes = date.fromordinal(self.dia_inicial + dia).strftime("%Y-%m")
+            totais = meses.setdefault(mes, [0, 0])
+            totais[0] += quantidade
+            totais[1] += receita
+        return {
+            mes: {"quantidade": quantidade, "receita": de_centavos(receita)}
+            for mes, (quantidade, receita) in meses.items()
+        }
+
+    def melhor_dia(self, nome: str) -> dict:
+        """Dia de maior receita do produto (o primeiro, em caso de empate)."""
+        primeira, ultima = self.__trecho(nome, None, None)
+        receitas = self.vetores["receitas"][primeira:ultima]
+        posicao = primeira + max(range(len(receitas)), key=receitas.__getitem__)
+        return {
+            "data": date.fromordinal(
+                self.dia_inicial + self.vetores["dias"][posicao]
+            ).isoformat(),
+            "quantidade": self.vetores["quantidades"][posicao],
+            "receita": de_centavos(self.vetores["receitas"][posicao]),
+        }
+
+    def melhores_dias(self) -> dict[str, dict]:
+        """Dia de maior receita de cada produto."""
+        return {nome: self.melhor_dia(nome) for nome in self.produtos.nomes}
+
+    def participacao(
+        self, nome: str, inicio: date | None = None, fim: date | None = None
+    ) -> Decimal:
+        """Percentual da receita do período que veio do produto."""
+        receita_total = self.totais(None, inicio, fim)["receita"]
+        if not receita_total:
+            return Decimal("0.00")
+        receita = self.totais(nome, inicio, fim)["receita"]
+        return (receita * 100 / receita_total).quantize(Decimal("0.01"))
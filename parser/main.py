@@ -1,14 +1,25 @@
 import argparse
+import json
+import sys
+from pathlib import Path
 
+from helpers.arquivos import converter_para_bytes
+from helpers.date_handler import DateHandler
+from helpers.logger import logger
+from parser.armazenamento import BancoDeVendas
+from parser.cubo import CuboDeVendas
+from parser.motores import escolher_motor_do_arquivo
+from parser.observador import ObservadorDeArquivo
+from parser.pipeline import TAMANHO_BLOCO_PADRAO
 from parser.relatorios import Relatorio
+from parser.validacao import POLITICAS_DE_ERRO, ValidadorDeVendas
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Gera relatório de vendas a partir de um arquivo CSV."
-    )
+def adicionar_argumentos_de_relatorio(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
-        "caminho_arquivo", type=str, help="Caminho para o arquivo CSV de vendas."
+        "caminho_arquivo",
+        type=str,
+        help="Caminho para o arquivo CSV de vendas ou banco SQLite (ver ingest).",
     )
     parser.add_argument(
         "--format",
@@ -27,13 +38,288 @@ def main():
     parser.add_argument(
         "--end", type=str, default="", help="Data final para filtrar vendas (opcional)."
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--approx",
+        action="store_true",
+        help="Gera um relatório aproximado com memória constante (opcional).",
+    )
+    parser.add_argument(
+        "--on-error",
+        type=str,
+        default="fail",
+        choices=POLITICAS_DE_ERRO,
+        help="O que fazer com linhas inválidas (fail/skip/quarantine).",
+    )
+    parser.add_argument(
+        "--pre-scan",
+        type=float,
+        default=0,
+        metavar="MB",
+        help="Verifica os primeiros e últimos MB do arquivo antes de processá-lo.",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Processa o arquivo em um pipeline com N threads de parse e "
+        "agregação, sobrepostas à leitura (opcional).",
+    )
+    parser.add_argument(
+        "--block-size",
+        type=converter_para_bytes,
+        default=TAMANHO_BLOCO_PADRAO,
+        metavar="TAMANHO",
+        help="Tamanho dos blocos lidos pelo pipeline (padrão: 4M).",
+    )
+    adicionar_diretorio_de_saida(parser, "Diretório dos relatórios e da quarentena")
+
+
+def adicionar_diretorio_de_saida(parser: argparse.ArgumentParser, ajuda: str) -> None:
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default="output",
+        metavar="DIRETORIO",
+        help=f"{ajuda}, criado se necessário (padrão: output).",
+    )
+
+
+def watch(argumentos: list[str]) -> None:
+    """Observa o arquivo de vendas e regera o relatório a cada alteração."""
+    parser = argparse.ArgumentParser(
+        prog="vendas-cli watch",
+        description="Observa o arquivo CSV de vendas e atualiza o relatório.",
+    )
+    adicionar_argumentos_de_relatorio(parser)
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.5,
+        help="Segundos sem alterações antes de regerar o relatório.",
+    )
+    parser.add_argument(
+        "--intervalo",
+        type=float,
+        default=1.0,
+        help="Intervalo em segundos do polling quando não houver inotify.",
+    )
+    args = parser.parse_args(argumentos)
+
+    relatorio = Relatorio(
+        caminho_arquivo=args.caminho_arquivo,
+        formato=args.format,
+        data_inicial=args.start,
+        data_final=args.end,
+        aproximado=args.approx,
+        politica_de_erro=args.on_error,
+        pre_verificacao_mb=args.pre_scan,
+        trabalhadores=args.threads,
+        tamanho_bloco=args.block_size,
+        diretorio_saida=args.output_dir,
+    )
+    nome_saida = f"relatorio_{Path(args.caminho_arquivo).stem}"
+    caminho_saida = Path(args.output_dir) / nome_saida
+    observador = ObservadorDeArquivo(
+        args.caminho_arquivo, debounce=args.debounce, intervalo=args.intervalo
+    )
+
+    def ao_alterar():
+        # Um erro na leitura (linha inválida, arquivo ausente) não interrompe a
+        # observação: o relatório é regerado na próxima alteração do arquivo
+        try:
+            caminho_relatorio = relatorio.atualizar_relatorio(caminho_saida)
+        except Exception as erro:
+            logger.error(f"Falha ao atualizar o relatório: {erro}")
+            return
+        if caminho_relatorio:
+            print(f"Relatório atualizado em: {caminho_relatorio}")
+
+    ao_alterar()
+    try:
+        observador.observar(ao_alterar)
+    except KeyboardInterrupt:
+        observador.parar()
+
+
+def ingest(argumentos: list[str]) -> None:
+    """Carrega arquivos CSV de vendas em um banco SQLite para consultas históricas."""
+    parser = argparse.ArgumentParser(
+        prog="vendas-cli ingest",
+        description="Carrega arquivos CSV de vendas em um banco SQLite.",
+    )
+    parser.add_argument(
+        "caminhos_arquivos", nargs="+", help="Arquivos CSV de vendas a carregar."
+    )
+    parser.add_argument(
+        "--db",
+        type=str,
+        default="vendas.db",
+        help="Caminho do banco SQLite (padrão: vendas.db).",
+    )
+    parser.add_argument(
+        "--on-error",
+        type=str,
+        default="fail",
+        choices=POLITICAS_DE_ERRO,
+        help="O que fazer com linhas inválidas (fail/skip/quarantine).",
+    )
+    adicionar_diretorio_de_saida(parser, "Diretório da quarentena")
+    args = parser.parse_args(argumentos)
+
+    banco = BancoDeVendas(args.db)
+    try:
+        for caminho_arquivo in args.caminhos_arquivos:
+            validador = ValidadorDeVendas(
+                politica=args.on_error,
+                caminho_quarentena=Path(args.output_dir)
+                / f"quarentena_{Path(caminho_arquivo).stem}.csv",
+            )
+            total = banco.ingerir(caminho_arquivo, validador)
+            print(f"{total} vendas de {caminho_arquivo} carregadas em {args.db}")
+    finally:
+        banco.fechar()
+
+
+def cube(argumentos: list[str]) -> None:
+    """Constrói um cubo produto × dia das vendas e consulta fatias dele."""
+    parser = argparse.ArgumentParser(
+        prog="vendas-cli cube",
+        description="Pré-calcula quantidade e receita por produto e dia.",
+    )
+    subparsers = parser.add_subparsers(dest="acao", required=True)
+    construir = subparsers.add_parser("build", help="Constrói o cubo de um CSV.")
+    construir.add_argument("caminho_arquivo", help="Arquivo CSV de vendas.")
+    construir.add_argument(
+        "--output",
+        type=str,
+        default="",
+        help="Caminho do cubo (padrão: <output-dir>/<arquivo>.cubo).",
+    )
+    construir.add_argument(
+        "--on-error",
+        type=str,
+        default="fail",
+        choices=POLITICAS_DE_ERRO,
+        help="O que fazer com linhas inválidas (fail/skip/quarantine).",
+    )
+    adicionar_diretorio_de_saida(construir, "Diretório do cubo e da quarentena")
+    consultar = subparsers.add_parser("query", help="Consulta um cubo construído.")
+    consultar.add_argument("caminho_cubo", help="Arquivo do cubo (ver build).")
+    consultar.add_argument(
+        "--slice",
+        type=str,
+        default="total",
+        choices=["total", "monthly", "best-day", "share"],
+        help="Totais, totais por mês, dia de maior receita ou participação na "
+        "receita do período.",
+    )
+    consultar.add_argument("--product", type=str, default=None, help="Produto.")
+    consultar.add_argument("--start", type=str, default="", help="Data inicial.")
+    consultar.add_argument("--end", type=str, default="", help="Data final.")
+    args = parser.parse_args(argumentos)
+
+    if args.acao == "build":
+        stem = Path(args.caminho_arquivo).stem
+        diretorio_saida = Path(args.output_dir)
+        validador = ValidadorDeVendas(
+            politica=args.on_error,
+            caminho_quarentena=diretorio_saida / f"quarentena_{stem}.csv",
+        )
+        cubo = CuboDeVendas.construir(args.caminho_arquivo, validador)
+        caminho_cubo = cubo.salvar(
+            Path(args.output) if args.output else diretorio_saida / f"{stem}.cubo"
+        )
+        print(f"Cubo gerado em: {caminho_cubo}")
+        return
+
+    inicio = DateHandler.str_to_date(args.start)
+    fim = DateHandler.str_to_date(args.end)
+    with CuboDeVendas.abrir(Path(args.caminho_cubo)) as cubo:
+        if args.slice == "monthly":
+            resultado = cubo.por_mes(args.product)
+        elif args.slice == "best-day":
+            resultado = (
+                cubo.melhor_dia(args.product) if args.product else cubo.melhores_dias()
+            )
+        elif args.slice == "share":
+            if not args.product:
+                parser.error("--slice share requer --product")
+            resultado = {"participacao": cubo.participacao(args.product, inicio, fim)}
+        else:
+            resultado = cubo.totais(args.product, inicio, fim)
+    print(json.dumps(resultado, indent=4, ensure_ascii=False, default=str))
+
+
+COMANDOS = {"watch": watch, "ingest": ingest, "cube": cube}
+
+
+def main():
+    argumentos = sys.argv[1:]
+    if argumentos and argumentos[0] in COMANDOS:
+        COMANDOS[argumentos[0]](argumentos[1:])
+        return
+
+    parser = argparse.ArgumentParser(
+        description="Gera relatório de vendas a partir de um arquivo CSV."
+    )
+    adicionar_argumentos_de_relatorio(parser)
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Gera o relatório novamente mesmo que haja um idêntico em cache.",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=converter_para_bytes,
+        default=None,
+        metavar="TAMANHO",
+        help="Limita a memória da agregação (ex.: 512M), gravando em disco o "
+        "excedente (opcional).",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Limita a N os processos de agregação; com N maior que 1, força o "
+        "motor multiprocesso (padrão: escolhido pelas CPUs e pela memória).",
+    )
+    parser.add_argument(
+        "--assume-sorted",
+        action="store_true",
+        help="O arquivo está ordenado por data: lê apenas o trecho entre --start e "
+        "--end (opcional).",
+    )
+    args = parser.parse_args(argumentos)
 
+    # Sem limites informados, o motor é escolhido pelo relatório na leitura
+    motor = None
+    if args.max_memory or args.max_workers:
+        motor = escolher_motor_do_arquivo(
+            args.caminho_arquivo,
+            memoria_maxima=args.max_memory,
+            processos_maximos=args.max_workers,
+            # O pipeline de threads e a leitura ordenada de um trecho do arquivo
+            # têm precedência sobre o multiprocesso
+            paralelizavel=not (
+                args.threads or (args.assume_sorted and (args.start or args.end))
+            ),
+        )
     relatorio = Relatorio(
         caminho_arquivo=args.caminho_arquivo,
         formato=args.format,
         data_inicial=args.start,
         data_final=args.end,
+        aproximado=args.approx,
+        politica_de_erro=args.on_error,
+        pre_verificacao_mb=args.pre_scan,
+        usar_cache=not args.no_cache,
+        assumir_ordenado=args.assume_sorted,
+        trabalhadores=args.threads,
+        tamanho_bloco=args.block_size,
+        motor=motor,
+        diretorio_saida=args.output_dir,
     )
     caminho_relatorio = relatorio.gerar_relatorio()
     print(f"Relatório gerado em: {caminho_relatorio}")
@@ -1,5 +1,9 @@
+import threading
 from dataclasses import dataclass, field
 from decimal import Decimal
+from typing import Iterable
+
+from helpers.logger import logger
 
 
 @dataclass
@@ -13,3 +17,57 @@ class Venda:
     produto: Produto
     quantidade: int
     data_str: str = field(repr=False)
+    # Ordinal da data (date.toordinal()), quando já convertida na extração
+    data_ordinal: int | None = field(default=None, repr=False, compare=False)
+    # Id do produto no DicionarioDeProdutos da leitura, quando codificado na
+    # extração (apenas quando as vendas são mantidas em memória)
+    id_produto: int | None = field(default=None, repr=False, compare=False)
+
+
+class DicionarioDeProdutos:
+    """
+    Codifica os nomes dos produtos em ids inteiros sequenciais, na ordem em
+    que aparecem, para que os dados possam ser indexados por posição.
+    Pode ser compartilhado entre threads. Cada leitura tem o seu dicionário,
+    descartado com ela: os ids só valem para as vendas dessa leitura.
+    """
+
+    def __init__(self, nomes: Iterable[str] = ()):
+        self.nomes: list[str] = []
+        self.ids: dict[str, int] = {}
+        self.__trava = threading.Lock()
+        for nome in nomes:
+            self.codificar(nome)
+
+    def __getstate__(self) -> list[str]:
+        # A trava não pode ser serializada (pickle) para outro processo
+        return self.nomes
+
+    def __setstate__(self, nomes: list[str]) -> None:
+        self.__init__(nomes)
+
+    def __len__(self) -> int:
+        return len(self.nomes)
+
+    def __contains__(self, nome: str) -> bool:
+        return nome in self.ids
+
+    def codificar(self, nome: str) -> int:
+        """Retorna o id do produto, criando-o se ainda não existir."""
+        if (id_produto := self.ids.get(nome)) is None:
+            with self.__trava:
+                if (id_produto := self.ids.get(nome)) is None:
+                    self.nomes.append(nome)
+                    id_produto = self.ids[nome] = len(self.nomes) - 1
+        return id_produto
+
+    def obter_id(self, nome: str) -> int:
+        """Retorna o id de um produto existente."""
+        if (id_produto := self.ids.get(nome)) is None:
+            mensagem = f"Produto não encontrado: {nome}"
+            logger.error(mensagem)
+            raise ValueError(mensagem)
+        return id_produto
+
+    def decodificar(self, id_produto: int) -> str:
+        return self.nomes[id_produto]
@@ -0,0 +1,179 @@
+from csv import reader
+from dataclasses import dataclass
+from pathlib import Path
+
+from helpers.logger import logger
+from helpers.recursos import cpus_disponiveis, memoria_disponivel
+from parser.agregacao_externa import BYTES_POR_PRODUTO
+
+MOTORES = ["memoria", "streaming", "multiprocesso", "disco"]
+# Fração da memória disponível que a execução se permite usar
+FRACAO_DA_MEMORIA = 0.5
+# Memória da lista de vendas por byte do CSV (~260 bytes por linha de ~35 bytes,
+# medido pelos testes de desempenho), com folga
+BYTES_EM_MEMORIA_POR_BYTE = 8
+# Menor linha de venda plausível, para estimar a quantidade de linhas
+BYTES_POR_LINHA_MINIMO = 20
+# Memória de cada processo do motor multiprocesso, além dos estados agregados
+# (interpretador e um bloco de leitura convertido)
+MEMORIA_POR_PROCESSO = 96 * 1024 * 1024
+# Abaixo desse volume por processo, o custo de iniciar processos não compensa
+BYTES_POR_PROCESSO_MINIMO = 32 * 1024 * 1024
+# Bytes do início do arquivo usados para estimar os produtos distintos
+TAMANHO_AMOSTRA = 1024 * 1024
+
+
+@dataclass
+class EscolhaDeMotor:
+    motor: str
+    processos: int
+    # Orçamento de memória do motor em disco (bytes)
+    memoria_maxima: int | None
+    motivo: str
+
+
+def estimar_produtos(tamanho_entrada: int, linhas_amostra: int, distintos: int) -> int:
+    """
+    Estima os produtos distintos do arquivo a partir de uma amostra do início.
+    Se a amostra repete produtos, supõe-se que eles já foram quase todos
+    vistos (o dobro, por folga); caso contrário, extrapola-se a proporção
+    de produtos distintos por linha para o arquivo inteiro.
+    """
+    if not linhas_amostra:
+        return tamanho_entrada // BYTES_POR_LINHA_MINIMO
+    if distintos < linhas_amostra / 2:
+        return 2 * distintos
+    return tamanho_entrada // BYTES_POR_LINHA_MINIMO * distintos // linhas_amostra
+
+
+def escolher_motor(
+    tamanho_entrada: int,
+    produtos_estimados: int,
+    memoria_disponivel: int | None,
+    cpus: int,
+    memoria_maxima: int | None = None,
+    processos_maximos: int | None = None,
+    paralelizavel: bool = True,
+) -> EscolhaDeMotor:
+    """
+    Escolhe como o relatório é calculado, conforme o tamanho do arquivo, os
+    produtos distintos estimados, a memória disponível e as CPUs:
+
+    - multiprocesso: trechos do arquivo agregados em paralelo por processos,
+      quando há CPUs e volume suficientes e os estados cabem na memória;
+    - memoria: mantém a lista de vendas, quando ela cabe na memória;
+    - streaming: mantém apenas as métricas agregadas, quando elas cabem;
+    - disco: agregação com despejo em disco (ver parser.agregacao_externa).
+
+    `memoria_maxima` força o motor em disco com esse orçamento e
+    `processos_maximos` limita (ou, se maior que 1, força) o multiprocesso.
+    """
+    if memoria_maxima:
+        return EscolhaDeMotor(
+            "disco", 1, memoria_maxima, "orçamento de memória informado"
+        )
+
+    orcamento = memoria_disponivel * FRACAO_DA_MEMORIA if memoria_disponivel else None
+    memoria_dos_estados = produtos_estimados * BYTES_POR_PRODUTO
+
+    def cabe(memoria: float) -> bool:
+        return orcamento is None or memoria <= orcamento
+
+    if paralelizavel and (processos_maximos or cpus) > 1:
+        processos = min(
+            processos_maximos or cpus,
+            max(tamanho_entrada // BYTES_POR_PROCESSO_MINIMO, 1),
+        )
+        if orcamento is not None:
+            processos = min(
+                processos,
+                int(orcamento // (MEMORIA_POR_PROCESSO + memoria_dos_estados)),
+            )
+        if processos_maximos and processos_maximos > 1:
+            # Informado pelo usuário: usa os processos pedidos
+            processos = processos_maximos
+        if processos > 1:
+            return EscolhaDeMotor(
+                "multiprocesso", processos, None, f"{processos} processos"
+            )
+
+    if cabe(tamanho_entrada * BYTES_EM_MEMORIA_POR_BYTE + memoria_dos_estados):
+        return EscolhaDeMotor("memoria", 1, None, "as vendas cabem na memória")
+    if cabe(memoria_dos_estados):
+        return EscolhaDeMotor(
+            "streaming", 1, None, "apenas as métricas agregadas cabem na memória"
+        )
+    return EscolhaDeMotor(
+        "disco", 1, int(orcamento), "nem as métricas agregadas cabem na memória"
+    )
+
+
+def escolher_motor_do_arquivo(
+    caminho_arquivo: str | Path,
+    memoria_maxima: int | None = None,
+    processos_maximos: int | None = None,
+    paralelizavel: bool = True,
+    tamanho_amostra: int = TAMANHO_AMOSTRA,
+) -> EscolhaDeMotor | None:
+    """
+    Escolhe o motor para um CSV de vendas (ver escolher_motor), estimando os
+    produtos distintos por uma amostra do início do arquivo, e registra a
+    escolha no log. Retorna None se o arquivo não existir ou não tiver a
+    coluna produto: os erros ficam para a leitura.
+    """
+    try:
+        with Path(caminho_arquivo).open("rb") as file:
+            cabecalho = file.readline().decode("utf-8", errors="replace")
+            inicio_dados = file.tell()
+            tamanho_entrada = file.seek(0, 2) - inicio_dados
+            file.seek(inicio_dados)
+            amostra = file.read(tamanho_amostra)
+    except OSError:
+        return None
+    campos = next(reader([cabecalho]), [])
+    if "produto" not in campos:
+        return None
+
+    if len(amostra) < tamanho_entrada:
+        amostra = amostra[: amostra.rfind(b"\n") + 1]
+    linhas = [
+        linha
+        for linha in reader(amostra.decode("utf-8", errors="replace").splitlines())
+        if linha
+    ]
+    indice_produto = campos.index("produto")
+    distintos = len(
+        {linha[indice_produto] for linha in linhas if len(linha) > indice_produto}
+    )
+
+    memoria = memoria_disponivel()
+    cpus = cpus_disponiveis()
+    escolha = escolher_motor(
+        tamanho_entrada,
+        estimar_produtos(tamanho_entrada, len(linhas), distintos),
+        memoria,
+        cpus,
+        memoria_maxima=memoria_maxima,
+        processos_maximos=processos_maximos,
+        paralelizavel=paralelizavel,
+    )
+    registrar_escolha(escolha, tamanho_entrada, memoria, cpus)
+    return escolha
+
+
+def registrar_escolha(
+    escolha: EscolhaDeMotor,
+    tamanho_entrada: int,
+    memoria_disponivel: int | None,
+    cpus: int,
+) -> None:
+    memoria = (
+        f"{memoria_disponivel / 1024 / 1024:.0f} MB"
+        if memoria_disponivel
+        else "desconhecida"
+    )
+    logger.info(
+        f"Motor escolhido: {escolha.motor} ({escolha.motivo}); entrada de "
+        f"{tamanho_entrada / 1024 / 1024:.1f} MB, memória disponível {memoria}, "
+        f"{cpus} CPU(s)."
+    )
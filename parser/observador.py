@@ -0,0 +1,152 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable
+
+from helpers.logger import logger
+
+# Constantes do inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+EVENTO_INOTIFY = struct.Struct("iIII")
+
+
+class ObservadorDeArquivo:
+    """
+    Observa um arquivo e notifica quando ele for alterado.
+    Usa inotify quando disponível (Linux) e, caso contrário, faz polling via stat.
+    Rajadas de escritas são agrupadas: a notificação só ocorre depois que o
+    arquivo ficar `debounce` segundos sem novas alterações.
+    """
+
+    def __init__(
+        self,
+        caminho_arquivo: str,
+        debounce: float = 0.5,
+        intervalo: float = 1.0,
+        usar_inotify: bool = True,
+    ):
+        self.caminho_arquivo = Path(caminho_arquivo)
+        self.debounce = debounce
+        self.intervalo = intervalo
+        self.__parar = threading.Event()
+        self.__ultima_assinatura = self.__assinatura()
+        self.__inotify_fd = self.__iniciar_inotify() if usar_inotify else None
+
+    @property
+    def usa_inotify(self) -> bool:
+        return self.__inotify_fd is not None
+
+    def parar(self) -> None:
+        """Sinaliza para o laço de observação terminar."""
+        self.__parar.set()
+
+    def observar(self, ao_alterar: Callable[[], None]) -> None:
+        """
+        Executa `ao_alterar` a cada alteração (já com debounce) do arquivo,
+        até que `parar` seja chamado ou o processo seja interrompido.
+        """
+        modo = "inotify" if self.usa_inotify else "polling"
+        logger.info(f"Observando {self.caminho_arquivo} via {modo}")
+        try:
+            while not self.__parar.is_set():
+                if self.aguardar_alteracao():
+                    ao_alterar()
+        finally:
+            self.fechar()
+
+    def aguardar_alteracao(self) -> bool:
+        """
+        Bloqueia até o arquivo ser alterado e estabilizar.
+        Retorna False se a observação foi interrompida antes disso.
+        """
+        if self.usa_inotify:
+            return self.__aguardar_via_inotify()
+        return self.__aguardar_via_polling()
+
+    def fechar(self) -> None:
+        if self.__inotify_fd is not None:
+            os.close(self.__inotify_fd)
+            self.__inotify_fd = None
+
+    def __iniciar_inotify(self) -> int | None:
+        """Inicializa o inotify no diretório do arquivo, se a plataforma suportar."""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            descritor = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if descritor < 0:
+                return None
+            # Observa o diretório para também capturar substituições via rename
+            diretorio = str(self.caminho_arquivo.parent.resolve()).encode()
+            mascara = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+            if libc.inotify_add_watch(descritor, diretorio, mascara) < 0:
+                os.close(descritor)
+                return None
+        except (AttributeError, OSError, TypeError):
+            logger.warning("inotify indisponível, usando polling via stat.")
+            return None
+        return descritor
+
+    def __ler_eventos_inotify(self, timeout: float) -> bool:
+        """Indica se houve algum evento para o arquivo observado dentro do timeout."""
+        prontos, _, _ = select.select([self.__inotify_fd], [], [], timeout)
+        if not prontos:
+            return False
+
+        try:
+            dados = os.read(self.__inotify_fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+
+        houve_evento = False
+        posicao = 0
+        nome_alvo = self.caminho_arquivo.name.encode()
+        while posicao + EVENTO_INOTIFY.size <= len(dados):
+            _, _, _, tamanho = EVENTO_INOTIFY.unpack_from(dados, posicao)
+            inicio_nome = posicao + EVENTO_INOTIFY.size
+            nome = dados[inicio_nome : inicio_nome + tamanho]
+            if nome.rstrip(b"\0") == nome_alvo:
+                houve_evento = True
+            posicao = inicio_nome + tamanho
+        return houve_evento
+
+    def __aguardar_via_inotify(self) -> bool:
+        while not self.__parar.is_set():
+            if self.__ler_eventos_inotify(self.intervalo):
+                # Debounce: aguarda um período sem novos eventos
+                while self.__ler_eventos_inotify(self.debounce):
+                    pass
+                return True
+        return False
+
+    def __assinatura(self) -> tuple | None:
+        try:
+            status = self.caminho_arquivo.stat()
+        except FileNotFoundError:
+            return None
+        return (status.st_ino, status.st_size, status.st_mtime_ns)
+
+    def __aguardar_via_polling(self) -> bool:
+        while not self.__parar.wait(self.intervalo):
+            assinatura = self.__assinatura()
+            if assinatura == self.__ultima_assinatura:
+                continue
+            # Debounce: aguarda até a assinatura do arquivo estabilizar
+            while not self.__parar.wait(self.debounce):
+                assinatura_estavel = self.__assinatura()
+                if assinatura_estavel == assinatura:
+                    self.__ultima_assinatura = assinatura
+                    return True
+                assinatura = assinatura_estavel
+        return False
@@ -0,0 +1,59 @@
+import csv
+from typing import IO
+
+from helpers.date_handler import DateHandler
+
+
+class VendasForaDeOrdem(Exception):
+    """Venda com data anterior à da venda lida antes dela em um arquivo ordenado."""
+
+
+def ler_data_da_linha(linha: bytes, indice_data: int) -> int | None:
+    """Retorna a data (ordinal) de uma linha do CSV, ou None se não for válida."""
+    valores = next(csv.reader([linha.decode("utf-8", errors="replace")]), [])
+    if len(valores) <= indice_data:
+        return None
+    return DateHandler.str_to_dates([valores[indice_data]], ignorar_erros=True)[0]
+
+
+def encontrar_posicao_da_data(
+    file: IO[bytes], indice_data: int, ordinal: int, inicio_dados: int
+) -> int:
+    """
+    Busca binária, pela posição em bytes, da primeira linha com data maior ou
+    igual a `ordinal` em um arquivo ordenado por data. Cada passo lê apenas
+    uma linha, de forma que a busca custa O(log n) leituras.
+    Se uma das linhas consultadas não puder ser lida (por exemplo, um campo
+    entre aspas com quebra de linha), a busca recai no início dos dados.
+    """
+    inferior, superior = inicio_dados, file.seek(0, 2)
+    while inferior < superior:
+        meio = (inferior + superior) // 2
+        posicao = _inicio_da_proxima_linha(file, meio, inicio_dados)
+        linha = file.readline()
+        while linha and not linha.strip():
+            posicao += len(linha)
+            linha = file.readline()
+        if not linha or posicao >= superior:
+            # Não há linhas com dados entre o meio e o limite superior
+            superior = meio
+            continue
+
+        ordinal_linha = ler_data_da_linha(linha, indice_data)
+        if ordinal_linha is None:
+            return inicio_dados
+        if ordinal_linha < ordinal:
+            inferior = posicao + len(linha)
+        else:
+            superior = meio
+
+    return _inicio_da_proxima_linha(file, inferior, inicio_dados)
+
+
+def _inicio_da_proxima_linha(file: IO[bytes], posicao: int, inicio_dados: int) -> int:
+    """Posiciona o arquivo no início da primeira linha a partir de `posicao`."""
+    if posicao <= inicio_dados:
+        return file.seek(inicio_dados)
+    file.seek(posicao - 1)
+    file.readline()
+    return file.tell()
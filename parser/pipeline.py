@@ -0,0 +1,301 @@
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Iterator
+
+from helpers.logger import logger
+
+TAMANHO_BLOCO_PADRAO = 4 * 1024 * 1024
+
+
+def gil_habilitado() -> bool:
+    """Indica se o interpretador usa o GIL (False em builds free-threaded 3.13+)."""
+    verificar = getattr(sys, "_is_gil_enabled", None)
+    return verificar() if verificar else True
+
+
+@dataclass
+class Bloco:
+    """Trecho do arquivo terminado em uma quebra de linha (exceto o último)."""
+
+    indice: int
+    dados: bytes
+    # Número, no arquivo, da primeira linha do bloco
+    primeira_linha: int
+    quantidade_de_linhas: int
+    # Posição (em bytes) do fim do bloco no arquivo
+    posicao_final: int
+
+
+def dividir_em_trechos(
+    file: IO[bytes], inicio: int, partes: int
+) -> list[tuple[int, int]]:
+    """
+    Divide o arquivo, de `inicio` até o fim, em até `partes` trechos
+    (início, fim) de tamanhos próximos, cada um terminado em uma quebra de
+    linha (exceto o último), para serem processados de forma independente.
+    """
+    tamanho = file.seek(0, 2)
+    cortes = [inicio]
+    for parte in range(1, partes):
+        posicao = inicio + (tamanho - inicio) * parte // partes
+        if posicao <= cortes[-1]:
+            continue
+        file.seek(posicao - 1)
+        # Avança até o início da próxima linha (ou fica, se já estiver nele)
+        file.readline()
+        if cortes[-1] < (posicao := file.tell()) < tamanho:
+            cortes.append(posicao)
+    cortes.append(tamanho)
+    return [
+        (inicio_trecho, fim_trecho)
+        for inicio_trecho, fim_trecho in zip(cortes, cortes[1:])
+        if fim_trecho > inicio_trecho
+    ]
+
+
+class _Fim:
+    """Sinaliza o fim dos itens de uma fila."""
+
+
+@dataclass
+class _Falha:
+    erro: BaseException
+
+
+class _Cancelado(Exception):
+    """O pipeline foi interrompido enquanto o estágio aguardava uma fila."""
+
+
+class FilaMonitorada:
+    """
+    Fila limitada entre dois estágios, que registra a profundidade da fila a
+    cada inserção e o tempo que produtores e consumidores passaram bloqueados.
+    """
+
+    def __init__(self, nome: str, tamanho_maximo: int, cancelado: threading.Event):
+        self.nome = nome
+        self.fila: queue.Queue = queue.Queue(maxsize=tamanho_maximo)
+        self.cancelado = cancelado
+        self.__trava = threading.Lock()
+        self.__amostras = 0
+        self.__soma_profundidades = 0
+        self.__profundidade_maxima = 0
+        self.__espera_produtores = 0.0
+        self.__espera_consumidores = 0.0
+
+    def colocar(self, item: Any) -> None:
+        inicio = time.perf_counter()
+        while True:
+            try:
+                self.fila.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                if self.cancelado.is_set():
+                    raise _Cancelado
+        profundidade = self.fila.qsize()
+        with self.__trava:
+            self.__espera_produtores += time.perf_counter() - inicio
+            self.__amostras += 1
+            self.__soma_profundidades += profundidade
+            self.__profundidade_maxima = max(self.__profundidade_maxima, profundidade)
+
+    def retirar(self) -> Any:
+        inicio = time.perf_counter()
+        while True:
+            try:
+                item = self.fila.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if self.cancelado.is_set():
+                    raise _Cancelado
+        with self.__trava:
+            self.__espera_consumidores += time.perf_counter() - inicio
+        return item
+
+    def metricas(self) -> dict[str, float]:
+        with self.__trava:
+            return {
+                "capacidade": self.fila.maxsize,
+                "itens": self.__amostras,
+                "profundidade_media": round(
+                    self.__soma_profundidades / max(self.__amostras, 1), 2
+                ),
+                "profundidade_maxima": self.__profundidade_maxima,
+                "espera_produtores_s": round(self.__espera_produtores, 3),
+                "espera_consumidores_s": round(self.__espera_consumidores, 3),
+            }
+
+
+class PipelineDeLeitura:
+    """
+    Lê um arquivo em blocos de bytes e os processa em estágios ligados por
+    filas limitadas, para sobrepor a espera por E/S ao processamento:
+
+    - leitura: uma thread lê blocos de `tamanho_bloco` bytes, cortados na
+      última quebra de linha;
+    - processamento: `trabalhadores` threads aplicam `processar_bloco` a cada
+      bloco (decodificação, parse, validação e agregação parcial);
+    - mesclagem: quem itera `executar` recebe os resultados na ordem do
+      arquivo, para mesclá-los (ver Agregador.mesclar).
+
+    Em Python com GIL só a leitura se sobrepõe ao processamento; em builds
+    free-threaded (3.13+) os trabalhadores também rodam em paralelo.
+    Registros com quebra de linha dentro de aspas não são suportados, pois os
+    blocos são cortados em qualquer quebra de linha.
+    """
+
+    def __init__(
+        self,
+        processar_bloco: Callable[[Bloco], Any],
+        trabalhadores: int = 1,
+        tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+        profundidade: int = 4,
+    ):
+        if trabalhadores < 1 or tamanho_bloco < 1 or profundidade < 1:
+            mensagem = (
+                "Configuração de pipeline inválida: trabalhadores, tamanho do "
+                "bloco e profundidade das filas devem ser positivos."
+            )
+            logger.error(mensagem)
+            raise ValueError(mensagem)
+        self.processar_bloco = processar_bloco
+        self.trabalhadores = trabalhadores
+        self.tamanho_bloco = tamanho_bloco
+        self.profundidade = profundidade
+        self.metricas: dict[str, dict] = {}
+
+    def executar(
+        self, file: IO[bytes], primeira_linha: int, incremental: bool = False
+    ) -> Iterator[tuple[Bloco, Any]]:
+        """
+        Processa o arquivo a partir da posição atual e produz, na ordem do
+        arquivo, os pares (bloco, resultado de processar_bloco). No modo
+        incremental, uma última linha sem quebra de linha não é lida.
+        """
+        if self.trabalhadores > 1 and gil_habilitado():
+            logger.info(
+                "GIL habilitado: os trabalhadores do pipeline não rodam em "
+                "paralelo, apenas a leitura se sobrepõe ao processamento."
+            )
+        cancelado = threading.Event()
+        blocos = FilaMonitorada("blocos", self.profundidade, cancelado)
+        resultados = FilaMonitorada("resultados", self.profundidade, cancelado)
+        # Limita os blocos em processamento ou aguardando a ordem de mesclagem
+        em_andamento = threading.Semaphore(2 * self.profundidade + self.trabalhadores)
+        threads = [
+            threading.Thread(
+                target=self.__ler,
+                args=(file, primeira_linha, incremental, blocos, resultados),
+                kwargs={"em_andamento": em_andamento},
+                name="vendas-leitura",
+                daemon=True,
+            ),
+            *(
+                threading.Thread(
+                    target=self.__processar,
+                    args=(blocos, resultados),
+                    name=f"vendas-processamento-{indice}",
+                    daemon=True,
+                )
+                for indice in range(self.trabalhadores)
+            ),
+        ]
+        for thread in threads:
+            thread.start()
+
+        pendentes: dict[int, tuple[Bloco, Any]] = {}
+        proximo = 0
+        finalizados = 0
+        try:
+            while finalizados < self.trabalhadores:
+                item = resultados.retirar()
+                if isinstance(item, _Fim):
+                    finalizados += 1
+                    continue
+                if isinstance(item, _Falha):
+                    raise item.erro
+                pendentes[item[0].indice] = item
+                while proximo in pendentes:
+                    yield pendentes.pop(proximo)
+                    proximo += 1
+                    em_andamento.release()
+        finally:
+            cancelado.set()
+            for thread in threads:
+                thread.join()
+            self.metricas = {
+                "blocos": blocos.metricas(),
+                "resultados": resultados.metricas(),
+            }
+            logger.info(f"Métricas das filas do pipeline: {self.metricas}")
+
+    def __ler(
+        self,
+        file: IO[bytes],
+        numero_linha: int,
+        incremental: bool,
+        blocos: FilaMonitorada,
+        resultados: FilaMonitorada,
+        em_andamento: threading.Semaphore,
+    ) -> None:
+        try:
+            indice = 0
+            posicao = file.tell()
+            resto = b""
+            while dados := file.read(self.tamanho_bloco):
+                dados = resto + dados
+                corte = dados.rfind(b"\n") + 1
+                dados, resto = dados[:corte], dados[corte:]
+                if not dados:
+                    continue
+                posicao += len(dados)
+                quantidade = dados.count(b"\n")
+                self.__enviar(
+                    blocos,
+                    em_andamento,
+                    Bloco(indice, dados, numero_linha, quantidade, posicao),
+                )
+                numero_linha += quantidade
+                indice += 1
+            if resto and not incremental:
+                posicao += len(resto)
+                self.__enviar(
+                    blocos, em_andamento, Bloco(indice, resto, numero_linha, 1, posicao)
+                )
+            for _ in range(self.trabalhadores):
+                blocos.colocar(_Fim())
+        except _Cancelado:
+            return
+        except BaseException as erro:
+            logger.error(f"Falha na leitura do pipeline: {erro}")
+            self.__falhar(resultados, erro)
+
+    @staticmethod
+    def __enviar(
+        blocos: FilaMonitorada, em_andamento: threading.Semaphore, bloco: Bloco
+    ) -> None:
+        while not em_andamento.acquire(timeout=0.1):
+            if blocos.cancelado.is_set():
+                raise _Cancelado
+        blocos.colocar(bloco)
+
+    def __processar(self, blocos: FilaMonitorada, resultados: FilaMonitorada) -> None:
+        try:
+            while not isinstance(bloco := blocos.retirar(), _Fim):
+                resultados.colocar((bloco, self.processar_bloco(bloco)))
+            resultados.colocar(_Fim())
+        except _Cancelado:
+            return
+        except BaseException as erro:
+            self.__falhar(resultados, erro)
+
+    @staticmethod
+    def __falhar(resultados: FilaMonitorada, erro: BaseException) -> None:
+        """Repassa o erro de um estágio para quem itera o pipeline."""
+        try:
+            resultados.colocar(_Falha(erro))
+        except _Cancelado:
+            pass
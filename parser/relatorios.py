@@ -1,11 +1,39 @@
-from csv import DictReader
+import copy
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from csv import DictReader, reader
+from datetime import date
 from decimal import Decimal
+from functools import partial
 from pathlib import Path
-from typing import List
+from typing import IO, Any, Iterable, Iterator, List
 
+from helpers.arquivos import escrever_arquivo_atomicamente, gerar_caminho_unico
 from helpers.date_handler import DateHandler
 from helpers.logger import logger
-from parser.modelos import Produto, Venda
+from parser.agregacao_externa import AgregacaoExterna
+from parser.agregadores import (
+    AGREGADORES_PADRAO,
+    Agregador,
+    agregar,
+    atualizar_estados,
+    finalizar_estados,
+    iniciar_estados,
+    mesclar_estados,
+)
+from parser.armazenamento import BancoDeVendas
+from parser.cache import CacheDeRelatorios
+from parser.modelos import DicionarioDeProdutos, Produto, Venda
+from parser.motores import EscolhaDeMotor, escolher_motor_do_arquivo
+from parser.ordenacao import VendasForaDeOrdem, encontrar_posicao_da_data
+from parser.pipeline import (
+    TAMANHO_BLOCO_PADRAO,
+    Bloco,
+    PipelineDeLeitura,
+    dividir_em_trechos,
+)
+from parser.sketches import ResumoAproximado
+from parser.validacao import ErroDeLinha, ValidadorDeVendas
 
 
 class Relatorio:
@@ -15,9 +43,21 @@ class Relatorio:
         formato: str = "text",
         data_inicial: str = "",
         data_final: str = "",
+        aproximado: bool = False,
+        politica_de_erro: str = "fail",
+        pre_verificacao_mb: float = 0,
+        caminho_quarentena: str | None = None,
+        usar_cache: bool = True,
+        assumir_ordenado: bool = False,
+        trabalhadores: int = 0,
+        tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+        motor: EscolhaDeMotor | None = None,
+        diretorio_saida: str | Path = "output",
     ):
         """
         Inicializa o relatório com o caminho do arquivo, formato e datas opcionais.
+        As demais opções correspondem às do CLI (ver parser.main). Sem `motor`,
+        ele é escolhido na primeira leitura (ver parser.motores).
         """
         self.caminho_arquivo: str = caminho_arquivo
         self.formato: str = formato.lower()
@@ -28,7 +68,61 @@ class Relatorio:
         self.data_final: str = data_final
         self.vendas: List[Venda] = []
         self.produtos: List[Produto] = []
-        self.base_caminho_relatorio = Path("output/relatorio")
+        self.base_caminho_relatorio = Path(diretorio_saida) / "relatorio"
+        # Posição (em bytes) até onde o arquivo já foi lido, usada no modo watch
+        self.posicao_lida: int = 0
+        # (st_dev, st_ino) do arquivo lido, para detectar sua substituição
+        self.__identidade_arquivo: tuple[int, int] | None = None
+        self.resumo_aproximado = ResumoAproximado() if aproximado else None
+        # Quantidade de linhas de dados já lidas, usada para numerar os erros
+        self.linhas_lidas: int = 0
+        self.pre_verificacao_mb = pre_verificacao_mb
+        self.usar_cache = usar_cache
+        self.validador = ValidadorDeVendas(
+            politica=politica_de_erro,
+            caminho_quarentena=caminho_quarentena
+            or Path(diretorio_saida) / f"quarentena_{Path(caminho_arquivo).stem}.csv",
+        )
+        # Métricas calculadas em uma única passada, durante a extração
+        self.agregadores: dict[str, Agregador] = dict(AGREGADORES_PADRAO)
+        self.estados: dict[str, Any] | None = None
+        self.__vendas_agregadas: int = 0
+        # Limites do filtro de datas como ordinais, calculados na primeira venda
+        self.__filtro_ordinal: tuple | frozenset | None = None
+        # Preenchido quando o caminho informado é um banco SQLite (ver ingest)
+        self.banco: BancoDeVendas | None = None
+        self.memoria_maxima: int | None = None
+        self.agregacao_externa: AgregacaoExterna | None = None
+        self.assumir_ordenado = assumir_ordenado
+        self.trabalhadores = trabalhadores
+        self.tamanho_bloco = tamanho_bloco
+        # Profundidade das filas de cada estágio na última leitura em pipeline
+        self.metricas_do_pipeline: dict[str, dict] = {}
+        # Posição (em bytes) do início da última linha lida
+        self.__inicio_da_linha: int = 0
+        # Motor da leitura (None: escolhido na primeira leitura)
+        self.motor: str | None = None
+        self.processos: int = 1
+        if motor:
+            self.__aplicar_motor(motor)
+        # Nomes dos produtos codificados em ids e o último Produto instanciado
+        # por id, com o preço em texto da linha de origem, reaproveitado pelas
+        # linhas seguintes de mesmo preço (ver __converter_linhas)
+        self.__produtos_codificados = DicionarioDeProdutos()
+        self.__produtos_por_id: dict[int, tuple[str, Produto]] = {}
+
+    def registrar_agregador(self, nome: str, agregador: Agregador) -> None:
+        """
+        Registra uma métrica adicional, calculada na mesma passada que as demais
+        e incluída no relatório em "metricas_adicionais".
+        """
+        if nome in self.agregadores:
+            mensagem = f"Já existe uma métrica registrada com o nome: {nome}"
+            logger.error(mensagem)
+            raise ValueError(mensagem)
+        self.agregadores[nome] = agregador
+        # Força o recálculo das métricas já agregadas
+        self.estados = None
 
     def __validar_formato(self):
         """
@@ -48,59 +142,215 @@ class Relatorio:
         Gera o relatório e retorna o caminho do relatório gerado.
         """
         logger.debug("Iniciando relatório")
+        if BancoDeVendas.e_banco(self.caminho_arquivo):
+            return self.__gerar_relatorio_do_banco()
+
+        cache = chave = None
+        if self.usar_cache:
+            cache = CacheDeRelatorios(self.base_caminho_relatorio.parent)
+            chave = cache.gerar_chave(self.caminho_arquivo, self.__parametros())
+            if caminho_em_cache := cache.obter(chave):
+                return caminho_em_cache
+
         # Lê as vendas do arquivo
         self.__extrair_dados_de_vendas()
-        if not self.vendas:
+        if not self.__possui_vendas():
             message = "Nenhuma venda encontrada."
             logger.warning(message)
             raise ValueError(message)
 
-        return self.__obter_relatorio_conforme_formato()
+        try:
+            caminho_relatorio = self.__obter_relatorio_conforme_formato()
+        finally:
+            if self.agregacao_externa:
+                self.agregacao_externa.fechar()
+        if cache:
+            cache.registrar(chave, caminho_relatorio)
+        return caminho_relatorio
 
-    def __obter_relatorio_conforme_formato(self) -> Path:
-        logger.debug("Obtendo relatório conforme o formato")
-        match self.formato:
-            case "json":
-                relatorio = self.__gerar_relatorio_json()
+    def __gerar_relatorio_do_banco(self) -> Path:
+        """
+        Gera o relatório a partir do histórico ingerido no banco SQLite,
+        com as métricas calculadas por consultas agregadas indexadas.
+        """
+        logger.debug(f"Gerando relatório a partir do banco {self.caminho_arquivo}")
+        self.banco = BancoDeVendas(self.caminho_arquivo)
+        try:
+            if not self.banco.possui_vendas(*self.__obter_filtro_de_datas()):
+                message = "Nenhuma venda encontrada."
+                logger.warning(message)
+                raise ValueError(message)
+            return self.__obter_relatorio_conforme_formato()
+        finally:
+            self.banco.fechar()
+
+    def __obter_filtro_de_datas(self) -> tuple[tuple, bool]:
+        """
+        Retorna as datas do filtro e se elas formam um intervalo. Com apenas
+        uma das datas, as vendas devem ser exatamente da data informada.
+        """
+        if self.data_inicial and self.data_final:
+            self.__prepara_e_valida_as_datas()
+            return (self.data_inicial, self.data_final), True
+        datas = tuple(
+            DateHandler.str_to_date(data)
+            for data in (self.data_inicial, self.data_final)
+            if data
+        )
+        return datas, False
+
+    def __parametros(self) -> dict:
+        """Parâmetros que influenciam o conteúdo do relatório gerado."""
+        return {
+            # text e txt geram o mesmo relatório
+            "formato": "json" if self.formato == "json" else "txt",
+            "data_inicial": str(self.data_inicial),
+            "data_final": str(self.data_final),
+            "aproximado": self.resumo_aproximado is not None,
+            "politica_de_erro": self.validador.politica,
+            "base_caminho_relatorio": str(self.base_caminho_relatorio),
+            "metricas": [
+                f"{nome}:{type(agregador).__name__}"
+                for nome, agregador in self.agregadores.items()
+            ],
+        }
+
+    def atualizar_relatorio(self, caminho_saida: Path) -> Path | None:
+        """
+        Agrega apenas as linhas acrescentadas ao arquivo desde a última leitura
+        e reescreve atomicamente o relatório em `caminho_saida`.
+        Se o arquivo encolheu (foi truncado) ou foi substituído por outro
+        (outro inode), relê tudo do início. Se a leitura falhar, as vendas
+        agregadas são descartadas e a próxima chamada relê o arquivo do início.
+        Retorna None se ainda não houver vendas.
+        """
+        caminho_arquivo = Path(self.caminho_arquivo)
+        try:
+            status = caminho_arquivo.stat()
+        except FileNotFoundError:
+            status = None
+        if status is not None:
+            identidade = (status.st_dev, status.st_ino)
+            if self.__identidade_arquivo not in (None, identidade):
+                logger.warning(
+                    f"Arquivo {caminho_arquivo} substituído, relendo do início."
+                )
+                self.__reiniciar_leitura()
+            elif status.st_size < self.posicao_lida:
+                logger.warning(
+                    f"Arquivo {caminho_arquivo} truncado, relendo do início."
+                )
+                self.__reiniciar_leitura()
+            self.__identidade_arquivo = identidade
+
+        try:
+            self.__extrair_dados_de_vendas(incremental=True)
+        except Exception:
+            self.__reiniciar_leitura()
+            raise
+        if not self.__possui_vendas():
+            logger.warning("Nenhuma venda encontrada.")
+            return None
+
+        relatorio = self.__renderizar_relatorio()
+        # A extensão é acrescentada ao nome: with_suffix trocaria o trecho após
+        # o último ponto (relatorio_vendas.2025 viraria relatorio_vendas.txt)
+        caminho_saida = Path(caminho_saida)
+        caminho_saida = caminho_saida.with_name(f"{caminho_saida.name}.{self.formato}")
+        escrever_arquivo_atomicamente(caminho_saida, relatorio)
+        logger.info(f"Relatório atualizado em: {caminho_saida}")
+        return caminho_saida
+
+    def __reiniciar_leitura(self) -> None:
+        """Descarta as vendas agregadas, para reler o arquivo do início."""
+        self.vendas = []
+        self.produtos = []
+        self.estados = None
+        self.__vendas_agregadas = 0
+        self.posicao_lida = 0
+        self.linhas_lidas = 0
+        self.__produtos_codificados = DicionarioDeProdutos()
+        self.__produtos_por_id = {}
+        if self.resumo_aproximado:
+            self.resumo_aproximado = ResumoAproximado()
+        if self.agregacao_externa:
+            self.agregacao_externa.fechar()
+            self.agregacao_externa = AgregacaoExterna(self.memoria_maxima)
+
+    def __possui_vendas(self) -> bool:
+        if self.resumo_aproximado:
+            return self.resumo_aproximado.quantidade_de_vendas > 0
+        if self.agregacao_externa:
+            return self.agregacao_externa.quantidade_de_vendas > 0
+        if not self.__manter_vendas():
+            return self.__vendas_agregadas > 0
+        return bool(self.vendas)
+
+    def __manter_vendas(self) -> bool:
+        """Indica se as vendas extraídas são mantidas em memória."""
+        return self.motor in (None, "memoria")
+
+    def __renderizar_relatorio(self) -> Iterable[str]:
+        """
+        Retorna o relatório em partes, que são escritas à medida que são
+        geradas, sem montar o relatório inteiro em memória.
+        """
+        if self.formato != "json":
+            self.formato = "txt"
+        match self.formato, self.resumo_aproximado:
+            case "json", None:
+                return self.__gerar_relatorio_json()
+            case "json", _:
+                return self.__gerar_relatorio_aproximado_json()
+            case _, None:
+                return self.__gerar_relatorio_texto()
             case _:
-                relatorio = self.__gerar_relatorio_texto()
+                return self.__gerar_relatorio_aproximado_texto()
 
-        caminho_completo = Path(
-            f"{self.base_caminho_relatorio}_{DateHandler.obter_data_e_hora_para_salvar_relatorio()}.{self.formato}"  # noqa: E501
+    def __obter_relatorio_conforme_formato(self) -> Path:
+        logger.debug("Obtendo relatório conforme o formato")
+        relatorio = self.__renderizar_relatorio()
+
+        # Nome único e escrita atômica: jobs simultâneos podem compartilhar o
+        # diretório de saída sem sobrescrever nem ler relatórios pela metade
+        caminho_completo = gerar_caminho_unico(
+            self.base_caminho_relatorio,
+            DateHandler.obter_data_e_hora_para_salvar_relatorio(),
+            self.formato,
         )
-        with open(caminho_completo, "w", encoding="utf-8") as file:
-            file.write(relatorio)
-            logger.info(
-                f"Relatório gerado com sucesso! Acesse-o em: {caminho_completo}"
-            )
+        escrever_arquivo_atomicamente(caminho_completo, relatorio)
+        logger.info(f"Relatório gerado com sucesso! Acesse-o em: {caminho_completo}")
 
         return caminho_completo
 
-    def __gerar_relatorio_json(self):
-        """Gera o relatório no formato JSON."""
+    def __gerar_relatorio_json(self) -> Iterator[str]:
+        """
+        Gera o relatório no formato JSON. O total por produto é escrito produto
+        a produto, com a mesma formatação de json.dumps(indent=4).
+        """
         import json
 
-        # Calcula o total de vendas
-        total_vendas = self.__calcular_total_vendas()
+        # Calcula todas as métricas em uma única passada
+        metricas = self.__obter_metricas()
+        total_vendas = metricas["total_vendas"]
 
         # Obtém a maior venda
-        maior_venda = self.__obter_maior_venda()
+        maior_venda = metricas["maior_venda"]
         produto_mais_vendido = maior_venda.produto if maior_venda else None
         quantidade_mais_vendida = maior_venda.quantidade if maior_venda else 0
 
         # Obtém o total de vendas por produto
-        total_vendas_por_produto = self.__obter_total_de_vendas_por_produto()
+        total_vendas_por_produto = metricas["total_por_produto"]
+        metricas_adicionais = {
+            nome: valor
+            for nome, valor in metricas.items()
+            if nome not in AGREGADORES_PADRAO
+        }
 
+        marcador = "__total_por_produto__"
         relatorio = {
             "total_vendas": str(total_vendas),
-            "total_por_produto": {
-                nome: {
-                    "total": str(valor["total"]),
-                    "quantidade": valor["quantidade"],
-                    "preco_unitario": f"R${valor['preco_unitario']:.2f}",
-                }
-                for nome, valor in total_vendas_por_produto.items()
-            },
+            "total_por_produto": marcador,
             "produto_mais_vendido": (
                 {
                     "nome": produto_mais_vendido.nome,
@@ -112,48 +362,143 @@ class Relatorio:
                 else None
             ),
         }
-        logger.info("Relatório de vendas em JSON gerado com sucesso!")
-        return json.dumps(relatorio, indent=4)
+        if metricas_adicionais:
+            relatorio["metricas_adicionais"] = metricas_adicionais
+        inicio, fim = json.dumps(relatorio, indent=4, default=str).split(
+            json.dumps(marcador)
+        )
 
-    def __gerar_relatorio_texto(self):
-        """Gera o relatório no formato de texto."""
+        yield inicio
+        separador = "{\n"
+        for nome, valor in total_vendas_por_produto.items():
+            produto = {
+                "total": str(valor["total"]),
+                "quantidade": valor["quantidade"],
+                "preco_unitario": f"R${valor['preco_unitario']:.2f}",
+            }
+            yield separador
+            yield f"        {json.dumps(nome)}: " + json.dumps(
+                produto, indent=4
+            ).replace("\n", "\n        ")
+            separador = ",\n"
+        yield "{}" if separador == "{\n" else "\n    }"
+        yield fim
+        logger.info("Relatório de vendas em JSON gerado com sucesso!")
 
-        self.formato = "txt"
+    def __gerar_relatorio_texto(self) -> Iterator[str]:
+        """Gera o relatório no formato de texto, produto a produto."""
 
-        # Calcula o total de vendas
-        total_vendas = self.__calcular_total_vendas()
+        # Calcula todas as métricas em uma única passada
+        metricas = self.__obter_metricas()
+        total_vendas = metricas["total_vendas"]
 
         # Obtém a maior venda
-        maior_venda = self.__obter_maior_venda()
+        maior_venda = metricas["maior_venda"]
         produto_mais_vendido = maior_venda.produto if maior_venda else None
         quantidade_mais_vendida = maior_venda.quantidade if maior_venda else 0
 
         # Obtém o total de vendas por produto
-        total_vendas_por_produto = self.__obter_total_de_vendas_por_produto()
+        total_vendas_por_produto = metricas["total_por_produto"]
+        metricas_adicionais = {
+            nome: valor
+            for nome, valor in metricas.items()
+            if nome not in AGREGADORES_PADRAO
+        }
 
-        relatorio = "Relatório de Vendas\n"
-        relatorio += f"Total em Vendas: R${total_vendas:.2f}\n"
-        relatorio += "Total de vendas por produto:\n"
+        yield "Relatório de Vendas\n"
+        yield f"Total em Vendas: R${total_vendas:.2f}\n"
+        yield "Total de vendas por produto:\n"
         for nome, valor in total_vendas_por_produto.items():
-            relatorio += f"  * {nome}: \n"
+            relatorio = f"  * {nome}: \n"
             relatorio += f"    - Preço: R${valor['total']:.2f}\n"
             relatorio += f"    - Quantidade: {valor['quantidade']}\n"
             relatorio += f"    - Preço Unitário: R${valor['preco_unitario']:.2f}\n"
+            yield relatorio
 
         produto_nome = produto_mais_vendido.nome
         produto_preco = produto_mais_vendido.preco
-        relatorio += f"Produto Mais Vendido:\n"
+        relatorio = f"Produto Mais Vendido:\n"
         relatorio += f"  - Nome: {produto_nome}\n"
         relatorio += f"  - Preço: R${produto_preco:.2f}\n"
         relatorio += f"  - Quantidade Vendida: {quantidade_mais_vendida}\n"
         relatorio += f"  - Data da venda: {maior_venda.data_str}\n"
+        if metricas_adicionais:
+            relatorio += "Métricas Adicionais:\n"
+            relatorio += self.__formatar_metricas_texto(metricas_adicionais)
+        yield relatorio
         logger.info("Relatório de vendas em texto gerado com sucesso!")
+
+    def __formatar_metricas_texto(self, metricas: dict, nivel: int = 1) -> str:
+        """Formata as métricas adicionais, indentando os valores aninhados."""
+        texto = ""
+        recuo = "  " * nivel
+        for nome, valor in metricas.items():
+            if isinstance(valor, dict):
+                texto += f"{recuo}- {nome}:\n"
+                texto += self.__formatar_metricas_texto(valor, nivel + 1)
+            else:
+                texto += f"{recuo}- {nome}: {valor}\n"
+        return texto
+
+    def __gerar_relatorio_aproximado_json(self):
+        """Gera o relatório aproximado no formato JSON."""
+        import json
+
+        relatorio = self.resumo_aproximado.para_dict()
+        logger.info("Relatório aproximado de vendas em JSON gerado com sucesso!")
+        return json.dumps(relatorio, indent=4)
+
+    def __gerar_relatorio_aproximado_texto(self):
+        """Gera o relatório aproximado no formato de texto."""
+
+        resumo = self.resumo_aproximado.para_dict()
+        distintos = resumo["produtos_distintos"]
+        mais_vendidos = resumo["produtos_mais_vendidos"]
+        maior_receita = resumo["produtos_maior_receita"]
+
+        relatorio = "Relatório de Vendas (aproximado)\n"
+        relatorio += f"Total em Vendas: R${self.resumo_aproximado.total_vendas:.2f}\n"
+        relatorio += f"Quantidade de Vendas: {resumo['quantidade_de_vendas']}\n"
+        relatorio += (
+            f"Produtos Distintos (estimado): {distintos['estimativa']} "
+            f"(erro padrão de ±{distintos['erro_padrao_relativo']})\n"
+        )
+        relatorio += (
+            "Produtos Mais Vendidos (estimado, erro máximo de "
+            f"{mais_vendidos['erro_maximo_quantidade']} unidades):\n"
+        )
+        for produto in mais_vendidos["produtos"]:
+            percentis = ", ".join(
+                f"{nome}={valor}"
+                for nome, valor in produto["percentis_quantidade"].items()
+            )
+            relatorio += f"  * {produto['nome']}: \n"
+            relatorio += (
+                f"    - Quantidade: entre {produto['quantidade_minima']} "
+                f"e {produto['quantidade_estimada']}\n"
+            )
+            relatorio += f"    - Percentis da quantidade por venda: {percentis}"
+            if produto["percentis_parciais"]:
+                relatorio += (
+                    " (apenas das vendas desde que o produto passou a ser "
+                    f"monitorado: {produto['vendas_nos_percentis']})"
+                )
+            relatorio += "\n"
+        relatorio += (
+            "Produtos com Maior Receita (estimado, erro máximo de "
+            f"R${maior_receita['erro_maximo_receita']}):\n"
+        )
+        for produto in maior_receita["produtos"]:
+            relatorio += f"  * {produto['nome']}: R${produto['receita_estimada']}\n"
+        logger.info("Relatório aproximado de vendas em texto gerado com sucesso!")
         return relatorio
 
-    def __extrair_dados_de_vendas(self) -> None:
+    def __extrair_dados_de_vendas(self, incremental: bool = False) -> None:
         """
         Lê um arquivo CSV e retorna seu conteúdo como uma lista de objetos Venda,
         Usando um Produto instanciado do cabeçalho.
+        A leitura começa em `self.posicao_lida`, de forma que chamadas
+        seguintes processem apenas as linhas novas do arquivo.
         """
         logger.debug("Extraindo dados de vendas do arquivo CSV")
         caminho_arquivo = Path(self.caminho_arquivo)
@@ -163,61 +508,453 @@ class Relatorio:
             logger.error(mensagem)
             raise FileNotFoundError(mensagem)
 
-        with caminho_arquivo.open("r", encoding="utf-8") as file:
-            reader = DictReader(file)
-            produto_instanciado = None
-            for linha in reader:
+        if self.pre_verificacao_mb and not self.posicao_lida:
+            self.validador.pre_verificar(caminho_arquivo, self.pre_verificacao_mb)
+
+        limites = None
+        if self.assumir_ordenado and not incremental:
+            limites = self.__obter_limites_do_filtro()
+        try:
+            self.__ler_arquivo(caminho_arquivo, incremental, limites)
+        except VendasForaDeOrdem as erro:
+            logger.warning(f"{erro} Relendo o arquivo inteiro.")
+            self.__reiniciar_leitura()
+            self.validador = ValidadorDeVendas(
+                politica=self.validador.politica,
+                caminho_quarentena=self.validador.caminho_quarentena,
+                tamanho_lote=self.validador.tamanho_lote,
+            )
+            self.__ler_arquivo(caminho_arquivo, incremental, None)
+
+        total_extraido = len(self.vendas)
+        if resumo := self.resumo_aproximado or self.agregacao_externa:
+            total_extraido = resumo.quantidade_de_vendas
+        elif not self.__manter_vendas():
+            total_extraido = self.__vendas_agregadas
+        logger.info(f"Total de vendas extraídas: {total_extraido}")
+
+    def __ler_arquivo(
+        self,
+        caminho_arquivo: Path,
+        incremental: bool,
+        limites: tuple[int, int] | None,
+    ) -> None:
+        """
+        Lê e agrega as linhas a partir de `self.posicao_lida`. Com `limites`
+        (arquivo ordenado por data), a leitura começa na primeira linha da data
+        inicial e termina ao encontrar uma venda posterior à data final.
+        """
+        with caminho_arquivo.open("rb") as file:
+            cabecalho = file.readline().decode("utf-8")
+            campos = next(reader([cabecalho]), None)
+            if not campos:
+                return
+            ValidadorDeVendas.validar_cabecalho(campos)
+            inicio_dados = file.tell()
+            posicao_inicial = max(self.posicao_lida, inicio_dados)
+            if limites:
+                posicao_inicial = encontrar_posicao_da_data(
+                    file, campos.index("data"), limites[0], inicio_dados
+                )
+                logger.info(
+                    f"Arquivo ordenado: leitura a partir do byte {posicao_inicial}"
+                )
+            if self.motor is None and not self.resumo_aproximado:
+                escolha = escolher_motor_do_arquivo(
+                    caminho_arquivo,
+                    # O pipeline de threads, se pedido, tem precedência
+                    paralelizavel=not (incremental or limites or self.trabalhadores),
+                )
+                if escolha:
+                    self.__aplicar_motor(escolha)
+            # A partir do meio do arquivo, os números das linhas são desconhecidos
+            self.validador.numerar_por_posicao = posicao_inicial > inicio_dados
+            file.seek(posicao_inicial)
+            try:
+                if self.motor == "multiprocesso" and not (incremental or limites):
+                    self.__ler_em_processos(file, campos)
+                elif self.trabalhadores and not limites:
+                    self.__ler_em_pipeline(file, campos, incremental)
+                else:
+                    self.__ler_em_sequencia(file, campos, incremental, limites)
+            finally:
+                self.validador.finalizar()
+
+    def __aplicar_motor(self, escolha: EscolhaDeMotor) -> None:
+        """Usa o motor escolhido; o motor em disco agrega com despejo em disco."""
+        self.motor = escolha.motor
+        self.processos = escolha.processos
+        if escolha.motor == "disco" and not self.agregacao_externa:
+            self.memoria_maxima = escolha.memoria_maxima
+            self.agregacao_externa = AgregacaoExterna(escolha.memoria_maxima)
+
+    def __ler_em_sequencia(
+        self,
+        file: IO[bytes],
+        campos: list[str],
+        incremental: bool,
+        limites: tuple[int, int] | None,
+    ) -> None:
+        linhas = DictReader(self.__ler_linhas(file, incremental), fieldnames=campos)
+        if limites:
+            linhas = self.__limitar_leitura_ordenada(linhas, limites[1])
+        # O cabeçalho é a linha 1 do arquivo
+        linhas_numeradas = (
+            (
+                self.__inicio_da_linha
+                if self.validador.numerar_por_posicao
+                else self.linhas_lidas + 1,
+                linha,
+            )
+            for linha in linhas
+        )
+        for lote in self.validador.validar_em_lotes(linhas_numeradas):
+            self.__agregar_linhas(lote)
+
+    def __ler_em_pipeline(
+        self, file: IO[bytes], campos: list[str], incremental: bool
+    ) -> None:
+        """
+        Lê o arquivo com o pipeline de threads: os blocos são validados,
+        convertidos e agregados em paralelo e mesclados aqui, na ordem do arquivo.
+        """
+        # O filtro de datas é preparado antes de ser consultado pelas threads
+        self.__obter_filtro_ordinal()
+        self.posicao_lida = file.tell()
+        pipeline = PipelineDeLeitura(
+            partial(self.__processar_bloco, campos),
+            trabalhadores=self.trabalhadores,
+            tamanho_bloco=self.tamanho_bloco,
+        )
+        # O cabeçalho é a linha 1 do arquivo
+        with closing(
+            pipeline.executar(file, self.linhas_lidas + 2, incremental)
+        ) as blocos:
+            for bloco, (erros, convertidas, estados) in blocos:
+                self.__mesclar_bloco(bloco, erros, convertidas, estados)
+        self.metricas_do_pipeline = pipeline.metricas
+
+    def __ler_em_processos(self, file: IO[bytes], campos: list[str]) -> None:
+        """
+        Motor multiprocesso: divide o arquivo em trechos terminados em quebra
+        de linha, agrega cada trecho em um processo (ver agregar_trecho) e
+        mescla aqui os estados parciais, na ordem do arquivo.
+        """
+        # Os processos recebem uma cópia do relatório, sem vendas nem estados
+        # e com o filtro de datas já preparado
+        self.__obter_filtro_ordinal()
+        copia = copy.copy(self)
+        copia.vendas, copia.produtos, copia.estados = [], [], None
+        copia.validador = ValidadorDeVendas(
+            politica=self.validador.politica,
+            caminho_quarentena=self.validador.caminho_quarentena,
+            tamanho_lote=self.validador.tamanho_lote,
+        )
+        trechos = dividir_em_trechos(file, file.tell(), 4 * self.processos)
+        logger.info(f"Agregando {len(trechos)} trechos em {self.processos} processos")
+        with ProcessPoolExecutor(self.processos) as executor:
+            futuros = [
+                executor.submit(copia.agregar_trecho, campos, inicio, fim)
+                for inicio, fim in trechos
+            ]
+            try:
+                for futuro, (_, fim) in zip(futuros, trechos):
+                    estados, erros, linhas, vendas = futuro.result()
+                    for erro in erros:
+                        # O cabeçalho é a linha 1 do arquivo
+                        erro.numero_linha += self.linhas_lidas + 1
+                    if erros:
+                        self.validador.tratar_erros(erros)
+                    self.__retomar_estados()
+                    self.estados = mesclar_estados(
+                        self.agregadores, self.estados, estados
+                    )
+                    self.__vendas_agregadas += vendas
+                    self.linhas_lidas += linhas
+                    self.posicao_lida = fim
+            finally:
+                for futuro in futuros:
+                    futuro.cancel()
+
+    def agregar_trecho(self, campos: list[str], inicio: int, fim: int) -> tuple:
+        """
+        Valida, converte e agrega as linhas entre os bytes `inicio` e `fim` do
+        arquivo, sem alterar o relatório; executado pelos processos do motor
+        multiprocesso. Retorna os estados parciais, os erros (numerados a partir
+        da primeira linha do trecho) e as quantidades de linhas e de vendas.
+        """
+        estados = iniciar_estados(self.agregadores)
+        todos_os_erros: list[ErroDeLinha] = []
+        linhas = vendas = 0
+        with open(self.caminho_arquivo, "rb") as file:
+            file.seek(inicio)
+            posicao, indice = inicio, 0
+            while posicao < fim:
+                dados = file.read(min(self.tamanho_bloco, fim - posicao))
+                if not dados.endswith(b"\n"):
+                    # Completa a última linha (os trechos terminam em uma linha)
+                    dados += file.readline()
+                posicao += len(dados)
+                quantidade = dados.count(b"\n") + (not dados.endswith(b"\n"))
+                bloco = Bloco(indice, dados, linhas + 1, quantidade, posicao)
+                erros, convertidas, parciais = self.__processar_bloco(campos, bloco)
+                todos_os_erros += erros
+                estados = mesclar_estados(self.agregadores, estados, parciais)
+                vendas += sum(1 for _, venda in convertidas if venda)
+                linhas += quantidade
+                indice += 1
+        return estados, todos_os_erros, linhas, vendas
+
+    def __processar_bloco(self, campos: list[str], bloco: Bloco) -> tuple:
+        """
+        Executado pelas threads do pipeline: valida as linhas do bloco, converte
+        as válidas em vendas e, no modo exato, agrega-as em estados parciais.
+        Não altera o relatório; os erros são tratados na mesclagem.
+        """
+        numeradas = [
+            (bloco.primeira_linha + indice, linha)
+            for indice, linha in enumerate(bloco.dados.decode("utf-8").split("\n"))
+            if linha.strip()
+        ]
+        linhas = DictReader([linha for _, linha in numeradas], fieldnames=campos)
+        lote = list(zip([numero for numero, _ in numeradas], linhas))
+        erros = self.validador.verificar_lote(lote)
+        invalidas = {id(erro.linha) for erro in erros}
+        convertidas = self.__converter_linhas(
+            [linha for _, linha in lote if id(linha) not in invalidas]
+        )
+
+        estados = None
+        if not (self.resumo_aproximado or self.agregacao_externa):
+            estados = iniciar_estados(self.agregadores)
+            for _, venda in convertidas:
+                if venda:
+                    atualizar_estados(self.agregadores, estados, venda)
+        return erros, convertidas, estados
+
+    def __mesclar_bloco(
+        self,
+        bloco: Bloco,
+        erros: list[ErroDeLinha],
+        convertidas: list[tuple[Produto, Venda | None]],
+        estados: dict[str, Any] | None,
+    ) -> None:
+        """Aplica a política de erro e mescla as vendas de um bloco processado."""
+        if erros:
+            self.validador.tratar_erros(erros)
+        self.posicao_lida = bloco.posicao_final
+        self.linhas_lidas += bloco.quantidade_de_linhas
+        self.__retomar_estados()
+        if estados is None:
+            for produto, venda in convertidas:
+                self.__agregar_venda(produto, venda)
+            return
+
+        vendas = [venda for _, venda in convertidas if venda]
+        if self.__manter_vendas():
+            self.produtos += [produto for produto, _ in convertidas]
+            self.vendas += vendas
+        self.estados = mesclar_estados(self.agregadores, self.estados, estados)
+        self.__vendas_agregadas += len(vendas)
+
+    def __retomar_estados(self) -> None:
+        """Retoma a agregação a partir das vendas já extraídas, se necessário."""
+        if not self.__manter_vendas():
+            # Sem a lista de vendas, os estados são a única fonte das métricas
+            if self.estados is None:
+                self.estados = iniciar_estados(self.agregadores)
+            return
+        if self.estados is None or self.__vendas_agregadas != len(self.vendas):
+            self.estados = iniciar_estados(self.agregadores)
+            for venda in self.vendas:
+                atualizar_estados(self.agregadores, self.estados, venda)
+            self.__vendas_agregadas = len(self.vendas)
+
+    def __converter_linhas(
+        self, linhas: list[dict]
+    ) -> list[tuple[Produto, Venda | None]]:
+        """
+        Converte linhas já validadas em (produto, venda); a venda é None se
+        estiver fora do filtro de datas. As datas são convertidas de uma só vez.
+        Quando as vendas são mantidas em memória, o nome do produto é codificado
+        em um id e linhas do mesmo produto e preço compartilham a mesma
+        instância de Produto. Nos demais motores, que não mantêm as vendas,
+        nada é guardado por produto além dos estados dos agregadores.
+        """
+        ordinais = DateHandler.str_to_dates([linha.get("data", "") for linha in linhas])
+        codificar = self.__manter_vendas() and not self.resumo_aproximado
+        produtos = self.__produtos_codificados
+        produtos_por_id = self.__produtos_por_id
+        convertidas = []
+        for linha, data_ordinal in zip(linhas, ordinais):
+            preco = linha.get("preco_unitario", "0.00")
+            if not codificar:
+                produto_instanciado = Produto(
+                    nome=linha.get("produto", ""), preco=Decimal(preco)
+                )
+                venda = self.__obter_venda(linha, produto_instanciado, data_ordinal)
+                convertidas.append((produto_instanciado, venda))
+                continue
+
+            id_produto = produtos.codificar(linha.get("produto", ""))
+            anterior = produtos_por_id.get(id_produto)
+            if anterior and anterior[0] == preco:
+                produto_instanciado = anterior[1]
+            else:
                 # Instancia o produto
                 produto_instanciado = Produto(
-                    nome=linha.get("produto", ""),
-                    preco=Decimal(linha.get("preco_unitario", "0.00")),
+                    nome=produtos.decodificar(id_produto), preco=Decimal(preco)
                 )
-                self.produtos.append(produto_instanciado)
-                if venda := self.__obter_venda(linha, produto_instanciado):
-                    self.vendas.append(venda)
-            logger.info(f"Total de vendas extraídas: {len(self.vendas)}")
-
-    def __obter_venda(self, linha: dict, produto_instanciado: Produto) -> Venda | None:
+                produtos_por_id[id_produto] = (preco, produto_instanciado)
+            venda = self.__obter_venda(
+                linha, produto_instanciado, data_ordinal, id_produto
+            )
+            convertidas.append((produto_instanciado, venda))
+        return convertidas
+
+    def __agregar_linhas(self, linhas: list[dict]) -> None:
+        """Converte um lote de linhas já validadas em vendas e as agrega."""
+        self.__retomar_estados()
+        for produto, venda in self.__converter_linhas(linhas):
+            self.__agregar_venda(produto, venda)
+
+    def __agregar_venda(self, produto_instanciado: Produto, venda: Venda | None):
+        if self.resumo_aproximado:
+            # Resume a venda sem mantê-la em memória
+            if venda:
+                self.resumo_aproximado.atualizar(
+                    produto_instanciado.nome,
+                    venda.quantidade,
+                    produto_instanciado.preco,
+                )
+            return
+        if self.agregacao_externa:
+            # Agrega a venda sem mantê-la em memória
+            if venda:
+                self.agregacao_externa.atualizar(venda)
+                atualizar_estados(self.__agregadores_adicionais(), self.estados, venda)
+            return
+        if not self.__manter_vendas():
+            # Agrega a venda sem mantê-la em memória
+            if venda:
+                atualizar_estados(self.agregadores, self.estados, venda)
+                self.__vendas_agregadas += 1
+            return
+        self.produtos.append(produto_instanciado)
+        if venda:
+            self.vendas.append(venda)
+            atualizar_estados(self.agregadores, self.estados, venda)
+            self.__vendas_agregadas += 1
+
+    def __ler_linhas(self, file: IO[bytes], incremental: bool) -> Iterator[str]:
+        """
+        Produz as linhas do arquivo a partir da posição atual, atualizando
+        `self.posicao_lida`. No modo incremental, uma última linha sem quebra
+        de linha é considerada incompleta e fica para a próxima leitura.
+        """
+        self.posicao_lida = file.tell()
+        for linha in file:
+            if incremental and not linha.endswith(b"\n"):
+                break
+            self.__inicio_da_linha = self.posicao_lida
+            self.posicao_lida += len(linha)
+            self.linhas_lidas += 1
+            if linha.strip():
+                yield linha.decode("utf-8")
+
+    def __obter_venda(
+        self,
+        linha: dict,
+        produto_instanciado: Produto,
+        data_ordinal: int | None = None,
+        id_produto: int | None = None,
+    ) -> Venda | None:
         """
         Cria uma instância de Venda a partir de uma linha do CSV.
         Se houver filtro de data, verifica se a data da venda está dentro do intervalo.
         Retorna None se a venda não atender aos critérios de data.
+        `data_ordinal` é a data já convertida em lote (ver DateHandler.str_to_dates).
         """
 
-        if not (data_venda := DateHandler.str_to_date(linha.get("data", ""))):
-            mensagem = f"Data não informada na linha: {linha}"
-            logger.error(mensagem)
-            raise ValueError(mensagem)
+        if data_ordinal is None:
+            if not (data_venda := DateHandler.str_to_date(linha.get("data", ""))):
+                mensagem = f"Data não informada na linha: {linha}"
+                logger.error(mensagem)
+                raise ValueError(mensagem)
+            data_ordinal = data_venda.toordinal()
+
+        if not self.__data_no_filtro(data_ordinal):
+            return None
 
-        venda = Venda(
+        return Venda(
             produto=produto_instanciado,
             quantidade=int(linha.get("quantidade", "0")),
             data_str=linha["data"],
+            data_ordinal=data_ordinal,
+            id_produto=id_produto,
         )
-        if self.data_inicial and self.data_final:
-            # Se houver filtro de data, verifica se a data
-            # da venda está dentro do intervalo
-
-            self.__prepara_e_valida_as_datas()
 
-            if not DateHandler.valida_data_entre_intervalo(
-                data_venda, self.data_inicial, self.data_final
-            ):
-                return None
-            logger.info("Venda dentro do intervalo de datas.")
-        elif self.data_inicial or self.data_final:
-            # Se houver apenas uma data, verifica se a data da venda
-            # é igual à data inicial ou final
-            datas = []
-            if self.data_inicial:
-                datas.append(DateHandler.str_to_date(self.data_inicial))
-            if self.data_final:
-                datas.append(DateHandler.str_to_date(self.data_final))
-            if datas and data_venda not in datas:
+    @staticmethod
+    def __limitar_leitura_ordenada(
+        linhas: Iterator[dict], ordinal_final: int
+    ) -> Iterator[dict]:
+        """
+        Na leitura ordenada, encerra a leitura na primeira venda posterior à
+        data final. Levanta VendasForaDeOrdem se uma venda tiver data anterior
+        à da venda lida antes dela. Datas inválidas ficam para o validador.
+        """
+        data_anterior, ordinal_anterior = None, 0
+        for linha in linhas:
+            if (data := linha.get("data")) != data_anterior:
+                ordinal = DateHandler.str_to_dates([data or ""], ignorar_erros=True)[0]
+                if ordinal is not None:
+                    if ordinal < ordinal_anterior:
+                        raise VendasForaDeOrdem(
+                            f"Venda de {date.fromordinal(ordinal)} após venda de "
+                            f"{date.fromordinal(ordinal_anterior)}: "
+                            "arquivo não ordenado."
+                        )
+                    if ordinal > ordinal_final:
+                        return
+                    data_anterior, ordinal_anterior = data, ordinal
+            yield linha
+
+    def __obter_filtro_ordinal(self) -> tuple | frozenset:
+        """Datas do filtro como ordinais: um intervalo ou um conjunto de datas."""
+        if self.__filtro_ordinal is None:
+            datas, intervalo = self.__obter_filtro_de_datas()
+            ordinais = tuple(data.toordinal() for data in datas)
+            self.__filtro_ordinal = ordinais if intervalo else frozenset(ordinais)
+            if datas:
+                logger.info(f"Datas informadas para filtro: {datas}")
+        return self.__filtro_ordinal
+
+    def __obter_limites_do_filtro(self) -> tuple[int, int] | None:
+        """
+        Primeira e última data (ordinais) que podem atender ao filtro, ou None
+        se não houver filtro de datas.
+        """
+        match self.__obter_filtro_ordinal():
+            case (inicio, fim):
+                return inicio, fim
+            case frozenset() as datas if datas:
+                return min(datas), max(datas)
+            case _:
                 return None
-            logger.info(f"Data informada para filtro: {data_venda}")
-        logger.debug(f"Venda obtida: {venda}")
-        return venda
+
+    def __data_no_filtro(self, data_ordinal: int) -> bool:
+        """
+        Verifica se a data (ordinal) atende ao filtro: dentro do intervalo,
+        se as duas datas foram informadas, ou igual à data inicial ou final,
+        se apenas uma delas foi informada.
+        """
+        match self.__obter_filtro_ordinal():
+            case (inicio, fim):
+                return inicio <= data_ordinal <= fim
+            case frozenset() as datas if datas:
+                return data_ordinal in datas
+            case _:
+                return True
 
     def __prepara_e_valida_as_datas(self):
         """
@@ -226,61 +963,53 @@ class Relatorio:
         E verifica se a data inicial não é maior que a final.
         """
         logger.debug("Preparando e validando as datas do filtro")
-        self.data_inicial = DateHandler.str_to_date(self.data_inicial)
-        self.data_final = DateHandler.str_to_date(self.data_final)
+        # As datas podem já ter sido convertidas em uma linha anterior
+        if isinstance(self.data_inicial, str):
+            self.data_inicial = DateHandler.str_to_date(self.data_inicial)
+        if isinstance(self.data_final, str):
+            self.data_final = DateHandler.str_to_date(self.data_final)
 
         if self.data_inicial > self.data_final:
             mensagem = "Data inicial não pode ser maior que a data final."
             logger.error(mensagem)
             raise ValueError(mensagem)
 
-    def __calcular_total_vendas(self) -> Decimal:
-        """Calcula o total das vendas."""
-        logger.debug("Calculando o total das vendas")
-        total = Decimal("0.00")
-        if not self.vendas:
-            return total
-        total += sum(
-            venda.produto.preco * Decimal(venda.quantidade) for venda in self.vendas
-        )
-        return total
-
-    def __obter_maior_venda(self) -> Venda | None:
-        """Obtém a maior venda, somando quantidades de produtos com o mesmo nome."""
-        if not self.vendas:
-            return None
-
-        # Agrupa vendas por nome do produto e soma as quantidades
-        vendas_por_produto = {}
-        for venda in self.vendas:
-            nome = venda.produto.nome
-            if nome not in vendas_por_produto:
-                vendas_por_produto[nome] = Venda(
-                    produto=venda.produto,
-                    quantidade=venda.quantidade,
-                    data_str=venda.data_str,
-                )
-            else:
-                vendas_por_produto[nome].quantidade += venda.quantidade
-
-        # Retorna a venda com maior quantidade
-        return max(vendas_por_produto.values(), key=lambda v: v.quantidade)
-
-    def __obter_total_de_vendas_por_produto(self):
-        """Obtém o total de vendas por produto."""
-        logger.debug("Obtendo o total de vendas por produto")
-        total_por_produto = {}
-        for venda in self.vendas:
-            nome = venda.produto.nome
-            if nome not in total_por_produto:
-                total_por_produto[nome] = {
-                    "total": Decimal("0.00"),
-                    "quantidade": 0,
-                    "preco_unitario": venda.produto.preco,
-                }
-            total_por_produto[nome]["total"] += venda.produto.preco * Decimal(
-                venda.quantidade
+    def __obter_metricas(self) -> dict[str, Any]:
+        """
+        Finaliza as métricas agregadas durante a extração. Se as vendas foram
+        alteradas desde então, recalcula todas em uma única passada.
+        """
+        if self.banco:
+            return self.__obter_metricas_do_banco()
+        if self.agregacao_externa:
+            adicionais = self.__agregadores_adicionais()
+            return self.agregacao_externa.finalizar() | finalizar_estados(
+                adicionais, self.estados or iniciar_estados(adicionais)
             )
-            total_por_produto[nome]["quantidade"] += venda.quantidade
-            total_por_produto[nome]["preco_unitario"] = venda.produto.preco
-        return total_por_produto
+        if not self.__manter_vendas():
+            return finalizar_estados(
+                self.agregadores, self.estados or iniciar_estados(self.agregadores)
+            )
+        if self.estados is None or self.__vendas_agregadas != len(self.vendas):
+            logger.debug("Calculando as métricas das vendas")
+            return agregar(self.agregadores, self.vendas)
+        return finalizar_estados(self.agregadores, self.estados)
+
+    def __obter_metricas_do_banco(self) -> dict[str, Any]:
+        """
+        Métricas padrão vêm de uma consulta agregada; métricas adicionais são
+        calculadas percorrendo as vendas filtradas do banco.
+        """
+        filtro = self.__obter_filtro_de_datas()
+        metricas = self.banco.obter_metricas(*filtro)
+        if adicionais := self.__agregadores_adicionais():
+            metricas |= agregar(adicionais, self.banco.iterar_vendas(*filtro))
+        return metricas
+
+    def __agregadores_adicionais(self) -> dict[str, Agregador]:
+        """Métricas registradas além das padrão."""
+        return {
+            nome: agregador
+            for nome, agregador in self.agregadores.items()
+            if nome not in AGREGADORES_PADRAO
+        }
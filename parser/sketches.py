@@ -0,0 +1,269 @@
+import heapq
+import math
+from decimal import Decimal
+from hashlib import blake2b
+
+
+def hash_64(valor: str) -> int:
+    """Obtém um hash estável de 64 bits para uma string."""
+    return int.from_bytes(blake2b(valor.encode("utf-8"), digest_size=8).digest())
+
+
+class HyperLogLog:
+    """
+    Estima a cardinalidade (quantidade de itens distintos) com memória fixa
+    de 2**precisao bytes. O erro padrão relativo é 1.04 / sqrt(2**precisao).
+    """
+
+    def __init__(self, precisao: int = 14):
+        if not 4 <= precisao <= 18:
+            raise ValueError("A precisão do HyperLogLog deve estar entre 4 e 18.")
+        self.precisao = precisao
+        self.registradores = bytearray(1 << precisao)
+
+    @property
+    def erro_padrao(self) -> float:
+        return 1.04 / math.sqrt(len(self.registradores))
+
+    def adicionar(self, valor: str) -> None:
+        valor_hash = hash_64(valor)
+        indice = valor_hash >> (64 - self.precisao)
+        restante = valor_hash & ((1 << (64 - self.precisao)) - 1)
+        posicao = (64 - self.precisao) - restante.bit_length() + 1
+        if posicao > self.registradores[indice]:
+            self.registradores[indice] = posicao
+
+    def mesclar(self, outro: "HyperLogLog") -> None:
+        if outro.precisao != self.precisao:
+            raise ValueError(
+                "Não é possível mesclar HyperLogLogs de precisões distintas."
+            )
+        self.registradores = bytearray(
+            max(a, b) for a, b in zip(self.registradores, outro.registradores)
+        )
+
+    def estimar(self) -> int:
+        m = len(self.registradores)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimativa = alpha * m * m / sum(2.0**-r for r in self.registradores)
+        zeros = self.registradores.count(0)
+        # Correção para cardinalidades pequenas (linear counting)
+        if estimativa <= 2.5 * m and zeros:
+            estimativa = m * math.log(m / zeros)
+        return round(estimativa)
+
+
+class SpaceSaving:
+    """
+    Mantém os `capacidade` itens mais frequentes (heavy hitters) de um fluxo
+    com pesos. Cada contagem superestima o valor real em no máximo o erro
+    registrado para o item, que por sua vez é limitado pela menor contagem
+    monitorada (no pior caso, total / capacidade).
+    """
+
+    def __init__(self, capacidade: int = 100):
+        self.capacidade = capacidade
+        self.contadores: dict[str, list] = {}  # item -> [contagem, erro]
+        self.total = 0
+        self.__heap: list[tuple] = []
+
+    @property
+    def erro_maximo(self):
+        if len(self.contadores) < self.capacidade:
+            return 0
+        return min(contagem for contagem, _ in self.contadores.values())
+
+    def adicionar(self, item: str, peso=1) -> str | None:
+        """
+        Contabiliza o item e retorna o item descartado para abrir espaço, se houver.
+        """
+        self.total += peso
+        descartado = None
+        if item in self.contadores:
+            self.contadores[item][0] += peso
+        elif len(self.contadores) < self.capacidade:
+            self.contadores[item] = [peso, 0]
+        else:
+            descartado, minimo = self.__remover_minimo()
+            self.contadores[item] = [minimo + peso, minimo]
+        heapq.heappush(self.__heap, (self.contadores[item][0], item))
+        # Reconstrói o heap para que entradas obsoletas não cresçam sem limite
+        if len(self.__heap) > 4 * self.capacidade:
+            self.__heap = [(c, i) for i, (c, _) in self.contadores.items()]
+            heapq.heapify(self.__heap)
+        return descartado
+
+    def __remover_minimo(self) -> tuple:
+        while True:
+            contagem, item = heapq.heappop(self.__heap)
+            atual = self.contadores.get(item)
+            if atual and atual[0] == contagem:
+                del self.contadores[item]
+                return item, contagem
+
+    def mais_frequentes(self, quantidade: int | None = None) -> list[tuple]:
+        """Retorna (item, contagem estimada, erro) em ordem decrescente de contagem."""
+        itens = sorted(
+            ((item, c, e) for item, (c, e) in self.contadores.items()),
+            key=lambda registro: registro[1],
+            reverse=True,
+        )
+        return itens[:quantidade] if quantidade else itens
+
+
+class TDigest:
+    """
+    Estima quantis de uma distribuição com um número limitado de centróides.
+    O erro de rank é menor nas caudas e da ordem de 1 / compressao na mediana.
+    """
+
+    def __init__(self, compressao: int = 100):
+        self.compressao = compressao
+        self.centroides: list[list[float]] = []  # [média, peso]
+        self.buffer: list[list[float]] = []
+        self.total = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def adicionar(self, valor: float, peso: float = 1) -> None:
+        self.buffer.append([float(valor), float(peso)])
+        self.total += peso
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+        if len(self.buffer) >= 5 * self.compressao:
+            self.__comprimir()
+
+    def mesclar(self, outro: "TDigest") -> None:
+        self.buffer.extend(outro.centroides + outro.buffer)
+        self.total += outro.total
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+        self.__comprimir()
+
+    def __escala(self, q: float) -> float:
+        return self.compressao / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def __escala_inversa(self, k: float) -> float:
+        k = min(k, self.compressao / 4)
+        return (math.sin(k * 2 * math.pi / self.compressao) + 1) / 2
+
+    def __comprimir(self) -> None:
+        itens = sorted(self.centroides + self.buffer)
+        self.buffer = []
+        if not itens:
+            return
+
+        novos = []
+        acumulado = 0.0
+        atual = list(itens[0])
+        limite = self.__escala_inversa(self.__escala(0) + 1)
+        for media, peso in itens[1:]:
+            if (acumulado + atual[1] + peso) / self.total <= limite:
+                # Funde o item ao centróide atual (média ponderada)
+                atual[0] += (media - atual[0]) * peso / (atual[1] + peso)
+                atual[1] += peso
+            else:
+                acumulado += atual[1]
+                novos.append(atual)
+                limite = self.__escala_inversa(
+                    self.__escala(acumulado / self.total) + 1
+                )
+                atual = [media, peso]
+        novos.append(atual)
+        self.centroides = novos
+
+    def quantil(self, q: float) -> float | None:
+        self.__comprimir()
+        if not self.centroides:
+            return None
+        if len(self.centroides) == 1 or q <= 0:
+            return self.minimo if q <= 0 else self.centroides[0][0]
+        if q >= 1:
+            return self.maximo
+
+        alvo = q * self.total
+        acumulado = 0.0
+        anterior_media, anterior_centro = self.minimo, 0.0
+        for media, peso in self.centroides:
+            centro = acumulado + peso / 2
+            if alvo < centro:
+                proporcao = (alvo - anterior_centro) / (centro - anterior_centro)
+                return anterior_media + proporcao * (media - anterior_media)
+            anterior_media, anterior_centro = media, centro
+            acumulado += peso
+        proporcao = (alvo - anterior_centro) / (self.total - anterior_centro)
+        return anterior_media + proporcao * (self.maximo - anterior_media)
+
+
+class ResumoAproximado:
+    """
+    Resumo de vendas com memória constante, independente do tamanho da entrada.
+    Totais gerais são exatos; produtos distintos, mais vendidos e percentis
+    de quantidade por produto são estimados com HyperLogLog, Space-Saving
+    e t-digest. Os percentis de um produto cobrem apenas as vendas desde que
+    ele passou a ser monitorado: o t-digest é descartado com o produto.
+    """
+
+    PERCENTIS = (0.5, 0.9, 0.99)
+
+    def __init__(self, capacidade: int = 100, precisao: int = 14):
+        self.quantidade_de_vendas = 0
+        self.total_vendas = Decimal("0.00")
+        self.produtos_distintos = HyperLogLog(precisao)
+        self.mais_vendidos = SpaceSaving(capacidade)
+        self.maiores_receitas = SpaceSaving(capacidade)
+        self.quantidades: dict[str, TDigest] = {}
+
+    def atualizar(self, nome: str, quantidade: int, preco: Decimal) -> None:
+        receita = preco * quantidade
+        self.quantidade_de_vendas += 1
+        self.total_vendas += receita
+        self.produtos_distintos.adicionar(nome)
+        self.maiores_receitas.adicionar(nome, receita)
+        # Só mantém t-digests para os produtos monitorados pelo Space-Saving
+        if descartado := self.mais_vendidos.adicionar(nome, quantidade):
+            self.quantidades.pop(descartado, None)
+        self.quantidades.setdefault(nome, TDigest()).adicionar(quantidade)
+
+    def para_dict(self, quantidade_de_produtos: int = 10) -> dict:
+        erro_relativo = self.produtos_distintos.erro_padrao
+        return {
+            "total_vendas": str(self.total_vendas),
+            "quantidade_de_vendas": self.quantidade_de_vendas,
+            "produtos_distintos": {
+                "estimativa": self.produtos_distintos.estimar(),
+                "erro_padrao_relativo": f"{erro_relativo:.2%}",
+            },
+            "produtos_mais_vendidos": {
+                "erro_maximo_quantidade": math.ceil(self.mais_vendidos.erro_maximo),
+                "produtos": [
+                    {
+                        "nome": nome,
+                        "quantidade_estimada": contagem,
+                        "quantidade_minima": contagem - erro,
+                        "percentis_quantidade": {
+                            f"p{round(p * 100)}": round(
+                                self.quantidades[nome].quantil(p), 2
+                            )
+                            for p in self.PERCENTIS
+                        },
+                        # Com erro, o produto já foi descartado e as vendas
+                        # anteriores à sua volta não entram nos percentis
+                        "vendas_nos_percentis": round(self.quantidades[nome].total),
+                        "percentis_parciais": erro > 0,
+                    }
+                    for nome, contagem, erro in self.mais_vendidos.mais_frequentes(
+                        quantidade_de_produtos
+                    )
+                ],
+            },
+            "produtos_maior_receita": {
+                "erro_maximo_receita": f"{self.maiores_receitas.erro_maximo:.2f}",
+                "produtos": [
+                    {"nome": nome, "receita_estimada": f"{receita:.2f}"}
+                    for nome, receita, _ in self.maiores_receitas.mais_frequentes(
+                        quantidade_de_produtos
+                    )
+                ],
+            },
+        }
@@ -0,0 +1,256 @@
+import csv
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from helpers.date_handler import DateHandler
+from helpers.logger import logger
+
+POLITICAS_DE_ERRO = ["fail", "skip", "quarantine"]
+CAMPOS_OBRIGATORIOS = ["produto", "quantidade", "preco_unitario", "data"]
+
+PADRAO_QUANTIDADE = re.compile(r"\s*[+-]?\d+\s*")
+PADRAO_PRECO = re.compile(r"\s*[+-]?(\d+(\.\d*)?|\.\d+)\s*")
+
+
+@dataclass
+class ErroDeLinha:
+    numero_linha: int | None
+    motivo: str
+    linha: dict
+    # Posição em bytes no arquivo, usada quando o número da linha é desconhecido
+    posicao: int | None = None
+
+    def __str__(self) -> str:
+        local = (
+            f"linha {self.numero_linha}"
+            if self.numero_linha is not None
+            else f"byte {self.posicao}"
+        )
+        return f"{local}: {self.motivo}"
+
+
+class ValidadorDeVendas:
+    """
+    Valida as linhas do CSV de vendas em lotes, antes de serem agregadas.
+    Cada coluna do lote é verificada de uma só vez e as datas são convertidas
+    em lote (DateHandler.str_to_dates). Conforme a política, uma linha inválida
+    interrompe a execução (fail), é descartada (skip) ou é descartada e
+    gravada no arquivo de quarentena (quarantine).
+    """
+
+    def __init__(
+        self,
+        politica: str = "fail",
+        caminho_quarentena: Path | None = None,
+        tamanho_lote: int = 10_000,
+    ):
+        if politica not in POLITICAS_DE_ERRO:
+            mensagem = f"Política de erro desconhecida: {politica}. "
+            mensagem += f"Políticas válidas: {', '.join(POLITICAS_DE_ERRO)}"
+            logger.error(mensagem)
+            raise ValueError(mensagem)
+
+        self.politica = politica
+        self.caminho_quarentena = Path(caminho_quarentena or "output/quarentena.csv")
+        self.tamanho_lote = tamanho_lote
+        self.total_de_erros = 0
+        # Quando verdadeiro, as linhas são identificadas pela posição em bytes
+        # (leitura a partir do meio do arquivo, sem contagem de linhas)
+        self.numerar_por_posicao = False
+        self.__arquivo_quarentena = None
+        self.__escritor_quarentena = None
+        self.__quarentena_iniciada = False
+
+    @staticmethod
+    def validar_cabecalho(campos: list[str]) -> None:
+        if faltantes := [c for c in CAMPOS_OBRIGATORIOS if c not in campos]:
+            mensagem = f"Colunas obrigatórias ausentes no cabeçalho: {faltantes}"
+            logger.error(mensagem)
+            raise ValueError(mensagem)
+
+    def verificar_lote(self, lote: list[tuple[int, dict]]) -> list[ErroDeLinha]:
+        """Verifica um lote de linhas (numero_linha, linha) e retorna os erros."""
+        motivos: dict[int, str] = {}
+
+        for indice, (_, linha) in enumerate(lote):
+            if None in linha or any(linha.get(c) is None for c in CAMPOS_OBRIGATORIOS):
+                motivos[indice] = "quantidade de colunas inválida"
+            elif not linha["produto"].strip():
+                motivos[indice] = "produto não informado"
+
+        quantidades = [linha.get("quantidade") or "" for _, linha in lote]
+        for indice, valor in enumerate(quantidades):
+            if indice not in motivos and not PADRAO_QUANTIDADE.fullmatch(valor):
+                motivos[indice] = f"quantidade inválida: {valor!r}"
+
+        precos = [linha.get("preco_unitario") or "" for _, linha in lote]
+        for indice, valor in enumerate(precos):
+            if indice not in motivos and not PADRAO_PRECO.fullmatch(valor):
+                motivos[indice] = f"preço unitário inválido: {valor!r}"
+
+        datas = [linha.get("data") or "" for _, linha in lote]
+        ordinais = DateHandler.str_to_dates(datas, ignorar_erros=True)
+        for indice, (valor, ordinal) in enumerate(zip(datas, ordinais)):
+            if indice not in motivos and ordinal is None:
+                motivos[indice] = f"data inválida: {valor!r}"
+
+        return [
+            ErroDeLinha(
+                numero_linha=lote[indice][0], motivo=motivo, linha=lote[indice][1]
+            )
+            for indice, motivo in sorted(motivos.items())
+        ]
+
+    def validar_lote(self, lote: list[tuple[int, dict]]) -> Iterator[dict]:
+        """
+        Valida um lote aplicando a política de erro e produz as linhas válidas.
+        """
+        erros = self.verificar_lote(lote)
+        if not erros:
+            yield from (linha for _, linha in lote)
+            return
+
+        if self.numerar_por_posicao:
+            for erro in erros:
+                erro.posicao, erro.numero_linha = erro.numero_linha, None
+
+        self.tratar_erros(erros)
+        linhas_invalidas = {id(erro.linha) for erro in erros}
+        yield from (linha for _, linha in lote if id(linha) not in linhas_invalidas)
+
+    def pre_verificar(
+        self, caminho_arquivo: Path, megabytes: float
+    ) -> list[ErroDeLinha]:
+        """
+        Verifica rapidamente apenas os primeiros e os últimos `megabytes` do
+        arquivo, para encontrar dados inválidos antes da leitura completa.
+        Com a política fail, levanta ValueError se algum erro for encontrado.
+        """
+        tamanho_bloco = int(megabytes * 1024 * 1024)
+        erros = []
+        with Path(caminho_arquivo).open("rb") as file:
+            cabecalho = file.readline().decode("utf-8")
+            campos = next(csv.reader([cabecalho]), [])
+            self.validar_cabecalho(campos)
+            inicio_dados = file.tell()
+            tamanho = file.seek(0, 2)
+
+            # Início do arquivo: os números das linhas são conhecidos
+            file.seek(inicio_dados)
+            bloco = file.read(tamanho_bloco)
+            if inicio_dados + len(bloco) < tamanho:
+                # Descarta a última linha, que pode estar cortada
+                bloco = bloco[: bloco.rfind(b"\n") + 1]
+            fim_inicio = inicio_dados + len(bloco)
+            linhas = bloco.decode("utf-8", errors="replace").splitlines()
+            leitor = csv.DictReader(linhas, campos)
+            # line_num não inclui o cabeçalho, que já foi lido separadamente
+            lote = [(leitor.line_num + 1, linha) for linha in leitor]
+            erros += self.verificar_lote(lote)
+
+            # Fim do arquivo: apenas a posição em bytes é conhecida
+            inicio_final = max(fim_inicio, tamanho - tamanho_bloco)
+            if inicio_final < tamanho:
+                file.seek(inicio_final)
+                bloco = file.read()
+                if inicio_final > fim_inicio:
+                    # Descarta a primeira linha, que pode estar cortada
+                    descartados = bloco.find(b"\n") + 1
+                    bloco = bloco[descartados:]
+                    inicio_final += descartados
+                lote = []
+                for linha_bytes in bloco.splitlines(keepends=True):
+                    linha = linha_bytes.decode("utf-8", errors="replace")
+                    if linha.strip():
+                        valores = next(csv.DictReader([linha], campos))
+                        lote.append((inicio_final, valores))
+                    inicio_final += len(linha_bytes)
+                for erro in self.verificar_lote(lote):
+                    # O identificador do lote, nesse caso, é a posição em bytes
+                    erro.posicao, erro.numero_linha = erro.numero_linha, None
+                    erros.append(erro)
+
+        logger.info(f"Pré-verificação encontrou {len(erros)} linha(s) inválida(s).")
+        if erros and self.politica == "fail":
+            self.__falhar(erros)
+        return erros
+
+    def validar_em_lotes(
+        self, linhas: Iterable[tuple[int, dict]]
+    ) -> Iterator[list[dict]]:
+        """Agrupa as linhas em lotes, valida cada lote e produz suas linhas válidas."""
+        lote = []
+        for item in linhas:
+            lote.append(item)
+            if len(lote) >= self.tamanho_lote:
+                yield list(self.validar_lote(lote))
+                lote = []
+        if lote:
+            yield list(self.validar_lote(lote))
+
+    def ler_em_lotes(self, linhas: Iterable[tuple[int, dict]]) -> Iterator[dict]:
+        """Valida as linhas em lotes e produz as linhas válidas, uma a uma."""
+        for lote in self.validar_em_lotes(linhas):
+            yield from lote
+
+    def finalizar(self) -> None:
+        """Fecha o arquivo de quarentena e registra o total de erros."""
+        if self.__arquivo_quarentena:
+            self.__arquivo_quarentena.close()
+            self.__arquivo_quarentena = None
+            logger.warning(
+                f"{self.total_de_erros} linha(s) inválida(s) gravada(s) em "
+                f"{self.caminho_quarentena}"
+            )
+        elif self.total_de_erros:
+            logger.warning(f"{self.total_de_erros} linha(s) inválida(s) ignorada(s).")
+
+    def tratar_erros(self, erros: list[ErroDeLinha]) -> None:
+        """
+        Aplica a política de erro a erros já encontrados por verificar_lote
+        (por exemplo, em outra thread).
+        """
+        if self.politica == "fail":
+            self.__falhar(erros)
+
+        self.total_de_erros += len(erros)
+        for erro in erros:
+            logger.debug(f"Linha inválida ignorada: {erro}")
+        if self.politica == "quarantine":
+            self.__gravar_quarentena(erros)
+
+    def __falhar(self, erros: list[ErroDeLinha]) -> None:
+        exemplos = "; ".join(str(erro) for erro in erros[:10])
+        mensagem = f"{len(erros)} linha(s) inválida(s) no arquivo de vendas: "
+        mensagem += exemplos
+        logger.error(mensagem)
+        raise ValueError(mensagem)
+
+    def __gravar_quarentena(self, erros: list[ErroDeLinha]) -> None:
+        if self.__arquivo_quarentena is None:
+            # Em leituras incrementais (watch) o arquivo de quarentena é estendido
+            modo = "a" if self.__quarentena_iniciada else "w"
+            self.caminho_quarentena.parent.mkdir(parents=True, exist_ok=True)
+            self.__arquivo_quarentena = self.caminho_quarentena.open(
+                modo, encoding="utf-8", newline=""
+            )
+            self.__escritor_quarentena = csv.writer(self.__arquivo_quarentena)
+            if not self.__quarentena_iniciada:
+                self.__escritor_quarentena.writerow(
+                    ["linha", "motivo", *CAMPOS_OBRIGATORIOS]
+                )
+                self.__quarentena_iniciada = True
+        for erro in erros:
+            self.__escritor_quarentena.writerow(
+                [
+                    (
+                        erro.numero_linha
+                        if erro.numero_linha is not None
+                        else f"byte {erro.posicao}"
+                    ),
+                    erro.motivo,
+                    *(erro.linha.get(campo) or "" for campo in CAMPOS_OBRIGATORIOS),
+                ]
+            )
@@ -0,0 +1,58 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def diretorio_de_trabalho_temporario(tmp_path, monkeypatch):
+    """
+    Executa cada teste em um diretório temporário, para que os relatórios, o
+    cache (output/) e os CSVs de teste não sejam gravados no repositório.
+    """
+    monkeypatch.chdir(tmp_path)
+
+
+def pytest_addoption(parser):
+    grupo = parser.getgroup("desempenho", "Testes de desempenho")
+    grupo.addoption(
+        "--desempenho",
+        action="store_true",
+        default=False,
+        help="Executa os testes de desempenho (marcador desempenho).",
+    )
+    grupo.addoption(
+        "--desempenho-linhas",
+        default="100000",
+        help="Tamanhos dos CSVs gerados, separados por vírgula "
+        "(ex.: 100000,1000000,10000000).",
+    )
+    grupo.addoption(
+        "--desempenho-tolerancia",
+        type=float,
+        default=None,
+        help="Sobrescreve a tolerância em relação à baseline (ex.: 0.5 = 50%%).",
+    )
+    grupo.addoption(
+        "--atualizar-baseline",
+        action="store_true",
+        default=False,
+        help="Grava as medições como nova baseline em vez de compará-las.",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--desempenho"):
+        return
+    pular = pytest.mark.skip(reason="teste de desempenho: use --desempenho")
+    for item in items:
+        if "desempenho" in item.keywords:
+            item.add_marker(pular)
+
+
+def pytest_generate_tests(metafunc):
+    if "quantidade_de_linhas" in metafunc.fixturenames:
+        tamanhos = [
+            int(tamanho)
+            for tamanho in metafunc.config.getoption("--desempenho-linhas").split(",")
+        ]
+        metafunc.parametrize(
+            "quantidade_de_linhas", tamanhos, ids=[f"{t}-linhas" for t in tamanhos]
+        )
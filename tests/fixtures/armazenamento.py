@@ -0,0 +1,16 @@
+import pytest
+
+from parser.armazenamento import BancoDeVendas
+from tests.fixtures.relatorios import dummy_csv_file  # noqa: F401
+
+
+@pytest.fixture
+def banco(tmp_path, dummy_csv_file):
+    """
+    Fixture que cria um banco SQLite temporário com as vendas do dummy.csv.
+    """
+    caminho_banco = tmp_path / "vendas.db"
+    banco = BancoDeVendas(str(caminho_banco))
+    banco.ingerir("dummy.csv")
+    yield banco
+    banco.fechar()
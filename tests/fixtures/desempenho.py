@@ -0,0 +1,70 @@
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+CAMINHO_BASELINE = Path(__file__).parent / "desempenho_baseline.json"
+PRODUTOS_DISTINTOS = 1_000
+
+
+def gerar_csv_de_vendas(caminho: Path, quantidade_de_linhas: int) -> Path:
+    """
+    Gera um CSV de vendas determinístico, ordenado por data, com
+    PRODUTOS_DISTINTOS produtos e datas de 2025 em dois formatos.
+    """
+    aleatorio = random.Random(quantidade_de_linhas)
+    inicio = date(2025, 1, 1)
+    datas = [
+        (inicio + timedelta(days=dia)).strftime(formato)
+        for dia in range(365)
+        for formato in ("%d/%m/%Y", "%Y-%m-%d")
+    ]
+    precos = [
+        aleatorio.randrange(100, 100_000) / 100 for _ in range(PRODUTOS_DISTINTOS)
+    ]
+    por_dia = max(quantidade_de_linhas // len(datas), 1)
+    with caminho.open("w", encoding="utf-8") as file:
+        file.write("produto,quantidade,preco_unitario,data\n")
+        for indice in range(0, quantidade_de_linhas, 10_000):
+            file.writelines(
+                f"Produto {(produto := aleatorio.randrange(PRODUTOS_DISTINTOS))},"
+                f"{aleatorio.randrange(1, 10)},{precos[produto]},"
+                f"{datas[min(linha // por_dia, len(datas) - 1)]}\n"
+                for linha in range(indice, min(indice + 10_000, quantidade_de_linhas))
+            )
+    return caminho
+
+
+@pytest.fixture(scope="session")
+def csvs_de_desempenho(tmp_path_factory):
+    """
+    Fixture que gera (uma vez por sessão) os CSVs de vendas de cada tamanho.
+    """
+    diretorio = tmp_path_factory.mktemp("desempenho")
+    arquivos: dict[int, Path] = {}
+
+    def obter(quantidade_de_linhas: int) -> Path:
+        if quantidade_de_linhas not in arquivos:
+            arquivos[quantidade_de_linhas] = gerar_csv_de_vendas(
+                diretorio / f"vendas_{quantidade_de_linhas}.csv",
+                quantidade_de_linhas,
+            )
+        return arquivos[quantidade_de_linhas]
+
+    return obter
+
+
+@pytest.fixture(scope="session")
+def baseline_de_desempenho(request):
+    """
+    Fixture com a baseline de desempenho salva. Com --atualizar-baseline, as
+    medições registradas em "etapas" são gravadas no arquivo ao final da sessão.
+    """
+    baseline = json.loads(CAMINHO_BASELINE.read_text(encoding="utf-8"))
+    yield baseline
+    if request.config.getoption("--atualizar-baseline"):
+        CAMINHO_BASELINE.write_text(
+            json.dumps(baseline, indent=4, sort_keys=True) + "\n", encoding="utf-8"
+        )
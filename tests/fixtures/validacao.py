@@ -0,0 +1,22 @@
+import pytest
+
+CONTEUDO_COM_ERROS = (
+    "produto,quantidade,preco_unitario,data\n"
+    "Camiseta,3,49.9,01/01/2025\n"
+    "Calça,dois,99.9,13/08/2025\n"
+    "\n"
+    "Camiseta,1,49.9,32/01/2025\n"
+    "Tênis,1,199.9,01/08/2025\n"
+    "Meia,1,abc,01/08/2025\n"
+    "Boné,1\n"
+)
+
+
+@pytest.fixture
+def csv_com_erros(tmp_path):
+    """
+    Fixture que cria um CSV de vendas com linhas inválidas nas linhas 3, 5, 7 e 8.
+    """
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text(CONTEUDO_COM_ERROS, encoding="utf-8")
+    return arquivo
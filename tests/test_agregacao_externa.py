@@ -0,0 +1,203 @@
+import random
+from decimal import Decimal
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from helpers.arquivos import converter_para_bytes
+from parser.agregacao_externa import AgregacaoExterna, ProdutosEmDisco
+from parser.agregadores import AGREGADORES_PADRAO, TicketMedio, agregar
+from parser.modelos import Produto, Venda
+from parser.motores import escolher_motor_do_arquivo
+from parser.relatorios import Relatorio
+
+
+def gerar_vendas(quantidade: int, produtos: int) -> list[Venda]:
+    aleatorio = random.Random(42)
+    return [
+        Venda(
+            produto=Produto(
+                nome=f"Produto {aleatorio.randrange(produtos)}",
+                preco=Decimal(aleatorio.randrange(100, 10_000)).scaleb(-2),
+            ),
+            quantidade=aleatorio.randrange(1, 5),
+            data_str=f"{aleatorio.randrange(1, 29):02d}/01/2025",
+        )
+        for _ in range(quantidade)
+    ]
+
+
+def criar_relatorio(caminho: Path, **kwargs) -> Relatorio:
+    relatorio = Relatorio(str(caminho), usar_cache=False, **kwargs)
+    relatorio.base_caminho_relatorio = caminho.parent / kwargs["formato"] / "relatorio"
+    relatorio.base_caminho_relatorio.parent.mkdir(exist_ok=True)
+    return relatorio
+
+
+def test_agregacao_externa_igual_a_agregacao_em_memoria():
+    # Arrange
+    vendas = gerar_vendas(5_000, 800)
+    esperado = agregar(AGREGADORES_PADRAO, vendas)
+    agregacao = AgregacaoExterna(memoria_maxima=4_000, particoes=4)
+
+    # Act
+    for venda in vendas:
+        agregacao.atualizar(venda)
+    resultado = agregacao.finalizar()
+    total_por_produto = list(resultado["total_por_produto"].items())
+    agregacao.fechar()
+
+    # Assert
+    assert agregacao.despejou
+    assert isinstance(resultado["total_por_produto"], ProdutosEmDisco)
+    assert resultado["total_vendas"] == esperado["total_vendas"]
+    assert total_por_produto == list(esperado["total_por_produto"].items())
+    assert resultado["maior_venda"] == esperado["maior_venda"]
+
+
+def test_agregacao_externa_reparticiona_nomes_de_mesma_largura():
+    # Arrange
+    vendas = [
+        Venda(
+            produto=Produto(nome=f"SKU-{indice:08d}", preco=Decimal("9.90")),
+            quantidade=1,
+            data_str="01/01/2025",
+        )
+        for indice in range(4_000)
+    ]
+    agregacao = AgregacaoExterna(memoria_maxima=20_000, particoes=4)
+
+    # Act
+    with patch("parser.agregacao_externa.logger") as mock_logger:
+        for venda in vendas:
+            agregacao.atualizar(venda)
+        resultado = agregacao.finalizar()
+        arquivos = resultado["total_por_produto"].arquivos
+        total_por_produto = list(resultado["total_por_produto"].items())
+    agregacao.fechar()
+
+    # Assert
+    # Cada partição de 1000 produtos (~400 KB) é dividida até caber em 20 KB
+    assert len(arquivos) >= 4_000 * 400 // 20_000
+    mock_logger.warning.assert_not_called()
+    assert total_por_produto == list(
+        agregar(AGREGADORES_PADRAO, vendas)["total_por_produto"].items()
+    )
+
+
+def test_agregacao_externa_sem_despejo_mantem_dicionario():
+    # Arrange
+    vendas = gerar_vendas(100, 5)
+    agregacao = AgregacaoExterna(memoria_maxima=1024 * 1024)
+
+    # Act
+    for venda in vendas:
+        agregacao.atualizar(venda)
+    resultado = agregacao.finalizar()
+
+    # Assert
+    assert not agregacao.despejou
+    assert resultado == agregar(AGREGADORES_PADRAO, vendas)
+
+
+@pytest.mark.parametrize("formato", ["text", "json"])
+def test_relatorio_com_memoria_maxima_identico_ao_em_memoria(tmp_path, formato):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    linhas = ["produto,quantidade,preco_unitario,data"] + [
+        f'"{venda.produto.nome}, tam. M",{venda.quantidade},'
+        f"{venda.produto.preco},{venda.data_str}"
+        for venda in gerar_vendas(3_000, 500)
+    ]
+    arquivo.write_text("\n".join(linhas) + "\n", encoding="utf-8")
+    em_memoria = criar_relatorio(arquivo, formato=formato)
+    externo = criar_relatorio(
+        arquivo, formato=formato, motor=escolher_motor_do_arquivo(arquivo, 5_000)
+    )
+    for relatorio in (em_memoria, externo):
+        relatorio.registrar_agregador("ticket_medio", TicketMedio())
+
+    # Act
+    esperado = em_memoria.gerar_relatorio().read_text(encoding="utf-8")
+    resultado = externo.gerar_relatorio().read_text(encoding="utf-8")
+
+    # Assert
+    assert externo.agregacao_externa.despejou
+    assert externo.vendas == []
+    assert resultado == esperado
+
+
+def test_agregacao_externa_finalizar_repetido_inclui_vendas_novas():
+    # Arrange
+    vendas = gerar_vendas(4_000, 600)
+    agregacao = AgregacaoExterna(memoria_maxima=4_000, particoes=4)
+    for venda in vendas[:2_000]:
+        agregacao.atualizar(venda)
+    agregacao.finalizar()
+
+    # Act
+    for venda in vendas[2_000:]:
+        agregacao.atualizar(venda)
+    resultado = agregacao.finalizar()
+    total_por_produto = list(resultado["total_por_produto"].items())
+    agregacao.fechar()
+
+    # Assert
+    esperado = agregar(AGREGADORES_PADRAO, vendas)
+    assert resultado["total_vendas"] == esperado["total_vendas"]
+    assert total_por_produto == list(esperado["total_por_produto"].items())
+    assert resultado["maior_venda"] == esperado["maior_venda"]
+
+
+def test_atualizar_relatorio_com_despejo_inclui_linhas_acrescentadas(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    vendas = gerar_vendas(3_000, 500)
+    linhas = [
+        f"{venda.produto.nome},{venda.quantidade},{venda.produto.preco},"
+        f"{venda.data_str}\n"
+        for venda in vendas
+    ]
+    cabecalho = "produto,quantidade,preco_unitario,data\n"
+    arquivo.write_text(cabecalho + "".join(linhas[:1_500]), encoding="utf-8")
+    relatorio = Relatorio(
+        str(arquivo), "json", motor=escolher_motor_do_arquivo(arquivo, 5_000)
+    )
+    caminho_saida = tmp_path / "relatorio_vendas"
+    relatorio.atualizar_relatorio(caminho_saida)
+
+    # Act
+    with arquivo.open("a", encoding="utf-8") as file:
+        file.writelines(linhas[1_500:])
+    resultado = relatorio.atualizar_relatorio(caminho_saida)
+
+    # Assert
+    esperado = agregar(AGREGADORES_PADRAO, vendas)["total_vendas"]
+    assert relatorio.agregacao_externa.despejou
+    assert f'"total_vendas": "{esperado}"' in resultado.read_text(encoding="utf-8")
+    relatorio.agregacao_externa.fechar()
+
+
+def test_memoria_maxima_invalida():
+    # Act / Assert
+    with pytest.raises(ValueError) as excinfo:
+        AgregacaoExterna(memoria_maxima=0)
+    assert "Memória máxima inválida" in str(excinfo.value)
+
+
+@pytest.mark.parametrize(
+    "tamanho, esperado",
+    [("512M", 512 * 1024**2), ("1.5g", 1536 * 1024**2), ("64KiB", 65_536), ("10", 10)],
+)
+def test_converter_para_bytes(tamanho, esperado):
+    # Act / Assert
+    assert converter_para_bytes(tamanho) == esperado
+
+
+@pytest.mark.parametrize("tamanho", ["", "muito", "-1G"])
+def test_converter_para_bytes_invalido(tamanho):
+    # Act / Assert
+    with pytest.raises(ValueError) as excinfo:
+        converter_para_bytes(tamanho)
+    assert "Tamanho inválido" in str(excinfo.value)
@@ -0,0 +1,224 @@
+import json
+import tracemalloc
+from decimal import Decimal
+
+import pytest
+
+from parser.agregadores import (
+    AGREGADORES_PADRAO,
+    MaiorVenda,
+    PrecoMinMaxPorProduto,
+    ReceitaPorDiaDaSemana,
+    TicketMedio,
+    TotalPorProduto,
+    agregar,
+    atualizar_estados,
+    finalizar_estados,
+    iniciar_estados,
+    mesclar_estados,
+)
+from parser.modelos import Produto, Venda
+from parser.motores import escolher_motor_do_arquivo
+from parser.relatorios import Relatorio
+from tests.fixtures.relatorios import dummy_csv_file  # noqa: F401
+
+CAMISETA = Produto(nome="Camiseta", preco=Decimal("49.90"))
+CALCA = Produto(nome="Calça", preco=Decimal("99.90"))
+VENDAS = [
+    Venda(produto=CAMISETA, quantidade=3, data_str="2025-01-06"),
+    Venda(produto=CALCA, quantidade=2, data_str="2025-01-07"),
+    Venda(produto=CAMISETA, quantidade=1, data_str="2025-01-06"),
+    Venda(
+        produto=Produto(nome="Calça", preco=Decimal("89.90")),
+        quantidade=3,
+        data_str="2025-01-12",
+    ),
+]
+AGREGADORES = {
+    **AGREGADORES_PADRAO,
+    "ticket_medio": TicketMedio(),
+    "receita_por_dia_da_semana": ReceitaPorDiaDaSemana(),
+    "preco_por_produto": PrecoMinMaxPorProduto(),
+}
+
+
+def test_agregar_em_uma_passada():
+    # Act
+    resultado = agregar(AGREGADORES, VENDAS)
+
+    # Assert
+    assert resultado["total_vendas"] == Decimal("669.10")
+    assert resultado["maior_venda"].produto.nome == "Calça"
+    assert resultado["maior_venda"].quantidade == 5
+    assert resultado["total_por_produto"]["Calça"]["preco_unitario"] == Decimal("89.90")
+    assert resultado["ticket_medio"] == Decimal("167.28")
+    assert resultado["receita_por_dia_da_semana"]["segunda-feira"] == Decimal("199.60")
+    assert resultado["receita_por_dia_da_semana"]["domingo"] == Decimal("269.70")
+    assert resultado["preco_por_produto"]["Calça"] == {
+        "minimo": Decimal("89.90"),
+        "maximo": Decimal("99.90"),
+    }
+
+
+def test_agregar_sem_vendas():
+    # Act
+    resultado = agregar(AGREGADORES_PADRAO, [])
+
+    # Assert
+    assert resultado["total_vendas"] == Decimal("0.00")
+    assert resultado["maior_venda"] is None
+    assert resultado["total_por_produto"] == {}
+
+
+def test_maior_venda_soma_quantidades_do_mesmo_produto():
+    # Arrange
+    vendas = [
+        Venda(produto=CAMISETA, quantidade=2, data_str="2025-01-01"),
+        Venda(produto=CAMISETA, quantidade=3, data_str="2025-01-02"),
+        Venda(produto=CALCA, quantidade=4, data_str="2025-01-03"),
+    ]
+
+    # Act
+    maior = agregar({"maior_venda": MaiorVenda()}, vendas)["maior_venda"]
+
+    # Assert
+    assert maior.produto.nome == "Camiseta"
+    assert maior.quantidade == 5
+
+
+@pytest.mark.parametrize("divisao", [1, 2, 3])
+def test_mesclar_blocos_equivale_a_uma_passada(divisao):
+    # Arrange
+    blocos = [VENDAS[:divisao], VENDAS[divisao:]]
+    estados_por_bloco = []
+    for bloco in blocos:
+        estados = iniciar_estados(AGREGADORES)
+        for venda in bloco:
+            atualizar_estados(AGREGADORES, estados, venda)
+        estados_por_bloco.append(estados)
+
+    # Act
+    estados = mesclar_estados(AGREGADORES, *estados_por_bloco)
+    resultado = finalizar_estados(AGREGADORES, estados)
+
+    # Assert
+    esperado = agregar(AGREGADORES, VENDAS)
+    assert resultado["maior_venda"].quantidade == esperado["maior_venda"].quantidade
+    del resultado["maior_venda"], esperado["maior_venda"]
+    assert resultado == esperado
+
+
+def test_registrar_agregador_inclui_metrica_no_relatorio(dummy_csv_file):
+    # Arrange
+    relatorio = Relatorio("dummy.csv", "json", usar_cache=False)
+    relatorio.registrar_agregador("ticket_medio", TicketMedio())
+
+    # Act
+    resultado = relatorio.gerar_relatorio()
+
+    # Assert
+    conteudo = json.loads(resultado.read_text(encoding="utf-8"))
+    assert conteudo["metricas_adicionais"] == {"ticket_medio": "142.70"}
+    assert conteudo["total_vendas"] == "998.90"
+    resultado.unlink()
+
+
+def test_registrar_agregador_nome_duplicado():
+    # Arrange
+    relatorio = Relatorio("dummy.csv", "text")
+
+    # Act / Assert
+    with pytest.raises(ValueError) as excinfo:
+        relatorio.registrar_agregador("total_vendas", TicketMedio())
+    assert "Já existe uma métrica registrada" in str(excinfo.value)
+
+
+def test_estado_por_produto_com_chave_pelo_nome_ou_pelo_id():
+    # Arrange
+    agregador = TotalPorProduto()
+    codificadas = [
+        Venda(
+            produto=venda.produto,
+            quantidade=venda.quantidade,
+            data_str=venda.data_str,
+            id_produto=0 if venda.produto.nome == "Camiseta" else 1,
+        )
+        for venda in VENDAS
+    ]
+
+    # Act
+    por_nome = agregar({"total": agregador}, VENDAS)["total"]
+    estado = agregador.iniciar()
+    for venda in codificadas:
+        estado = agregador.atualizar(estado, venda)
+
+    # Assert
+    assert list(estado) == [0, 1]
+    assert [quantidade for _, quantidade, _ in estado.values()] == [4, 5]
+    assert estado[1][0] == Decimal("469.50")
+    assert agregador.finalizar(estado) == por_nome
+    assert list(por_nome) == ["Camiseta", "Calça"]
+
+
+def test_vendas_extraidas_compartilham_produto_por_id(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text(
+        "produto,quantidade,preco_unitario,data\n"
+        "Camiseta,3,49.9,01/01/2025\n"
+        "Calça,2,99.9,13/08/2025\n"
+        "Camiseta,1,49.9,10/01/2025\n"
+        "Camiseta,1,39.9,11/01/2025\n",
+        encoding="utf-8",
+    )
+    relatorio = Relatorio(str(arquivo), "json", usar_cache=False)
+
+    # Act
+    relatorio._Relatorio__extrair_dados_de_vendas()
+
+    # Assert
+    camiseta, calca, mesmo_preco, outro_preco = relatorio.vendas
+    assert mesmo_preco.produto is camiseta.produto
+    assert outro_preco.produto is not camiseta.produto
+    assert outro_preco.produto.preco == Decimal("39.9")
+    # Os ids são do dicionário do relatório, na ordem em que os produtos aparecem
+    assert camiseta.id_produto == outro_preco.id_produto == 0
+    assert calca.id_produto == 1
+
+
+@pytest.mark.parametrize("motor", ["aproximado", "disco"])
+def test_memoria_limitada_nao_cresce_com_os_produtos_distintos(tmp_path, motor):
+    # Arrange
+    def medir_pico(produtos_distintos: int) -> int:
+        arquivo = tmp_path / f"vendas_{produtos_distintos}.csv"
+        arquivo.write_text(
+            "produto,quantidade,preco_unitario,data\n"
+            + "".join(
+                f"SKU-{indice:08d},1,9.9,01/01/2025\n"
+                for indice in range(produtos_distintos)
+            ),
+            encoding="utf-8",
+        )
+        opcoes = (
+            {"aproximado": True}
+            if motor == "aproximado"
+            else {"motor": escolher_motor_do_arquivo(arquivo, 256 * 1024)}
+        )
+        relatorio = Relatorio(str(arquivo), "json", usar_cache=False, **opcoes)
+        # Lotes pequenos: o pico não deve refletir o tamanho do lote validado
+        relatorio.validador.tamanho_lote = 500
+        tracemalloc.start()
+        try:
+            relatorio._Relatorio__extrair_dados_de_vendas()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            assert len(relatorio._Relatorio__produtos_codificados) == 0
+
+    # Act
+    menor = medir_pico(4_000)
+    maior = medir_pico(16_000)
+
+    # Assert
+    # Guardando algo por produto, os 12 mil produtos a mais ocupariam ~6 MB
+    assert maior - menor < 1024 * 1024
@@ -0,0 +1,194 @@
+import os
+import sqlite3
+import sys
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from parser.agregadores import TicketMedio
+from parser.armazenamento import BancoDeVendas
+from parser.main import main
+from parser.relatorios import Relatorio
+from tests.fixtures.armazenamento import banco  # noqa: F401
+from tests.fixtures.relatorios import dummy_csv_file  # noqa: F401
+
+CABECALHO = "produto,quantidade,preco_unitario,data\n"
+
+
+def test_ingerir_converte_centavos_e_datas_iso(banco):
+    # Act
+    linhas = banco.conexao.execute(
+        "SELECT produto, quantidade, preco_centavos, data FROM vendas ORDER BY id"
+    ).fetchall()
+
+    # Assert
+    assert len(linhas) == 7
+    assert linhas[0] == ("Camiseta", 3, 4990, "2025-01-01")
+    assert banco.conexao.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_ingerir_arquivo_repetido_e_ignorado(banco):
+    # Act / Assert
+    assert banco.ingerir("dummy.csv") == 0
+    assert banco.conexao.execute("SELECT COUNT(*) FROM vendas").fetchone()[0] == 7
+
+
+def test_ingerir_arquivo_acrescido_insere_apenas_linhas_novas(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text(CABECALHO + "Camiseta,3,49.9,01/01/2025\n", encoding="utf-8")
+    banco = BancoDeVendas(str(tmp_path / "vendas.db"))
+    banco.ingerir(str(arquivo))
+
+    # Act
+    with arquivo.open("a", encoding="utf-8") as file:
+        file.write("Calça,2,99.9,13/08/2025\n")
+    inseridas = banco.ingerir(str(arquivo))
+
+    # Assert
+    assert inseridas == 1
+    assert banco.obter_metricas()["total_vendas"] == Decimal("349.50")
+    banco.fechar()
+
+
+def test_ingerir_arquivo_alterado_substitui_vendas(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text(
+        CABECALHO + "Camiseta,3,49.9,01/01/2025\nCalça,2,99.9,13/08/2025\n",
+        encoding="utf-8",
+    )
+    banco = BancoDeVendas(str(tmp_path / "vendas.db"))
+    banco.ingerir(str(arquivo))
+    novo = tmp_path / "vendas.csv.novo"
+    novo.write_text(
+        CABECALHO + "Tênis,1,199.9,01/08/2025\nCalça,2,99.9,13/08/2025\n"
+        "Camiseta,1,49.9,02/01/2025\n",
+        encoding="utf-8",
+    )
+
+    # Act
+    # Substituição atômica por outro arquivo, maior que o anterior
+    os.replace(novo, arquivo)
+    inseridas = banco.ingerir(str(arquivo))
+
+    # Assert
+    assert inseridas == 3
+    assert banco.obter_metricas()["total_vendas"] == Decimal("449.60")
+    banco.fechar()
+
+
+def test_ingerir_falha_mantem_vendas_anteriores(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text(CABECALHO + "Camiseta,3,49.9,01/01/2025\n", encoding="utf-8")
+    banco = BancoDeVendas(str(tmp_path / "vendas.db"))
+    banco.ingerir(str(arquivo))
+    with arquivo.open("a", encoding="utf-8") as file:
+        file.write("Calça,2,99.9,13/08/2025\nTênis,dois,199.9,01/08/2025\n")
+
+    # Act
+    with pytest.raises(ValueError):
+        banco.ingerir(str(arquivo))
+
+    # Assert
+    assert banco.obter_metricas()["total_vendas"] == Decimal("149.70")
+    assert banco.conexao.execute("SELECT linhas FROM ingestoes").fetchone() == (1,)
+    banco.fechar()
+
+
+def test_banco_de_versao_anterior(tmp_path):
+    # Arrange
+    caminho_banco = tmp_path / "antigo.db"
+    conexao = sqlite3.connect(caminho_banco)
+    conexao.execute("CREATE TABLE ingestoes (arquivo TEXT, tamanho INTEGER)")
+    conexao.close()
+
+    # Act / Assert
+    with pytest.raises(ValueError) as excinfo:
+        BancoDeVendas(str(caminho_banco))
+    assert "criado por uma versão anterior" in str(excinfo.value)
+
+
+@pytest.mark.parametrize(
+    "datas, intervalo, total_esperado",
+    [
+        ((), False, Decimal("998.90")),
+        ((date(2025, 1, 1), date(2025, 1, 31)), True, Decimal("299.40")),
+        ((date(2025, 8, 13),), False, Decimal("199.80")),
+    ],
+    ids=["sem-filtro", "intervalo", "data-unica"],
+)
+def test_obter_metricas(banco, datas, intervalo, total_esperado):
+    # Act
+    metricas = banco.obter_metricas(datas, intervalo)
+
+    # Assert
+    assert metricas["total_vendas"] == total_esperado
+
+
+@pytest.mark.parametrize("formato", ["text", "json"])
+def test_relatorio_do_banco_igual_ao_do_csv(banco, tmp_path, formato):
+    # Arrange
+    relatorio_csv = Relatorio("dummy.csv", formato, usar_cache=False)
+    relatorio_csv.base_caminho_relatorio = tmp_path / "csv"
+    relatorio_banco = Relatorio(str(banco.caminho_banco), formato)
+    relatorio_banco.base_caminho_relatorio = tmp_path / "banco"
+
+    # Act
+    resultado_csv = relatorio_csv.gerar_relatorio()
+    resultado_banco = relatorio_banco.gerar_relatorio()
+
+    # Assert
+    assert resultado_banco.read_text(encoding="utf-8") == resultado_csv.read_text(
+        encoding="utf-8"
+    )
+
+
+def test_relatorio_do_banco_com_metricas_adicionais_e_datas(banco, tmp_path):
+    # Arrange
+    relatorio = Relatorio(
+        str(banco.caminho_banco),
+        "json",
+        data_inicial="2025-08-01",
+        data_final="2025-08-31",
+    )
+    relatorio.base_caminho_relatorio = tmp_path / "relatorio"
+    relatorio.registrar_agregador("ticket_medio", TicketMedio())
+
+    # Act
+    resultado = relatorio.gerar_relatorio()
+
+    # Assert
+    conteudo = resultado.read_text(encoding="utf-8")
+    assert '"total_vendas": "699.50"' in conteudo
+    assert '"ticket_medio": "174.88"' in conteudo
+
+
+def test_relatorio_do_banco_sem_vendas_no_periodo(banco):
+    # Arrange
+    relatorio = Relatorio(str(banco.caminho_banco), "text", data_inicial="2030-01-01")
+
+    # Act / Assert
+    with pytest.raises(ValueError) as excinfo:
+        relatorio.gerar_relatorio()
+    assert str(excinfo.value) == "Nenhuma venda encontrada."
+
+
+def test_cli_ingest(tmp_path, dummy_csv_file):
+    # Arrange
+    caminho_banco = tmp_path / "historico.db"
+    argumentos = ["main.py", "ingest", "dummy.csv", "--db", str(caminho_banco)]
+
+    # Act
+    with patch.object(sys, "argv", argumentos), patch("builtins.print") as mock_print:
+        main()
+
+    # Assert
+    mock_print.assert_called_once_with(
+        f"7 vendas de dummy.csv carregadas em {caminho_banco}"
+    )
+    assert BancoDeVendas.e_banco(str(caminho_banco))
+    assert not BancoDeVendas.e_banco("dummy.csv")
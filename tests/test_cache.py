@@ -0,0 +1,171 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from parser.cache import CacheDeRelatorios
+from parser.relatorios import Relatorio
+
+CONTEUDO = (
+    "produto,quantidade,preco_unitario,data\n"
+    "Camiseta,3,49.9,01/01/2025\n"
+    "Calça,2,99.9,13/08/2025\n"
+)
+
+
+def criar_relatorio(tmp_path: Path, **kwargs) -> Relatorio:
+    relatorio = Relatorio(str(tmp_path / "vendas.csv"), **kwargs)
+    relatorio.base_caminho_relatorio = tmp_path / "output" / "relatorio"
+    relatorio.base_caminho_relatorio.parent.mkdir(exist_ok=True)
+    return relatorio
+
+
+def test_gerar_relatorio_reaproveita_cache(tmp_path, monkeypatch):
+    # Arrange
+    (tmp_path / "vendas.csv").write_text(CONTEUDO, encoding="utf-8")
+    primeiro = criar_relatorio(tmp_path, formato="text").gerar_relatorio()
+    monkeypatch.setattr(
+        "helpers.date_handler.DateHandler.obter_data_e_hora_para_salvar_relatorio",
+        lambda: "outro-horario",
+    )
+
+    # Act
+    segundo = criar_relatorio(tmp_path, formato="txt").gerar_relatorio()
+    sem_cache = criar_relatorio(
+        tmp_path, formato="text", usar_cache=False
+    ).gerar_relatorio()
+    conteudo = primeiro.read_text(encoding="utf-8")
+    primeiro.unlink()
+    # Sem o relatório original, a cópia do cache é retornada
+    terceiro = criar_relatorio(tmp_path, formato="text").gerar_relatorio()
+
+    # Assert
+    assert segundo == primeiro
+    assert sem_cache != primeiro
+    assert terceiro.parent == tmp_path / "output" / CacheDeRelatorios.NOME_DIRETORIO
+    assert terceiro.read_text(encoding="utf-8") == conteudo
+
+
+def test_obter_nao_retorna_relatorio_alterado(tmp_path):
+    # Arrange
+    cache = CacheDeRelatorios(tmp_path)
+    relatorio = tmp_path / "relatorio.txt"
+    relatorio.write_text("relatório", encoding="utf-8")
+    em_cache = cache.registrar("chave", relatorio)
+    vinculado = os.path.samefile(relatorio, em_cache)
+
+    # Act
+    # Alterado no lugar: se a cópia for um hard link, ela também é alterada
+    with relatorio.open("a", encoding="utf-8") as file:
+        file.write(" editado pelo usuário")
+    alterado = cache.obter("chave")
+    substituido = tmp_path / "substituto.txt"
+    substituido.write_text("outro", encoding="utf-8")
+    relatorio.unlink()
+    cache.registrar("outra", substituido)
+    os.replace(substituido, tmp_path / "movido.txt")
+    movido = cache.obter("outra")
+
+    # Assert
+    assert alterado == (None if vinculado else em_cache)
+    assert movido.parent == cache.diretorio
+    assert movido.read_text(encoding="utf-8") == "outro"
+
+
+def test_gerar_relatorio_invalida_cache_quando_entrada_muda(tmp_path, monkeypatch):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text(CONTEUDO, encoding="utf-8")
+    primeiro = criar_relatorio(tmp_path, formato="json").gerar_relatorio()
+    monkeypatch.setattr(
+        "helpers.date_handler.DateHandler.obter_data_e_hora_para_salvar_relatorio",
+        lambda: "outro-horario",
+    )
+
+    # Act
+    arquivo.write_text(CONTEUDO + "Tênis,1,199.9,01/08/2025\n", encoding="utf-8")
+    segundo = criar_relatorio(tmp_path, formato="json").gerar_relatorio()
+    conteudo_segundo = segundo.read_text(encoding="utf-8")
+    chave_com_datas = CacheDeRelatorios.gerar_chave(
+        str(arquivo), {"data_inicial": "01/01/2025"}
+    )
+
+    # Assert
+    assert segundo != primeiro
+    assert "199.9" in conteudo_segundo
+    assert CacheDeRelatorios(segundo.parent).obter(chave_com_datas) is None
+    assert primeiro.exists()
+
+
+def test_gerar_chave_arquivo_inexistente():
+    # Act / Assert
+    assert CacheDeRelatorios.gerar_chave("inexistente.csv", {}) is None
+
+
+def test_registrar_remove_relatorios_antigos(tmp_path):
+    # Arrange
+    cache = CacheDeRelatorios(tmp_path, idade_maxima_dias=1, tamanho_maximo_mb=0.001)
+    cache.diretorio.mkdir()
+    antigo = cache.diretorio / "relatorio_antigo.txt"
+    antigo.write_text("antigo", encoding="utf-8")
+    um_ano_atras = time.time() - 365 * 24 * 60 * 60
+    os.utime(antigo, (um_ano_atras, um_ano_atras))
+    grande = cache.diretorio / "relatorio_grande.txt"
+    grande.write_text("x" * 2_000, encoding="utf-8")
+    os.utime(grande, (time.time() - 60, time.time() - 60))
+    novo = tmp_path / "relatorio_novo.txt"
+    novo.write_text("x" * 2_000, encoding="utf-8")
+    # Relatórios do usuário (por exemplo, o do watch) nunca são removidos
+    do_usuario = tmp_path / "relatorio_vendas.txt"
+    do_usuario.write_text("antigo", encoding="utf-8")
+    os.utime(do_usuario, (um_ano_atras, um_ano_atras))
+
+    # Act
+    em_cache = cache.registrar("chave", novo)
+
+    # Assert
+    assert not antigo.exists()
+    assert not grande.exists()
+    assert novo.exists() and do_usuario.exists()
+    assert cache.obter("chave") == novo
+    assert em_cache.read_text(encoding="utf-8") == "x" * 2_000
+
+
+def test_registrar_simultaneo_nao_perde_entradas(tmp_path):
+    # Arrange
+    relatorios = []
+    for indice in range(16):
+        relatorio = tmp_path / f"relatorio_{indice}.txt"
+        relatorio.write_text(str(indice), encoding="utf-8")
+        relatorios.append(relatorio)
+
+    def registrar(indice: int) -> None:
+        CacheDeRelatorios(tmp_path).registrar(f"chave{indice}", relatorios[indice])
+
+    # Act
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(registrar, range(16)))
+
+    # Assert
+    cache = CacheDeRelatorios(tmp_path)
+    for indice in range(16):
+        em_cache = cache.obter(f"chave{indice}")
+        assert em_cache.read_text(encoding="utf-8") == str(indice)
+
+
+def test_indice_corrompido_e_ignorado(tmp_path):
+    # Arrange
+    cache = CacheDeRelatorios(tmp_path)
+    cache.diretorio.mkdir()
+    cache.caminho_indice.write_text('{"chave": ', encoding="utf-8")
+    relatorio = tmp_path / "relatorio.txt"
+    relatorio.write_text("relatório", encoding="utf-8")
+
+    # Act
+    anterior = cache.obter("chave")
+    em_cache = cache.registrar("chave", relatorio)
+
+    # Assert
+    assert anterior is None
+    assert cache.obter("chave") == relatorio
+    assert em_cache.read_text(encoding="utf-8") == "relatório"
@@ -0,0 +1,239 @@
+import json
+import sys
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from parser.cubo import CuboDeVendas
+from parser.main import main
+from parser.modelos import DicionarioDeProdutos
+from parser.relatorios import Relatorio
+from parser.validacao import ValidadorDeVendas
+from tests.fixtures.validacao import csv_com_erros  # noqa: F401
+
+CABECALHO = "produto,quantidade,preco_unitario,data\n"
+
+
+def escrever_vendas(caminho: Path, quantidade: int = 1_500) -> Path:
+    caminho.write_text(
+        CABECALHO
+        + "".join(
+            f"Produto {indice % 23},{indice % 4 + 1},{indice % 23 + 10}.25,"
+            f"{indice % 28 + 1:02d}/{indice % 12 + 1:02d}/2025\n"
+            for indice in range(quantidade)
+        ),
+        encoding="utf-8",
+    )
+    return caminho
+
+
+def vendas_do_relatorio(caminho: Path) -> list:
+    relatorio = Relatorio(str(caminho), "json", usar_cache=False)
+    relatorio._Relatorio__extrair_dados_de_vendas()
+    return relatorio.vendas
+
+
+def data_da_venda(venda) -> date:
+    return date.fromordinal(venda.data_ordinal)
+
+
+def test_dicionario_de_produtos_codifica_na_ordem():
+    # Arrange
+    produtos = DicionarioDeProdutos(["Camiseta", "Calça"])
+
+    # Act
+    ids = [produtos.codificar(nome) for nome in ("Tênis", "Camiseta", "Tênis")]
+
+    # Assert
+    assert ids == [2, 0, 2]
+    assert len(produtos) == 3
+    assert "Calça" in produtos
+    assert produtos.decodificar(2) == "Tênis"
+    with pytest.raises(ValueError) as excinfo:
+        produtos.obter_id("Meia")
+    assert "Produto não encontrado: Meia" in str(excinfo.value)
+
+
+def test_cubo_confere_com_as_vendas_do_relatorio(tmp_path):
+    # Arrange
+    arquivo = escrever_vendas(tmp_path / "vendas.csv")
+    vendas = vendas_do_relatorio(arquivo)
+    inicio, fim = date(2025, 3, 10), date(2025, 7, 20)
+
+    # Act
+    cubo = CuboDeVendas.construir(str(arquivo))
+
+    # Assert
+    def receita(filtro) -> Decimal:
+        return sum(
+            (
+                venda.produto.preco * venda.quantidade
+                for venda in vendas
+                if filtro(venda)
+            ),
+            Decimal("0.00"),
+        )
+
+    assert cubo.totais()["receita"] == receita(lambda venda: True)
+    assert cubo.totais()["quantidade"] == sum(venda.quantidade for venda in vendas)
+    assert cubo.totais("Produto 5", inicio, fim)["receita"] == receita(
+        lambda venda: (
+            venda.produto.nome == "Produto 5" and inicio <= data_da_venda(venda) <= fim
+        )
+    )
+    assert cubo.por_mes("Produto 5")["2025-04"]["receita"] == receita(
+        lambda venda: (
+            venda.produto.nome == "Produto 5"
+            and data_da_venda(venda).strftime("%Y-%m") == "2025-04"
+        )
+    )
+    assert sum(mes["quantidade"] for mes in cubo.por_mes().values()) == sum(
+        venda.quantidade for venda in vendas
+    )
+    participacao = (
+        receita(
+            lambda venda: (
+                venda.produto.nome == "Produto 5"
+                and inicio <= data_da_venda(venda) <= fim
+            )
+        )
+        * 100
+        / receita(lambda venda: inicio <= data_da_venda(venda) <= fim)
+    )
+    assert cubo.participacao("Produto 5", inicio, fim) == participacao.quantize(
+        Decimal("0.01")
+    )
+
+
+def test_cubo_melhor_dia_por_produto(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text(
+        CABECALHO
+        + "Camiseta,3,49.9,01/01/2025\n"
+        + "Camiseta,1,49.9,10/01/2025\n"
+        + "Camiseta,2,49.9,10/01/2025\n"
+        + "Calça,2,99.9,13/08/2025\n"
+        + "Calça,2,99.9,2025-08-14\n",
+        encoding="utf-8",
+    )
+
+    # Act
+    melhores = CuboDeVendas.construir(str(arquivo)).melhores_dias()
+
+    # Assert
+    assert melhores == {
+        "Camiseta": {
+            "data": "2025-01-01",
+            "quantidade": 3,
+            "receita": Decimal("149.70"),
+        },
+        "Calça": {
+            "data": "2025-08-13",
+            "quantidade": 2,
+            "receita": Decimal("199.80"),
+        },
+    }
+
+
+def test_cubo_salvo_e_aberto_com_mmap(tmp_path):
+    # Arrange
+    arquivo = escrever_vendas(tmp_path / "vendas.csv")
+    construido = CuboDeVendas.construir(str(arquivo))
+    caminho = construido.salvar(tmp_path / "cubos" / "vendas.cubo")
+
+    # Act
+    with CuboDeVendas.abrir(caminho) as aberto:
+        resultados = (
+            aberto.totais("Produto 7", date(2025, 2, 1), date(2025, 9, 30)),
+            aberto.por_mes(),
+            aberto.melhores_dias(),
+        )
+        vetores = aberto.vetores
+
+    # Assert
+    assert resultados == (
+        construido.totais("Produto 7", date(2025, 2, 1), date(2025, 9, 30)),
+        construido.por_mes(),
+        construido.melhores_dias(),
+    )
+    assert isinstance(next(iter(vetores.values())), memoryview)
+    assert aberto.vetores == {}
+
+
+def test_cubo_arquivo_invalido(tmp_path):
+    # Arrange
+    caminho = tmp_path / "vendas.cubo"
+    caminho.write_bytes(b"produto,quantidade\n")
+
+    # Act / Assert
+    with pytest.raises(ValueError) as excinfo:
+        CuboDeVendas.abrir(caminho)
+    assert "não é um cubo de vendas" in str(excinfo.value)
+    with pytest.raises(FileNotFoundError):
+        CuboDeVendas.abrir(tmp_path / "inexistente.cubo")
+
+
+def test_cubo_ignora_linhas_invalidas(csv_com_erros, tmp_path):
+    # Arrange
+    validador = ValidadorDeVendas(
+        politica="quarantine", caminho_quarentena=tmp_path / "quarentena.csv"
+    )
+
+    # Act
+    cubo = CuboDeVendas.construir(str(csv_com_erros), validador)
+
+    # Assert
+    assert cubo.produtos.nomes == ["Camiseta", "Tênis"]
+    assert cubo.totais() == {"quantidade": 4, "receita": Decimal("349.60")}
+
+
+def test_cli_cube_build_e_query(tmp_path, capsys):
+    # Arrange
+    arquivo = escrever_vendas(tmp_path / "vendas.csv")
+    caminho_cubo = tmp_path / "vendas.cubo"
+    construir = ["main.py", "cube", "build", str(arquivo), "--output"]
+    construir.append(str(caminho_cubo))
+    consultar = ["main.py", "cube", "query", str(caminho_cubo), "--slice", "share"]
+    consultar += ["--product", "Produto 3", "--start", "2025-01-01"]
+    consultar += ["--end", "31/03/2025"]
+
+    # Act
+    with patch.object(sys, "argv", construir):
+        main()
+    capsys.readouterr()
+    with patch.object(sys, "argv", consultar):
+        main()
+
+    # Assert
+    resultado = json.loads(capsys.readouterr().out)
+    with CuboDeVendas.abrir(caminho_cubo) as cubo:
+        esperado = cubo.participacao("Produto 3", date(2025, 1, 1), date(2025, 3, 31))
+    assert Decimal(resultado["participacao"]) == esperado
+
+
+def test_cli_cube_build_e_ingest_usam_diretorio_de_saida(csv_com_erros, tmp_path):
+    # Arrange
+    diretorio_saida = tmp_path / "saida"
+    opcoes = ["--on-error", "quarantine", "--output-dir", str(diretorio_saida)]
+    construir = ["main.py", "cube", "build", str(csv_com_erros), *opcoes]
+    ingerir = ["main.py", "ingest", str(csv_com_erros), *opcoes]
+    ingerir += ["--db", str(tmp_path / "vendas.db")]
+
+    # Act
+    with patch.object(sys, "argv", construir), patch("builtins.print"):
+        main()
+    quarentena_do_cubo = diretorio_saida / f"quarentena_{csv_com_erros.stem}.csv"
+    conteudo_do_cubo = quarentena_do_cubo.read_text(encoding="utf-8")
+    quarentena_do_cubo.unlink()
+    with patch.object(sys, "argv", ingerir), patch("builtins.print"):
+        main()
+
+    # Assert
+    assert (diretorio_saida / f"{csv_com_erros.stem}.cubo").exists()
+    assert "dois" in conteudo_do_cubo
+    assert "dois" in quarentena_do_cubo.read_text(encoding="utf-8")
+    assert not (tmp_path / "output").exists()
@@ -0,0 +1,93 @@
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from helpers.date_handler import DateHandler
+
+
+def test_str_to_dates_converte_formatos_em_ordinais():
+    # Arrange
+    datas = ["2025-01-15", "15/01/2025", "15-01-2025", "2025/01/15", "", "2025-01-15"]
+
+    # Act
+    ordinais = DateHandler.str_to_dates(datas)
+
+    # Assert
+    esperado = date(2025, 1, 15).toordinal()
+    assert ordinais == [esperado, esperado, esperado, esperado, None, esperado]
+
+
+def test_str_to_dates_equivale_a_str_to_date():
+    # Arrange
+    datas = [f"{dia:02d}/{mes:02d}/2024" for mes in range(1, 13) for dia in (1, 29)]
+
+    # Act
+    ordinais = DateHandler.str_to_dates(datas)
+
+    # Assert
+    assert ordinais == [DateHandler.str_to_date(data).toordinal() for data in datas]
+
+
+def test_str_to_dates_formatos_de_largura_fixa_nao_usam_str_to_date():
+    # Arrange
+    datas = ["2025-01-15", "15/01/2025", "0012-01-05", "05/01/0012", "2024-02-29"]
+
+    # Act
+    with patch.object(DateHandler, "str_to_date") as str_to_date:
+        ordinais = DateHandler.str_to_dates(datas)
+
+    # Assert
+    str_to_date.assert_not_called()
+    assert ordinais == [
+        date(2025, 1, 15).toordinal(),
+        date(2025, 1, 15).toordinal(),
+        date(12, 1, 5).toordinal(),
+        date(12, 1, 5).toordinal(),
+        date(2024, 2, 29).toordinal(),
+    ]
+
+
+@pytest.mark.parametrize("data", ["0012-01-05", "05/01/0012", "0031-12-01"])
+def test_str_to_dates_anos_baixos(data):
+    # Act
+    ordinais = DateHandler.str_to_dates([data])
+
+    # Assert
+    assert ordinais == [DateHandler.str_to_date(data).toordinal()]
+
+
+@pytest.mark.parametrize("data_invalida", ["2025-02-30", "31/04/2025", "amanhã"])
+def test_str_to_dates_data_invalida(data_invalida):
+    # Act / Assert
+    with pytest.raises(ValueError):
+        DateHandler.str_to_dates(["2025-01-01", data_invalida])
+    assert DateHandler.str_to_dates([data_invalida], ignorar_erros=True) == [None]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "2025-+1-01",
+        "2025- 1-01",
+        "2025-01- 1",
+        "+025-01-01",
+        " 1/01/2025",
+        "01/+1/2025",
+        "2025-01-1 ",
+        "٢٠٢٥-٠١-٠١",
+        "01/01/２０２５",
+    ],
+)
+def test_str_to_dates_concorda_com_str_to_date(data):
+    # Arrange
+    try:
+        esperado = DateHandler.str_to_date(data).toordinal()
+    except ValueError:
+        esperado = None
+
+    # Act
+    ordinais = DateHandler.str_to_dates([data], ignorar_erros=True)
+
+    # Assert
+    assert ordinais == [esperado]
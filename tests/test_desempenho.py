@@ -0,0 +1,134 @@
+import time
+import tracemalloc
+
+import pytest
+
+from parser.agregadores import AGREGADORES_PADRAO, agregar
+from parser.relatorios import Relatorio
+from tests.fixtures.desempenho import (  # noqa: F401
+    baseline_de_desempenho,
+    csvs_de_desempenho,
+)
+
+pytestmark = pytest.mark.desempenho
+
+# Limites absolutos, válidos em qualquer máquina; a comparação com a baseline
+# (tests/fixtures/desempenho_baseline.json) é a verificação mais estrita
+LIMITES = {
+    "extracao": {"linhas_por_segundo": 20_000, "pico_bytes_por_linha": 2_000},
+    "agregacao": {"linhas_por_segundo": 100_000, "pico_bytes_por_linha": 200},
+    "renderizacao_texto": {
+        "linhas_por_segundo": 1_000_000,
+        "pico_bytes_por_linha": 100,
+    },
+    "renderizacao_json": {
+        "linhas_por_segundo": 1_000_000,
+        "pico_bytes_por_linha": 100,
+    },
+}
+
+
+def extrair(caminho, formato: str = "json") -> Relatorio:
+    relatorio = Relatorio(str(caminho), formato, usar_cache=False)
+    relatorio._Relatorio__extrair_dados_de_vendas()
+    return relatorio
+
+
+def medir(funcao, quantidade_de_linhas: int) -> dict[str, float]:
+    """
+    Mede a vazão (melhor de até 3 execuções, sem tracemalloc) e, em uma
+    execução separada, o pico de memória alocada, ambos por linha do CSV.
+    """
+    repeticoes = 3 if quantidade_de_linhas <= 100_000 else 1
+    duracoes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        duracoes.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "linhas_por_segundo": quantidade_de_linhas / min(duracoes),
+        "pico_bytes_por_linha": pico / quantidade_de_linhas,
+    }
+
+
+def verificar(etapa: str, medicao: dict, baseline: dict, config) -> None:
+    limites = LIMITES[etapa]
+    assert medicao["linhas_por_segundo"] >= limites["linhas_por_segundo"], medicao
+    assert medicao["pico_bytes_por_linha"] <= limites["pico_bytes_por_linha"], medicao
+
+    if config.getoption("--atualizar-baseline"):
+        baseline["etapas"][etapa] = {
+            nome: round(valor, 1) for nome, valor in medicao.items()
+        }
+        return
+
+    referencia = baseline["etapas"][etapa]
+    tolerancia = config.getoption("--desempenho-tolerancia")
+    tolerancia_vazao = tolerancia or baseline["tolerancia"]["linhas_por_segundo"]
+    tolerancia_memoria = tolerancia or baseline["tolerancia"]["pico_bytes_por_linha"]
+    vazao_minima = referencia["linhas_por_segundo"] * (1 - tolerancia_vazao)
+    memoria_maxima = referencia["pico_bytes_por_linha"] * (1 + tolerancia_memoria)
+    assert medicao["linhas_por_segundo"] >= vazao_minima, (
+        f"{etapa}: {medicao['linhas_por_segundo']:.0f} linhas/s, "
+        f"mínimo de {vazao_minima:.0f} pela baseline"
+    )
+    assert medicao["pico_bytes_por_linha"] <= memoria_maxima, (
+        f"{etapa}: {medicao['pico_bytes_por_linha']:.1f} bytes/linha, "
+        f"máximo de {memoria_maxima:.1f} pela baseline"
+    )
+
+
+def test_desempenho_extracao(
+    request, csvs_de_desempenho, baseline_de_desempenho, quantidade_de_linhas
+):
+    # Arrange
+    caminho = csvs_de_desempenho(quantidade_de_linhas)
+
+    # Act
+    medicao = medir(lambda: extrair(caminho), quantidade_de_linhas)
+
+    # Assert
+    verificar("extracao", medicao, baseline_de_desempenho, request.config)
+
+
+def test_desempenho_agregacao(
+    request, csvs_de_desempenho, baseline_de_desempenho, quantidade_de_linhas
+):
+    # Arrange
+    vendas = extrair(csvs_de_desempenho(quantidade_de_linhas)).vendas
+
+    # Act
+    medicao = medir(lambda: agregar(AGREGADORES_PADRAO, vendas), quantidade_de_linhas)
+
+    # Assert
+    verificar("agregacao", medicao, baseline_de_desempenho, request.config)
+
+
+@pytest.mark.parametrize("formato", ["texto", "json"])
+def test_desempenho_renderizacao(
+    request, csvs_de_desempenho, baseline_de_desempenho, quantidade_de_linhas, formato
+):
+    # Arrange
+    relatorio = extrair(
+        csvs_de_desempenho(quantidade_de_linhas),
+        "json" if formato == "json" else "text",
+    )
+
+    # Act
+    medicao = medir(
+        lambda: "".join(relatorio._Relatorio__renderizar_relatorio()),
+        quantidade_de_linhas,
+    )
+
+    # Assert
+    verificar(
+        f"renderizacao_{formato}", medicao, baseline_de_desempenho, request.config
+    )
@@ -0,0 +1,292 @@
+import csv
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from helpers import recursos
+from parser.main import main
+from parser.motores import (
+    escolher_motor,
+    escolher_motor_do_arquivo,
+    estimar_produtos,
+)
+from parser.pipeline import dividir_em_trechos
+from parser.relatorios import Relatorio
+from tests.fixtures.validacao import csv_com_erros  # noqa: F401
+from tests.test_pipeline import criar_relatorio, escrever_vendas
+
+MB = 1024 * 1024
+GB = 1024 * MB
+
+
+@pytest.mark.parametrize(
+    "tamanho, produtos, memoria, cpus, opcoes, motor, processos",
+    [
+        (10 * MB, 1_000, 8 * GB, 1, {}, "memoria", 1),
+        (10 * MB, 1_000, None, 1, {}, "memoria", 1),
+        (10 * GB, 1_000, 64 * GB, 64, {}, "multiprocesso", 64),
+        (200 * MB, 1_000, 64 * GB, 64, {}, "multiprocesso", 6),
+        (10 * GB, 1_000, 1 * GB, 1, {}, "streaming", 1),
+        (10 * GB, 50_000_000, 1 * GB, 1, {}, "disco", 1),
+        (10 * GB, 1_000, 64 * GB, 64, {"processos_maximos": 1}, "streaming", 1),
+        (1 * MB, 1_000, 8 * GB, 1, {"processos_maximos": 4}, "multiprocesso", 4),
+        (10 * MB, 1_000, 8 * GB, 8, {"memoria_maxima": 64 * MB}, "disco", 1),
+        (1 * GB, 1_000, 64 * GB, 64, {"paralelizavel": False}, "memoria", 1),
+    ],
+    ids=[
+        "arquivo-pequeno",
+        "memoria-desconhecida",
+        "muitas-cpus",
+        "processos-pelo-volume",
+        "pouca-memoria",
+        "muitos-produtos",
+        "max-workers-1",
+        "max-workers-forca-processos",
+        "max-memory",
+        "nao-paralelizavel",
+    ],
+)
+def test_escolher_motor(tamanho, produtos, memoria, cpus, opcoes, motor, processos):
+    # Act
+    escolha = escolher_motor(tamanho, produtos, memoria, cpus, **opcoes)
+
+    # Assert
+    assert (escolha.motor, escolha.processos) == (motor, processos)
+    if motor == "disco":
+        assert escolha.memoria_maxima == opcoes.get("memoria_maxima", GB // 2)
+
+
+def test_estimar_produtos():
+    # Act / Assert
+    assert estimar_produtos(1 * GB, 30_000, 1_000) == 2_000
+    assert estimar_produtos(2_000, 100, 100) == 100
+    assert estimar_produtos(2_000, 0, 0) == 100
+
+
+@pytest.mark.parametrize("versao", ["v1", "v2"])
+def test_recursos_do_cgroup(tmp_path, monkeypatch, versao):
+    # Arrange
+    if versao == "v2":
+        grupo = tmp_path / "cgroup" / "app"
+        grupo.mkdir(parents=True)
+        (grupo / "memory.max").write_text("536870912\n")
+        (grupo / "memory.current").write_text("134217728\n")
+        (grupo / "cpu.max").write_text("150000 100000\n")
+        (tmp_path / "cgroup" / "memory.max").write_text("max\n")
+        cgroup_do_processo = "0::/app\n"
+    else:
+        for controlador, arquivos in {
+            "memory": {
+                "memory.limit_in_bytes": "536870912",
+                "memory.usage_in_bytes": "134217728",
+            },
+            "cpu,cpuacct": {
+                "cpu.cfs_quota_us": "150000",
+                "cpu.cfs_period_us": "100000",
+            },
+        }.items():
+            grupo = tmp_path / "cgroup" / controlador / "app"
+            grupo.mkdir(parents=True)
+            for nome, valor in arquivos.items():
+                (grupo / nome).write_text(valor)
+        (tmp_path / "cgroup" / "memory" / "memory.limit_in_bytes").write_text(
+            "9223372036854771712"
+        )
+        cgroup_do_processo = "4:memory:/app\n3:cpu,cpuacct:/app\n"
+    (tmp_path / "cgroup_do_processo").write_text(cgroup_do_processo)
+    (tmp_path / "meminfo").write_text("MemTotal: 16000 kB\nMemAvailable: 800000 kB\n")
+    monkeypatch.setattr(recursos, "RAIZ_CGROUP", tmp_path / "cgroup")
+    monkeypatch.setattr(
+        recursos, "CAMINHO_CGROUP_DO_PROCESSO", tmp_path / "cgroup_do_processo"
+    )
+    monkeypatch.setattr(recursos, "CAMINHO_MEMINFO", tmp_path / "meminfo")
+    monkeypatch.setattr(recursos.os, "sched_getaffinity", lambda _: set(range(8)))
+
+    # Act / Assert
+    assert recursos.memoria_disponivel() == 512 * MB - 128 * MB
+    assert recursos.cpus_disponiveis() == 2
+
+
+def test_dividir_em_trechos(tmp_path):
+    # Arrange
+    arquivo = escrever_vendas(tmp_path / "vendas.csv", 500)
+
+    # Act
+    with arquivo.open("rb") as file:
+        inicio = len(file.readline())
+        trechos = dividir_em_trechos(file, inicio, 7)
+        file.seek(0)
+        conteudo = file.read()
+
+    # Assert
+    assert len(trechos) == 7
+    assert trechos[0][0] == inicio and trechos[-1][1] == len(conteudo)
+    assert all(fim == proximo for (_, fim), (proximo, _) in zip(trechos, trechos[1:]))
+    assert all(conteudo[fim - 1 : fim] == b"\n" for _, fim in trechos)
+
+
+@pytest.mark.parametrize("formato", ["text", "json"])
+def test_relatorio_multiprocesso_identico_ao_sequencial(tmp_path, formato):
+    # Arrange
+    arquivo = escrever_vendas(tmp_path / "vendas.csv", 3_000)
+    sequencial = criar_relatorio(arquivo, formato, data_inicial="01/02/2025")
+    processos = criar_relatorio(
+        arquivo,
+        formato,
+        data_inicial="01/02/2025",
+        motor=escolher_motor_do_arquivo(arquivo, processos_maximos=3),
+        tamanho_bloco=1_000,
+    )
+    processos.base_caminho_relatorio = tmp_path / "relatorio_processos"
+
+    # Act
+    esperado = sequencial.gerar_relatorio().read_text(encoding="utf-8")
+    resultado = processos.gerar_relatorio().read_text(encoding="utf-8")
+
+    # Assert
+    assert resultado == esperado
+    assert (processos.motor, processos.processos) == ("multiprocesso", 3)
+    assert processos.vendas == []
+    assert processos.linhas_lidas == sequencial.linhas_lidas
+
+
+def test_relatorio_multiprocesso_politicas_de_erro(csv_com_erros, tmp_path):
+    # Arrange
+    quarentena = tmp_path / "quarentena.csv"
+    relatorio = Relatorio(
+        str(csv_com_erros),
+        "text",
+        politica_de_erro="quarantine",
+        caminho_quarentena=quarentena,
+        motor=escolher_motor_do_arquivo(csv_com_erros, processos_maximos=2),
+        tamanho_bloco=40,
+    )
+
+    # Act
+    relatorio._Relatorio__extrair_dados_de_vendas()
+
+    # Assert
+    with quarentena.open(encoding="utf-8") as file:
+        linhas = list(csv.DictReader(file))
+    assert [linha["linha"] for linha in linhas] == ["3", "5", "7", "8"]
+    metricas = relatorio._Relatorio__obter_metricas()
+    assert list(metricas["total_por_produto"]) == ["Camiseta", "Tênis"]
+    with pytest.raises(ValueError) as excinfo:
+        Relatorio(
+            str(csv_com_erros),
+            "text",
+            motor=escolher_motor_do_arquivo(csv_com_erros, processos_maximos=2),
+        ).gerar_relatorio()
+    assert "linha 3: quantidade inválida: 'dois'" in str(excinfo.value)
+
+
+@pytest.mark.parametrize("memoria, motor", [(1 * MB, "streaming"), (40_000, "disco")])
+def test_relatorio_escolhe_motor_pela_memoria(tmp_path, monkeypatch, memoria, motor):
+    # Arrange
+    arquivo = escrever_vendas(tmp_path / "vendas.csv", 3_000)
+    monkeypatch.setattr("parser.motores.memoria_disponivel", lambda: memoria)
+    monkeypatch.setattr("parser.motores.cpus_disponiveis", lambda: 1)
+    em_memoria = Relatorio(str(arquivo), "json", usar_cache=False)
+    em_memoria.motor = "memoria"
+    relatorio = Relatorio(str(arquivo), "json", usar_cache=False)
+
+    # Act
+    for atual in (em_memoria, relatorio):
+        atual._Relatorio__extrair_dados_de_vendas()
+
+    # Assert
+    assert relatorio.motor == motor
+    assert relatorio.vendas == []
+    assert (relatorio.agregacao_externa is not None) == (motor == "disco")
+    assert "".join(relatorio._Relatorio__renderizar_relatorio()) == "".join(
+        em_memoria._Relatorio__renderizar_relatorio()
+    )
+    if relatorio.agregacao_externa:
+        relatorio.agregacao_externa.fechar()
+
+
+def test_relatorio_arquivo_pequeno_mantem_vendas(tmp_path):
+    # Arrange
+    arquivo = escrever_vendas(tmp_path / "vendas.csv", 100)
+    relatorio = Relatorio(str(arquivo), "json", usar_cache=False)
+
+    # Act
+    relatorio._Relatorio__extrair_dados_de_vendas()
+
+    # Assert
+    assert relatorio.motor == "memoria"
+    assert len(relatorio.vendas) == 100
+
+
+@pytest.mark.parametrize(
+    "memoria, motor", [(256 * 1024, "streaming"), (40_000, "disco")]
+)
+def test_atualizar_relatorio_com_motor_escolhido(tmp_path, monkeypatch, memoria, motor):
+    # Arrange
+    arquivo = escrever_vendas(tmp_path / "vendas.csv", 3_000)
+    conteudo = arquivo.read_text(encoding="utf-8").splitlines(keepends=True)
+    arquivo.write_text("".join(conteudo[:1_501]), encoding="utf-8")
+    monkeypatch.setattr("parser.motores.memoria_disponivel", lambda: memoria)
+    monkeypatch.setattr("parser.motores.cpus_disponiveis", lambda: 1)
+    relatorio = Relatorio(str(arquivo), "json", usar_cache=False)
+    caminho_saida = tmp_path / "relatorio_vendas"
+    relatorio.atualizar_relatorio(caminho_saida)
+
+    # Act
+    with arquivo.open("a", encoding="utf-8") as file:
+        file.writelines(conteudo[1_501:])
+    resultado = relatorio.atualizar_relatorio(caminho_saida).read_text(encoding="utf-8")
+
+    # Assert
+    em_memoria = Relatorio(str(arquivo), "json", usar_cache=False)
+    em_memoria.motor = "memoria"
+    em_memoria._Relatorio__extrair_dados_de_vendas()
+    assert relatorio.motor == motor
+    assert resultado == "".join(em_memoria._Relatorio__renderizar_relatorio())
+    if relatorio.agregacao_externa:
+        relatorio.agregacao_externa.fechar()
+
+
+def test_escolher_motor_do_arquivo(tmp_path, monkeypatch):
+    # Arrange
+    arquivo = escrever_vendas(tmp_path / "vendas.csv", 3_000)
+    sem_produto = tmp_path / "sem_produto.csv"
+    sem_produto.write_text("item,quantidade\nCamiseta,1\n", encoding="utf-8")
+    monkeypatch.setattr("parser.motores.memoria_disponivel", lambda: 40_000)
+    monkeypatch.setattr("parser.motores.cpus_disponiveis", lambda: 1)
+
+    # Act
+    escolha = escolher_motor_do_arquivo(arquivo)
+    com_orcamento = escolher_motor_do_arquivo(arquivo, memoria_maxima=5_000)
+
+    # Assert
+    assert (escolha.motor, escolha.memoria_maxima) == ("disco", 20_000)
+    assert (com_orcamento.motor, com_orcamento.memoria_maxima) == ("disco", 5_000)
+    assert escolher_motor_do_arquivo(tmp_path / "inexistente.csv") is None
+    assert escolher_motor_do_arquivo(sem_produto) is None
+
+
+@pytest.mark.parametrize(
+    "opcoes, motor",
+    [
+        ([], None),
+        (["--max-memory", "4K"], "disco"),
+        (["--max-workers", "2"], "multiprocesso"),
+    ],
+)
+def test_main_repassa_motor_escolhido_pelos_limites(tmp_path, opcoes, motor):
+    # Arrange
+    arquivo = escrever_vendas(tmp_path / "vendas.csv", 100)
+
+    # Act
+    with (
+        patch.object(sys, "argv", ["main.py", str(arquivo), *opcoes]),
+        patch("parser.main.Relatorio") as mock_relatorio_class,
+        patch("builtins.print"),
+    ):
+        main()
+
+    # Assert
+    escolha = mock_relatorio_class.call_args.kwargs["motor"]
+    assert (escolha and escolha.motor) == motor
@@ -0,0 +1,166 @@
+import os
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from parser.main import watch
+from parser.observador import ObservadorDeArquivo
+from parser.relatorios import Relatorio
+
+CABECALHO = "produto,quantidade,preco_unitario,data\n"
+
+
+@pytest.mark.parametrize("usar_inotify", [True, False], ids=["inotify", "polling"])
+def test_aguardar_alteracao_detecta_escrita(tmp_path, usar_inotify):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text(CABECALHO, encoding="utf-8")
+    observador = ObservadorDeArquivo(
+        arquivo, debounce=0.05, intervalo=0.05, usar_inotify=usar_inotify
+    )
+    escritor = threading.Timer(
+        0.1,
+        lambda: arquivo.write_text(
+            CABECALHO + "Camiseta,1,49.9,01/01/2025\n", encoding="utf-8"
+        ),
+    )
+
+    # Act
+    escritor.start()
+    alterado = observador.aguardar_alteracao()
+    observador.fechar()
+
+    # Assert
+    assert alterado is True
+
+
+def test_aguardar_alteracao_interrompido():
+    # Arrange
+    observador = ObservadorDeArquivo(
+        "inexistente.csv", intervalo=0.01, usar_inotify=False
+    )
+    observador.parar()
+
+    # Act / Assert
+    assert observador.aguardar_alteracao() is False
+
+
+def test_atualizar_relatorio_agrega_apenas_linhas_novas(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text(CABECALHO + "Camiseta,3,49.9,01/01/2025\n", encoding="utf-8")
+    relatorio = Relatorio(str(arquivo), "json")
+    caminho_saida = tmp_path / "output" / "relatorio_vendas"
+
+    # Act
+    relatorio.atualizar_relatorio(caminho_saida)
+    with arquivo.open("a", encoding="utf-8") as file:
+        # A última linha ainda está sendo escrita e não deve ser lida
+        file.write("Calça,2,99.9,13/08/2025\nTênis,1,19")
+    resultado = relatorio.atualizar_relatorio(caminho_saida)
+
+    # Assert
+    assert resultado == tmp_path / "output" / "relatorio_vendas.json"
+    assert [venda.produto.nome for venda in relatorio.vendas] == ["Camiseta", "Calça"]
+    assert '"total_vendas": "349.50"' in resultado.read_text(encoding="utf-8")
+    assert not list(resultado.parent.glob("*.tmp"))
+
+
+def test_atualizar_relatorio_arquivo_truncado_rele_do_inicio(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text(
+        CABECALHO + "Camiseta,3,49.9,01/01/2025\nCalça,2,99.9,13/08/2025\n",
+        encoding="utf-8",
+    )
+    relatorio = Relatorio(str(arquivo), "text")
+    caminho_saida = tmp_path / "relatorio_vendas"
+    relatorio.atualizar_relatorio(caminho_saida)
+
+    # Act
+    arquivo.write_text(CABECALHO + "Tênis,1,199.9,01/08/2025\n", encoding="utf-8")
+    relatorio.atualizar_relatorio(caminho_saida)
+
+    # Assert
+    assert [venda.produto.nome for venda in relatorio.vendas] == ["Tênis"]
+
+
+def test_atualizar_relatorio_arquivo_substituido_rele_do_inicio(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text(CABECALHO + "Camiseta,3,49.9,01/01/2025\n", encoding="utf-8")
+    relatorio = Relatorio(str(arquivo), "json")
+    caminho_saida = tmp_path / "relatorio_vendas"
+    relatorio.atualizar_relatorio(caminho_saida)
+    novo = tmp_path / "vendas.csv.novo"
+    novo.write_text(
+        CABECALHO + "Tênis,1,199.9,01/08/2025\nCalça,2,99.9,13/08/2025\n",
+        encoding="utf-8",
+    )
+
+    # Act
+    # Substituição atômica por um arquivo maior (outro inode)
+    os.replace(novo, arquivo)
+    resultado = relatorio.atualizar_relatorio(caminho_saida)
+
+    # Assert
+    assert [venda.produto.nome for venda in relatorio.vendas] == ["Tênis", "Calça"]
+    assert '"total_vendas": "399.70"' in resultado.read_text(encoding="utf-8")
+
+
+def test_watch_continua_apos_erro_na_atualizacao(tmp_path, capsys):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    conteudos = [
+        # Linha inválida com a política fail
+        CABECALHO + "Camiseta,dois,49.9,01/01/2025\n",
+        CABECALHO + "Camiseta,2,49.9,01/01/2025\n",
+    ]
+
+    class ObservadorFalso:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def observar(self, ao_alterar):
+            for conteudo in conteudos:
+                arquivo.write_text(conteudo, encoding="utf-8")
+                ao_alterar()
+
+    # Act
+    # O arquivo ainda não existe na primeira atualização
+    with patch("parser.main.ObservadorDeArquivo", ObservadorFalso):
+        watch([str(arquivo), "--format", "json", "--output-dir", str(tmp_path)])
+
+    # Assert
+    saida = capsys.readouterr().out.splitlines()
+    caminho_relatorio = tmp_path / "relatorio_vendas.json"
+    assert saida == [f"Relatório atualizado em: {caminho_relatorio}"]
+    assert '"total_vendas": "99.80"' in caminho_relatorio.read_text(encoding="utf-8")
+
+
+def test_watch_de_arquivos_com_pontos_no_nome_nao_compartilham_relatorio(tmp_path):
+    # Arrange
+    arquivos = [tmp_path / "vendas.2025.csv", tmp_path / "vendas.2026.csv"]
+    arquivos[0].write_text(CABECALHO + "Camiseta,1,49.9,01/01/2025\n", encoding="utf-8")
+    arquivos[1].write_text(CABECALHO + "Bermuda,1,99.9,01/01/2026\n", encoding="utf-8")
+
+    class ObservadorFalso:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def observar(self, ao_alterar):
+            pass
+
+    # Act
+    with patch("parser.main.ObservadorDeArquivo", ObservadorFalso):
+        for arquivo in arquivos:
+            watch([str(arquivo), "--format", "json", "--output-dir", str(tmp_path)])
+
+    # Assert
+    assert '"Camiseta"' in (tmp_path / "relatorio_vendas.2025.json").read_text(
+        encoding="utf-8"
+    )
+    assert '"Bermuda"' in (tmp_path / "relatorio_vendas.2026.json").read_text(
+        encoding="utf-8"
+    )
@@ -0,0 +1,142 @@
+import csv
+from datetime import date, timedelta
+
+import pytest
+
+from parser.ordenacao import encontrar_posicao_da_data
+from parser.relatorios import Relatorio
+
+CABECALHO = "produto,quantidade,preco_unitario,data\n"
+
+
+def escrever_vendas_ordenadas(caminho, dias: int = 200, por_dia: int = 50) -> None:
+    inicio = date(2025, 1, 1)
+    with caminho.open("w", encoding="utf-8") as file:
+        file.write(CABECALHO)
+        for dia in range(0, dias, 2):
+            data = (inicio + timedelta(days=dia)).strftime("%d/%m/%Y")
+            for indice in range(por_dia):
+                file.write(f"Produto {indice % 7},{indice % 3 + 1},9.9,{data}\n")
+            # Linhas em branco não atrapalham a busca
+            file.write("\n")
+
+
+@pytest.mark.parametrize(
+    "data", [date(2024, 12, 1), date(2025, 1, 1), date(2025, 3, 4), date(2025, 3, 5)]
+)
+def test_encontrar_posicao_da_data_igual_a_busca_linear(tmp_path, data):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    escrever_vendas_ordenadas(arquivo)
+    conteudo = arquivo.read_bytes()
+    esperado = len(conteudo)
+    posicao = len(CABECALHO)
+    for linha in conteudo[len(CABECALHO) :].splitlines(keepends=True):
+        if linha.strip():
+            dia, mes, ano = linha.decode().strip().split(",")[3].split("/")
+            if date(int(ano), int(mes), int(dia)) >= data:
+                esperado = posicao
+                break
+        posicao += len(linha)
+
+    # Act
+    with arquivo.open("rb") as file:
+        resultado = encontrar_posicao_da_data(file, 3, data.toordinal(), len(CABECALHO))
+
+    # Assert
+    assert resultado <= esperado
+    # Entre a posição encontrada e a esperada só pode haver linhas em branco
+    assert not conteudo[resultado:esperado].strip()
+
+
+def test_encontrar_posicao_da_data_apos_o_fim(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    escrever_vendas_ordenadas(arquivo, dias=10)
+
+    # Act
+    with arquivo.open("rb") as file:
+        resultado = encontrar_posicao_da_data(
+            file, 3, date(2026, 1, 1).toordinal(), len(CABECALHO)
+        )
+
+    # Assert
+    assert not arquivo.read_bytes()[resultado:].strip()
+
+
+@pytest.mark.parametrize(
+    "data_inicial, data_final",
+    [("01/03/2025", "20/03/2025"), ("02/03/2025", ""), ("", "30/06/2025")],
+)
+def test_assumir_ordenado_le_apenas_o_trecho_filtrado(
+    tmp_path, data_inicial, data_final
+):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    escrever_vendas_ordenadas(arquivo)
+    completo = Relatorio(str(arquivo), "json", data_inicial, data_final)
+    ordenado = Relatorio(
+        str(arquivo), "json", data_inicial, data_final, assumir_ordenado=True
+    )
+
+    # Act
+    for relatorio in (completo, ordenado):
+        relatorio._Relatorio__extrair_dados_de_vendas()
+
+    # Assert
+    assert ordenado.vendas
+    assert ordenado.vendas == completo.vendas
+    assert ordenado.linhas_lidas < completo.linhas_lidas / 5
+
+
+def test_assumir_ordenado_arquivo_fora_de_ordem_relido_inteiro(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text(
+        CABECALHO
+        + "Camiseta,1,49.9,01/01/2025\n"
+        + "Calça,2,99.9,10/01/2025\n" * 30
+        + "Tênis,1,199.9,05/01/2025\n"
+        + "Meia,4,9.9,11/01/2025\n",
+        encoding="utf-8",
+    )
+    relatorio = Relatorio(
+        str(arquivo), "text", "02/01/2025", "31/01/2025", assumir_ordenado=True
+    )
+
+    # Act
+    relatorio._Relatorio__extrair_dados_de_vendas()
+
+    # Assert
+    assert [venda.produto.nome for venda in relatorio.vendas] == (
+        ["Calça"] * 30 + ["Tênis", "Meia"]
+    )
+    assert relatorio.linhas_lidas == 33
+
+
+def test_assumir_ordenado_identifica_linhas_invalidas_pela_posicao(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    escrever_vendas_ordenadas(arquivo, dias=20)
+    posicao_invalida = arquivo.stat().st_size
+    with arquivo.open("a", encoding="utf-8") as file:
+        file.write("Tênis,x,199.9,31/12/2025\n")
+    quarentena = tmp_path / "quarentena.csv"
+    relatorio = Relatorio(
+        str(arquivo),
+        "text",
+        "01/12/2025",
+        "31/12/2025",
+        politica_de_erro="quarantine",
+        caminho_quarentena=quarentena,
+        assumir_ordenado=True,
+    )
+
+    # Act
+    relatorio._Relatorio__extrair_dados_de_vendas()
+
+    # Assert
+    with quarentena.open(encoding="utf-8") as file:
+        linhas = list(csv.DictReader(file))
+    assert [linha["linha"] for linha in linhas] == [f"byte {posicao_invalida}"]
+    assert relatorio.vendas == []
@@ -0,0 +1,180 @@
+import csv
+import threading
+from pathlib import Path
+
+import pytest
+
+from parser.pipeline import PipelineDeLeitura
+from parser.relatorios import Relatorio
+from parser.sketches import ResumoAproximado
+from tests.fixtures.validacao import csv_com_erros  # noqa: F401
+
+CABECALHO = "produto,quantidade,preco_unitario,data\n"
+
+
+def escrever_vendas(caminho: Path, quantidade: int = 2_000) -> Path:
+    caminho.write_text(
+        CABECALHO
+        + "".join(
+            f"Produto {indice % 37},{indice % 5 + 1},{indice % 90 + 10}.5,"
+            f"{indice % 28 + 1:02d}/0{indice % 9 + 1}/2025\n"
+            + ("\n" if indice % 100 == 0 else "")
+            for indice in range(quantidade)
+        ),
+        encoding="utf-8",
+    )
+    return caminho
+
+
+def criar_relatorio(caminho: Path, formato: str, **kwargs) -> Relatorio:
+    relatorio = Relatorio(str(caminho), formato, usar_cache=False, **kwargs)
+    nome = "pipeline" if kwargs.get("trabalhadores") else "sequencial"
+    relatorio.base_caminho_relatorio = caminho.parent / nome / "relatorio"
+    relatorio.base_caminho_relatorio.parent.mkdir(exist_ok=True)
+    return relatorio
+
+
+def test_pipeline_produz_blocos_em_ordem(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "linhas.txt"
+    arquivo.write_bytes(b"".join(b"linha %d\n" % indice for indice in range(1_000)))
+    pipeline = PipelineDeLeitura(
+        lambda bloco: bloco.dados.decode().splitlines(),
+        trabalhadores=3,
+        tamanho_bloco=100,
+        profundidade=2,
+    )
+
+    # Act
+    with arquivo.open("rb") as file:
+        blocos = list(pipeline.executar(file, primeira_linha=1))
+
+    # Assert
+    assert [bloco.indice for bloco, _ in blocos] == list(range(len(blocos)))
+    assert [linha for _, linhas in blocos for linha in linhas] == [
+        f"linha {indice}" for indice in range(1_000)
+    ]
+    assert [bloco.primeira_linha for bloco, _ in blocos[:2]] == [
+        1,
+        1 + blocos[0][0].quantidade_de_linhas,
+    ]
+    assert blocos[-1][0].posicao_final == arquivo.stat().st_size
+    assert pipeline.metricas["blocos"]["itens"] == len(blocos) + 3
+    assert pipeline.metricas["blocos"]["profundidade_maxima"] <= 2
+
+
+def test_pipeline_repassa_erro_do_estagio(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "linhas.txt"
+    arquivo.write_bytes(b"linha\n" * 10_000)
+
+    def processar(bloco):
+        if bloco.indice == 5:
+            raise RuntimeError("falha no bloco 5")
+        return bloco.indice
+
+    pipeline = PipelineDeLeitura(processar, trabalhadores=2, tamanho_bloco=64)
+    threads_antes = threading.active_count()
+
+    # Act / Assert
+    with arquivo.open("rb") as file, pytest.raises(RuntimeError) as excinfo:
+        list(pipeline.executar(file, primeira_linha=1))
+    assert "falha no bloco 5" in str(excinfo.value)
+    assert threading.active_count() == threads_antes
+
+
+def test_pipeline_configuracao_invalida():
+    # Act / Assert
+    with pytest.raises(ValueError) as excinfo:
+        PipelineDeLeitura(lambda bloco: None, trabalhadores=0)
+    assert "Configuração de pipeline inválida" in str(excinfo.value)
+
+
+@pytest.mark.parametrize("formato", ["text", "json"])
+def test_relatorio_em_pipeline_identico_ao_sequencial(tmp_path, formato):
+    # Arrange
+    arquivo = escrever_vendas(tmp_path / "vendas.csv")
+    sequencial = criar_relatorio(arquivo, formato, data_inicial="01/02/2025")
+    pipeline = criar_relatorio(
+        arquivo,
+        formato,
+        data_inicial="01/02/2025",
+        trabalhadores=3,
+        tamanho_bloco=512,
+    )
+
+    # Act
+    esperado = sequencial.gerar_relatorio().read_text(encoding="utf-8")
+    resultado = pipeline.gerar_relatorio().read_text(encoding="utf-8")
+
+    # Assert
+    assert resultado == esperado
+    assert pipeline.vendas == sequencial.vendas
+    assert pipeline.linhas_lidas == sequencial.linhas_lidas
+    assert pipeline.metricas_do_pipeline["resultados"]["itens"] > 1
+
+
+def test_relatorio_aproximado_em_pipeline(tmp_path):
+    # Arrange
+    arquivo = escrever_vendas(tmp_path / "vendas.csv")
+    sequencial = Relatorio(str(arquivo), "json", aproximado=True)
+    pipeline = Relatorio(
+        str(arquivo), "json", aproximado=True, trabalhadores=2, tamanho_bloco=1_000
+    )
+
+    # Act
+    for relatorio in (sequencial, pipeline):
+        relatorio._Relatorio__extrair_dados_de_vendas()
+
+    # Assert
+    assert isinstance(pipeline.resumo_aproximado, ResumoAproximado)
+    assert pipeline.resumo_aproximado.para_dict() == (
+        sequencial.resumo_aproximado.para_dict()
+    )
+
+
+def test_relatorio_em_pipeline_politicas_de_erro(csv_com_erros, tmp_path):
+    # Arrange
+    quarentena = tmp_path / "quarentena.csv"
+    relatorio = Relatorio(
+        str(csv_com_erros),
+        "text",
+        politica_de_erro="quarantine",
+        caminho_quarentena=quarentena,
+        trabalhadores=2,
+        tamanho_bloco=40,
+    )
+
+    # Act
+    relatorio._Relatorio__extrair_dados_de_vendas()
+
+    # Assert
+    with quarentena.open(encoding="utf-8") as file:
+        linhas = list(csv.DictReader(file))
+    assert [linha["linha"] for linha in linhas] == ["3", "5", "7", "8"]
+    assert [venda.produto.nome for venda in relatorio.vendas] == ["Camiseta", "Tênis"]
+    with pytest.raises(ValueError) as excinfo:
+        Relatorio(str(csv_com_erros), "text", trabalhadores=2).gerar_relatorio()
+    assert "linha 3: quantidade inválida: 'dois'" in str(excinfo.value)
+
+
+def test_atualizar_relatorio_em_pipeline_ignora_linha_incompleta(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text(
+        CABECALHO + "Camiseta,3,49.9,01/01/2025\nCalça,2,99", encoding="utf-8"
+    )
+    relatorio = Relatorio(str(arquivo), "json", trabalhadores=2, tamanho_bloco=16)
+    saida = tmp_path / "relatorio"
+
+    # Act
+    relatorio.atualizar_relatorio(saida)
+    vendas_antes = len(relatorio.vendas)
+    with arquivo.open("a", encoding="utf-8") as file:
+        file.write(".9,13/08/2025\n")
+    relatorio.atualizar_relatorio(saida)
+
+    # Assert
+    assert vendas_antes == 1
+    assert [venda.produto.nome for venda in relatorio.vendas] == ["Camiseta", "Calça"]
+    assert relatorio.linhas_lidas == 2
@@ -1,9 +1,14 @@
+import json
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from helpers.arquivos import escrever_arquivo_atomicamente, obter_umask
 from parser.modelos import Produto, Venda
 from parser.relatorios import Relatorio
 from tests.fixtures.relatorios import (
@@ -299,37 +304,48 @@ def test_prepara_e_valida_as_datas_invalida():
     assert "Data inicial não pode ser maior que a data final." in str(excinfo.value)
 
 
-def test_calcular_total_vendas_sem_vendas():
+def test_relatorios_simultaneos_nao_se_sobrescrevem(
+    monkeypatch, dummy_csv_file, tmp_path
+):
     # Arrange
-    relatorio = Relatorio("dummy.csv", "text")
-    relatorio.vendas = []
-    # Act
-    total = relatorio._Relatorio__calcular_total_vendas()
-    # Assert
-    assert total == Decimal("0.00")
-
+    monkeypatch.setattr(
+        "helpers.date_handler.DateHandler.obter_data_e_hora_para_salvar_relatorio",
+        lambda: "2025-01-01_00-00-00",
+    )
+    relatorios = [
+        Relatorio(
+            "dummy.csv",
+            "json",
+            usar_cache=False,
+            diretorio_saida=tmp_path / "saida" / "jobs",
+        )
+        for _ in range(8)
+    ]
 
-def test_obter_maior_venda_sem_vendas():
-    # Arrange
-    relatorio = Relatorio("dummy.csv", "text")
-    relatorio.vendas = []
     # Act
-    maior = relatorio._Relatorio__obter_maior_venda()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        caminhos = list(executor.map(Relatorio.gerar_relatorio, relatorios))
+
     # Assert
-    assert maior is None
+    assert len(set(caminhos)) == 8
+    assert sorted(caminhos) == sorted((tmp_path / "saida" / "jobs").iterdir())
+    for caminho in caminhos:
+        assert caminho.name.startswith("relatorio_2025-01-01_00-00-00_")
+        assert json.loads(caminho.read_text(encoding="utf-8"))["total_vendas"]
+        assert stat.S_IMODE(caminho.stat().st_mode) == 0o666 & ~obter_umask()
 
 
-def test_obter_maior_venda_com_vendas():
+def test_escrever_arquivo_atomicamente_respeita_umask(tmp_path):
     # Arrange
-    relatorio = Relatorio("dummy.csv", "text")
-    produto1 = Produto(nome="Camiseta", preco=Decimal("49.90"))
-    produto2 = Produto(nome="Calça", preco=Decimal("99.90"))
-    venda1 = Venda(produto=produto1, quantidade=2, data_str="2025-01-01")
-    venda2 = Venda(produto=produto1, quantidade=3, data_str="2025-01-02")
-    venda3 = Venda(produto=produto2, quantidade=1, data_str="2025-01-03")
-    relatorio.vendas = [venda1, venda2, venda3]
+    caminho = tmp_path / "relatorio.txt"
+    umask_anterior = os.umask(0o027)
+
     # Act
-    maior = relatorio._Relatorio__obter_maior_venda()
+    try:
+        escrever_arquivo_atomicamente(caminho, "conteudo")
+    finally:
+        os.umask(umask_anterior)
+
     # Assert
-    assert maior.produto.nome == "Camiseta"
-    assert maior.quantidade == 5
+    assert obter_umask() == umask_anterior
+    assert stat.S_IMODE(caminho.stat().st_mode) == 0o640
@@ -0,0 +1,138 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from parser.relatorios import Relatorio
+from parser.sketches import HyperLogLog, ResumoAproximado, SpaceSaving, TDigest
+from tests.fixtures.relatorios import dummy_csv_file  # noqa: F401
+
+
+@pytest.mark.parametrize("cardinalidade", [10, 1_000, 50_000])
+def test_hyperloglog_estima_dentro_do_erro(cardinalidade):
+    # Arrange
+    hll = HyperLogLog(precisao=12)
+
+    # Act
+    for indice in range(cardinalidade):
+        hll.adicionar(f"produto-{indice}")
+        hll.adicionar(f"produto-{indice}")
+
+    # Assert
+    assert abs(hll.estimar() - cardinalidade) <= 4 * hll.erro_padrao * cardinalidade
+
+
+def test_hyperloglog_mesclar():
+    # Arrange
+    primeiro, segundo = HyperLogLog(), HyperLogLog()
+    for indice in range(500):
+        primeiro.adicionar(f"a-{indice}")
+        segundo.adicionar(f"b-{indice}")
+
+    # Act
+    primeiro.mesclar(segundo)
+
+    # Assert
+    assert abs(primeiro.estimar() - 1000) <= 40
+
+
+def test_hyperloglog_precisao_invalida():
+    # Act / Assert
+    with pytest.raises(ValueError):
+        HyperLogLog(precisao=30)
+
+
+def test_space_saving_encontra_heavy_hitters():
+    # Arrange
+    space_saving = SpaceSaving(capacidade=20)
+    fluxo = [f"raro-{indice}" for indice in range(5_000)]
+    fluxo += ["Camiseta"] * 3_000 + ["Calça"] * 2_000
+    random.Random(42).shuffle(fluxo)
+
+    # Act
+    for item in fluxo:
+        space_saving.adicionar(item)
+    mais_frequentes = space_saving.mais_frequentes(2)
+
+    # Assert
+    assert [item for item, _, _ in mais_frequentes] == ["Camiseta", "Calça"]
+    for item, contagem, erro in mais_frequentes:
+        real = fluxo.count(item)
+        assert contagem - erro <= real <= contagem
+        assert erro <= space_saving.erro_maximo
+    assert len(space_saving.contadores) == 20
+
+
+def test_tdigest_quantis():
+    # Arrange
+    tdigest = TDigest()
+    valores = list(range(1, 10_001))
+    random.Random(7).shuffle(valores)
+
+    # Act
+    for valor in valores:
+        tdigest.adicionar(valor)
+
+    # Assert
+    assert tdigest.quantil(0) == 1
+    assert tdigest.quantil(1) == 10_000
+    assert abs(tdigest.quantil(0.5) - 5_000) <= 100
+    assert abs(tdigest.quantil(0.99) - 9_900) <= 20
+    assert len(tdigest.centroides) < 200
+
+
+def test_resumo_aproximado_totais_exatos():
+    # Arrange
+    resumo = ResumoAproximado(capacidade=2)
+
+    # Act
+    resumo.atualizar("Camiseta", 3, Decimal("49.9"))
+    resumo.atualizar("Calça", 2, Decimal("99.9"))
+    resumo.atualizar("Camiseta", 1, Decimal("49.9"))
+    resultado = resumo.para_dict()
+
+    # Assert
+    assert resultado["total_vendas"] == "399.40"
+    assert resultado["quantidade_de_vendas"] == 3
+    assert resultado["produtos_distintos"]["estimativa"] == 2
+    produto = resultado["produtos_mais_vendidos"]["produtos"][0]
+    assert produto["nome"] == "Camiseta"
+    assert produto["quantidade_estimada"] == 4
+
+
+def test_resumo_aproximado_informa_percentis_parciais_apos_descarte():
+    # Arrange
+    resumo = ResumoAproximado(capacidade=2)
+
+    # Act
+    resumo.atualizar("Camiseta", 5, Decimal("49.9"))
+    resumo.atualizar("Calça", 1, Decimal("99.9"))
+    # Descarta a Calça; ao voltar, ela descarta o Tênis
+    resumo.atualizar("Tênis", 1, Decimal("19.9"))
+    resumo.atualizar("Calça", 4, Decimal("99.9"))
+    produtos = {
+        produto["nome"]: produto
+        for produto in resumo.para_dict()["produtos_mais_vendidos"]["produtos"]
+    }
+
+    # Assert
+    assert produtos["Camiseta"]["percentis_parciais"] is False
+    assert produtos["Calça"]["percentis_parciais"] is True
+    assert produtos["Calça"]["vendas_nos_percentis"] == 1
+    assert produtos["Calça"]["percentis_quantidade"]["p50"] == 4
+
+
+@pytest.mark.parametrize("formato", ["text", "json"])
+def test_gerar_relatorio_aproximado(formato, dummy_csv_file):
+    # Arrange
+    relatorio = Relatorio("dummy.csv", formato, aproximado=True)
+
+    # Act
+    resultado = relatorio.gerar_relatorio()
+
+    # Assert
+    conteudo = resultado.read_text(encoding="utf-8")
+    assert "998.90" in conteudo
+    assert "Camiseta" in conteudo
+    assert relatorio.vendas == []
+    resultado.unlink()
@@ -0,0 +1,133 @@
+import csv
+
+import pytest
+
+from parser.relatorios import Relatorio
+from parser.validacao import ValidadorDeVendas
+from tests.fixtures.validacao import csv_com_erros  # noqa: F401
+
+
+def test_verificar_lote_identifica_erros_por_coluna():
+    # Arrange
+    validador = ValidadorDeVendas()
+    lote = [
+        (2, {"produto": "A", "quantidade": "1", "preco_unitario": "1.5", "data": "x"}),
+        (3, {"produto": "B", "quantidade": "", "preco_unitario": "1", "data": "x"}),
+        (4, {"produto": " ", "quantidade": "1", "preco_unitario": "1", "data": "x"}),
+        (
+            5,
+            {
+                "produto": "C",
+                "quantidade": "2",
+                "preco_unitario": "3",
+                "data": "2025-01-01",
+            },
+        ),
+    ]
+
+    # Act
+    erros = validador.verificar_lote(lote)
+
+    # Assert
+    assert [(erro.numero_linha, erro.motivo) for erro in erros] == [
+        (2, "data inválida: 'x'"),
+        (3, "quantidade inválida: ''"),
+        (4, "produto não informado"),
+    ]
+
+
+def test_politica_invalida():
+    # Act / Assert
+    with pytest.raises(ValueError) as excinfo:
+        ValidadorDeVendas(politica="ignore")
+    assert "Política de erro desconhecida" in str(excinfo.value)
+
+
+def test_politica_fail_informa_numero_da_linha(csv_com_erros):
+    # Arrange
+    relatorio = Relatorio(str(csv_com_erros), "text")
+
+    # Act / Assert
+    with pytest.raises(ValueError) as excinfo:
+        relatorio.gerar_relatorio()
+    assert "linha 3: quantidade inválida: 'dois'" in str(excinfo.value)
+    assert "linha 5: data inválida: '32/01/2025'" in str(excinfo.value)
+
+
+def test_politica_skip_ignora_linhas_invalidas(csv_com_erros):
+    # Arrange
+    relatorio = Relatorio(str(csv_com_erros), "text", politica_de_erro="skip")
+
+    # Act
+    resultado = relatorio.gerar_relatorio()
+
+    # Assert
+    assert [venda.produto.nome for venda in relatorio.vendas] == ["Camiseta", "Tênis"]
+    assert relatorio.validador.total_de_erros == 4
+    resultado.unlink()
+
+
+def test_politica_quarantine_grava_linhas_invalidas(csv_com_erros, tmp_path):
+    # Arrange
+    quarentena = tmp_path / "quarentena.csv"
+    relatorio = Relatorio(
+        str(csv_com_erros),
+        "json",
+        politica_de_erro="quarantine",
+        caminho_quarentena=quarentena,
+    )
+
+    # Act
+    resultado = relatorio.gerar_relatorio()
+
+    # Assert
+    with quarentena.open(encoding="utf-8") as file:
+        linhas = list(csv.DictReader(file))
+    assert [linha["linha"] for linha in linhas] == ["3", "5", "7", "8"]
+    assert linhas[2]["motivo"] == "preço unitário inválido: 'abc'"
+    assert linhas[3]["motivo"] == "quantidade de colunas inválida"
+    resultado.unlink()
+
+
+def test_pre_verificar_encontra_erros_no_inicio_e_no_fim(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    linha_valida = "Camiseta,3,49.9,01/01/2025\n"
+    arquivo.write_text(
+        "produto,quantidade,preco_unitario,data\n"
+        "Calça,x,99.9,13/08/2025\n"
+        + linha_valida * 20_000
+        + "Tênis,1,199.9,99/99/2025\n",
+        encoding="utf-8",
+    )
+    validador = ValidadorDeVendas(politica="skip")
+
+    # Act
+    erros = validador.pre_verificar(arquivo, megabytes=0.01)
+
+    # Assert
+    assert [str(erro) for erro in erros] == [
+        "linha 2: quantidade inválida: 'x'",
+        f"byte {arquivo.stat().st_size - 26}: data inválida: '99/99/2025'",
+    ]
+
+
+def test_pre_verificar_politica_fail_interrompe(csv_com_erros):
+    # Arrange
+    relatorio = Relatorio(str(csv_com_erros), "text", pre_verificacao_mb=1)
+
+    # Act / Assert
+    with pytest.raises(ValueError) as excinfo:
+        relatorio.gerar_relatorio()
+    assert "4 linha(s) inválida(s)" in str(excinfo.value)
+
+
+def test_cabecalho_sem_colunas_obrigatorias(tmp_path):
+    # Arrange
+    arquivo = tmp_path / "vendas.csv"
+    arquivo.write_text("produto,quantidade\nCamiseta,1\n", encoding="utf-8")
+
+    # Act / Assert
+    with pytest.raises(ValueError) as excinfo:
+        Relatorio(str(arquivo), "text").gerar_relatorio()
+    assert "Colunas obrigatórias ausentes" in str(excinfo.value)